@@ -0,0 +1,163 @@
+''' Tickets text-to-speech announcements, composed out of shared fragments.
+
+A fragment is a piece of the announcement that's spoken on its own: the ticket prefix, number
+or name, the `tts.json` message and the office prefix and name. Announcements of different
+tickets share most of their fragments, and numbers are synthesized ahead from a library. So
+a new ticket can be announced right away, without synthesizing a phrase of its own.
+'''
+import app.database as data
+from app.middleware import gTTs
+from app.events import events
+from app.helpers import get_tts_safely
+from app.constants import TTS_FRAGMENTS_NUMBERS, TTS_DEFAULT_ENGINE
+
+
+def get_message(language, aliases=None):
+    ''' Get the announcement message of a language from `tts.json`.
+
+    Parameters
+    ----------
+        language: str
+            language of the message.
+        aliases: Aliases record
+            aliases to format the english message with, defaults to the stored aliases.
+
+    Returns
+    -------
+        String of the message ready to use.
+    '''
+    message = get_tts_safely().get(language, {}).get('message') or ''
+
+    if language.startswith('en'):
+        message = message.format((aliases or data.Aliases.get()).office)
+
+    return message
+
+
+def get_ticket_fragments(ticket, language):
+    ''' Get the fragments of a ticket announcement, same as the display's text of the ticket.
+
+    Parameters
+    ----------
+        ticket: Serial record
+            ticket to announce.
+        language: str
+            language of the announcement.
+
+    Returns
+    -------
+        List of fragments to speak in order.
+    '''
+    display_settings = data.Display_store.get()
+    office = ticket.office
+    prefix = office.prefix if display_settings.prefix else ''
+    fragments = [prefix]
+
+    if not ticket.n or display_settings.always_show_ticket_number:
+        fragments.append(str(ticket.number))
+
+    if ticket.n:
+        fragments.append(ticket.name)
+
+    if not data.Settings.get().single_row:
+        fragments += [get_message(language), prefix, office.name]
+
+    return [fragment for fragment in fragments if fragment and fragment.strip()]
+
+
+def get_fragments_library(language):
+    ''' Get the fragments shared between tickets announcements, to synthesize ahead.
+
+    Parameters
+    ----------
+        language: str
+            language of the announcements.
+
+    Returns
+    -------
+        List of unique fragments, ordered by how often they're spoken.
+    '''
+    offices = data.Office.query.all()
+    fragments = []
+
+    if not data.Settings.get().single_row:
+        fragments.append(get_message(language))
+
+    if data.Display_store.get().prefix:
+        fragments += [office.prefix for office in offices]
+
+    fragments += [office.name for office in offices]
+    fragments += [str(number) for number in range(TTS_FRAGMENTS_NUMBERS)]
+
+    return [fragment for fragment in dict.fromkeys(fragments) if fragment and fragment.strip()]
+
+
+def say(language, fragment, engine=TTS_DEFAULT_ENGINE):
+    ''' Synthesize a fragment, unless it's already cached.
+
+    Parameters
+    ----------
+        language: str
+            language of the fragment.
+        fragment: str
+            text of the fragment.
+        engine: str
+            name of the text-to-speech engine to synthesize with.
+
+    Returns
+    -------
+        String of the fragment audio file url, empty if it failed.
+    '''
+    return gTTs.say(language, fragment, engine)
+
+
+def is_cached(language, fragment, engine=TTS_DEFAULT_ENGINE):
+    ''' Check if a fragment audio file is cached, and still within the cache budget. '''
+    return gTTs.is_cached(language, fragment, engine)
+
+
+def pin(language, fragment, engine=TTS_DEFAULT_ENGINE):
+    ''' Pin a cached fragment, to keep it regardless of its age. '''
+    gTTs.pin(language, fragment, engine)
+
+
+def get_announcement_etag(ticket, languages):
+    ''' Get an entity tag of the ticket announcement audio files, in the announced languages.
+
+    Parameters
+    ----------
+        ticket: Serial record
+            ticket to announce.
+        languages: list
+            languages of the announcement.
+
+    Returns
+    -------
+        String of the entity tag, unquoted.
+    '''
+    display_settings = data.Display_store.get()
+    engines = [display_settings.get_tts_engine(language) for language in languages]
+    pulled = ticket.pdt and ticket.pdt.timestamp()
+
+    # NOTE: the records the fragments are made of are covered by the detached records generation
+    return '-'.join(map(str, [events.token, ticket.id, ticket.number, pulled, *languages,
+                              *engines, data.detached_records.generation, gTTs.generation]))
+
+
+def get_announcement(ticket, language):
+    ''' Get the ticket announcement audio files.
+
+    Parameters
+    ----------
+        ticket: Serial record
+            ticket to announce.
+        language: str
+            language of the announcement.
+
+    Returns
+    -------
+        List of the fragments audio files urls, to play in order.
+    '''
+    engine = data.Display_store.get().get_tts_engine(language)
+
+    return [say(language, fragment, engine) for fragment in get_ticket_fragments(ticket, language)]
@@ -1,2 +1,5 @@
 AUTH_HEADER_KEY = 'Authorization'
+NEXT_CURSOR_HEADER_KEY = 'X-Next-Cursor'
+CURSOR_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
 LIMIT_PER_CHUNK = 30
+LIMIT_PER_BULK = 10000
@@ -0,0 +1,31 @@
+from http import HTTPStatus
+from flask_restx import Resource
+from flask import request
+
+from app.api import api
+from app.api.helpers import token_required
+from app.api.serializers import StatisticsSerializer
+from app.database import Serial
+from app.statistics import queue_statistics
+
+
+def setup_statistics_endpoint():
+    endpoint = api.namespace(name='statistics',
+                             description='Endpoint to get the queue waiting and service time statistics.')
+
+    @endpoint.route('/')
+    class GetStatistics(Resource):
+        @endpoint.marshal_with(StatisticsSerializer)
+        @endpoint.param('office_id', 'to get the statistics of a specific office, by default None.')
+        @endpoint.param('task_id', 'to get the statistics of a specific task, by default None.')
+        @endpoint.doc(security='apiKey')
+        @token_required
+        def get(self):
+            ''' Get the queue statistics, and the estimated waiting time of a new ticket. '''
+            office_id = request.args.get('office_id', None, type=int)
+            task_id = request.args.get('task_id', None, type=int)
+
+            return dict(office_id=office_id,
+                        task_id=task_id,
+                        estimated_wait=Serial.get_estimated_wait(office_id, task_id),
+                        **queue_statistics.stats(office_id, task_id)), HTTPStatus.OK
@@ -1,11 +1,10 @@
 from http import HTTPStatus
 from flask_restx import Resource
-from flask import request
 
 from app.api import api
-from app.api.helpers import token_required
+from app.api.helpers import token_required, paginate
 from app.api.serializers import TaskSerializer
-from app.api.constants import LIMIT_PER_CHUNK
+from app.api.constants import LIMIT_PER_CHUNK, NEXT_CURSOR_HEADER_KEY
 from app.database import Task
 
 
@@ -16,13 +15,14 @@ def setup_tasks_endpoint():
     @endpoint.route('/')
     class ListTasks(Resource):
         @endpoint.marshal_list_with(TaskSerializer)
-        @endpoint.param('chunk', f'dividing tasks into chunks of {LIMIT_PER_CHUNK}, default is 1.')
+        @endpoint.param('cursor', f'cursor of the next {LIMIT_PER_CHUNK} tasks, from the '
+                        f'`{NEXT_CURSOR_HEADER_KEY}` response header.')
+        @endpoint.param('chunk', f'dividing tasks into chunks of {LIMIT_PER_CHUNK}, default is 1. '
+                        'deprecated in favor of `cursor`.')
         @endpoint.doc(security='apiKey')
         @token_required
         def get(self):
             ''' Get list of tasks. '''
-            chunk = request.args.get('chunk', 1, type=int)
+            tasks, next_cursor = paginate(Task.query, Task)
 
-            return Task.query.paginate(chunk,
-                                       per_page=LIMIT_PER_CHUNK,
-                                       error_out=False).items, HTTPStatus.OK
+            return tasks, HTTPStatus.OK, {NEXT_CURSOR_HEADER_KEY: next_cursor} if next_cursor else {}
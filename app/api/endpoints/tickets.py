@@ -3,42 +3,93 @@ from flask_restx import Resource, abort
 from flask import request
 
 from app.api import api
-from app.api.helpers import token_required, get_or_reject
-from app.api.serializers import TicketSerializer
-from app.api.constants import LIMIT_PER_CHUNK
-from app.database import Serial, Task, Office
+from app.api.helpers import token_required, get_or_reject, paginate
+from app.helpers import conditional_on_queue
+from app.api.serializers import TicketSerializer, PrintJobSerializer
+from app.api.constants import LIMIT_PER_CHUNK, LIMIT_PER_BULK, NEXT_CURSOR_HEADER_KEY
+from app.database import Serial, Task, Office, PrintJob
+from app.constants import PRINT_JOB_FAILED
 from app.middleware import db
 
 
+def get_bulk_entries(entries):
+    ''' Get the tasks, offices and names of the tickets to generate in bulk, or reject them.
+
+    Parameters
+    ----------
+        entries: list
+            dicts of the tickets `task_id`, `office_id` and `name`.
+
+    Returns
+    -------
+        List of `(task, office, name)` tuples, office can be None.
+    '''
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        abort(message='List of tickets must be entered.', code=HTTPStatus.BAD_REQUEST)
+
+    if not 0 < len(entries) <= LIMIT_PER_BULK:
+        abort(message=f'Tickets must be between 1 and {LIMIT_PER_BULK}.',
+              code=HTTPStatus.BAD_REQUEST)
+
+    tasks = {t.id: t for t in Task.query.filter(Task.id.in_({e.get('task_id') for e in entries}))}
+    offices = {o.id: o for o in Office.query.filter(Office.id.in_({e.get('office_id') for e in entries}))}
+
+    if not all(e.get('task_id') in tasks for e in entries):
+        abort(message='Task not found', code=HTTPStatus.NOT_FOUND)
+
+    if not all(e.get('office_id') in offices for e in entries if e.get('office_id') is not None):
+        abort(message='Office not found', code=HTTPStatus.NOT_FOUND)
+
+    if not all(e.get('name') for e in entries):
+        abort(message='Name must be entered for registered tickets.',
+              code=HTTPStatus.BAD_REQUEST)
+
+    bulk_entries = [(tasks[e.get('task_id')], offices.get(e.get('office_id')), e.get('name'))
+                    for e in entries]
+
+    for task, office, name in bulk_entries:
+        if not task.offices:
+            abort(message=f'Task {task.id} has no offices.', code=HTTPStatus.BAD_REQUEST)
+
+        if office and office not in task.offices:
+            abort(message=f'Office {office.id} is not linked to task {task.id}.',
+                  code=HTTPStatus.BAD_REQUEST)
+
+    return bulk_entries
+
+
 def setup_tickets_endpoint():
     endpoint = api.namespace(name='tickets',
                              description='Endpoint to handle tickets CRUD operations.')
 
     @endpoint.route('/')
     class ListDeleteAndCreateTickets(Resource):
+        @token_required
+        @conditional_on_queue()
         @endpoint.marshal_list_with(TicketSerializer)
         @endpoint.param('processed', 'get only processed tickets, by default False.')
-        @endpoint.param('chunk', f'dividing tickets into chunks of {LIMIT_PER_CHUNK}, default is 1.')
+        @endpoint.param('cursor', f'cursor of the next {LIMIT_PER_CHUNK} tickets, from the '
+                        f'`{NEXT_CURSOR_HEADER_KEY}` response header.')
+        @endpoint.param('chunk', f'dividing tickets into chunks of {LIMIT_PER_CHUNK}, default is 1. '
+                        'deprecated in favor of `cursor`.')
         @endpoint.doc(security='apiKey')
-        @token_required
         def get(self):
             ''' Get list of tickets. '''
-            chunk = request.args.get('chunk', 1, type=int)
             processed = request.args.get('processed', False, type=bool)
-            tickets = Serial.all_clean()
+            tickets = Serial.query
 
             if processed:
                 tickets = tickets.filter_by(p=True)
 
-            return tickets.paginate(chunk,
-                                    per_page=LIMIT_PER_CHUNK,
-                                    error_out=False).items, HTTPStatus.OK
+            tickets, next_cursor = paginate(tickets, Serial)
+
+            return tickets, HTTPStatus.OK, {NEXT_CURSOR_HEADER_KEY: next_cursor} if next_cursor else {}
 
         @endpoint.doc(security='apiKey')
         @token_required
         def delete(self):
             ''' Delete all tickets. '''
-            Serial.all_clean().delete()
+            Serial.query.delete()
             db.session.commit()
             return '', HTTPStatus.NO_CONTENT
 
@@ -65,10 +116,22 @@ def setup_tickets_endpoint():
                                                          name_or_number)
 
             if exception:
-                abort(message=str(exception))
+                abort(message=str(exception), ticket_id=ticket.id)
 
             return ticket, HTTPStatus.OK
 
+    @endpoint.route('/bulk')
+    class CreateTicketsInBulk(Resource):
+        @endpoint.marshal_list_with(TicketSerializer)
+        @endpoint.expect([TicketSerializer])
+        @endpoint.doc(security='apiKey')
+        @token_required
+        def post(self):
+            ''' Generate new registered tickets in bulk. '''
+            tickets = Serial.create_new_tickets(get_bulk_entries(api.payload))
+
+            return tickets, HTTPStatus.OK
+
     @endpoint.route('/<int:ticket_id>')
     class GetAndUpdateTicket(Resource):
         @endpoint.marshal_with(TicketSerializer)
@@ -104,6 +167,37 @@ def setup_tickets_endpoint():
             db.session.commit()
             return '', HTTPStatus.NO_CONTENT
 
+    @endpoint.route('/<int:ticket_id>/print')
+    class GetAndRetryTicketPrintJob(Resource):
+        @endpoint.marshal_with(PrintJobSerializer)
+        @endpoint.doc(security='apiKey')
+        @token_required
+        def get(self, ticket_id):
+            ''' Get the print job status of a specific ticket. '''
+            job = PrintJob.query.filter_by(ticket_id=ticket_id).first()
+
+            if not job:
+                abort(message='Print job not found', code=HTTPStatus.NOT_FOUND)
+
+            return job, HTTPStatus.OK
+
+        @endpoint.marshal_with(PrintJobSerializer)
+        @endpoint.doc(security='apiKey')
+        @token_required
+        def post(self, ticket_id):
+            ''' Retry the failed print job of a specific ticket. '''
+            job = PrintJob.query.filter_by(ticket_id=ticket_id).first()
+
+            if not job:
+                abort(message='Print job not found', code=HTTPStatus.NOT_FOUND)
+
+            if job.status != PRINT_JOB_FAILED:
+                abort(message='Only failed print jobs can be retried.',
+                      code=HTTPStatus.BAD_REQUEST)
+
+            job.retry()
+            return job, HTTPStatus.OK
+
     @endpoint.route('/pull')
     class PullTicket(Resource):
         @endpoint.marshal_with(TicketSerializer)
@@ -120,10 +214,15 @@ def setup_tickets_endpoint():
             if ticket_id and not ticket:
                 abort(message='Ticket not found', code=HTTPStatus.NOT_FOUND)
 
-            next_ticket = ticket or Serial.get_next_ticket()
+            puller_id = self.auth_token and self.auth_token.id
+
+            if ticket:
+                ticket.pull(office_id, puller_id)
+                return ticket, HTTPStatus.OK
+
+            next_ticket = Serial.claim_next(office_id=office_id, puller_id=puller_id)
 
             if not next_ticket:
                 abort(message='No tickets left to pull', code=HTTPStatus.NOT_FOUND)
 
-            next_ticket.pull(office_id, self.auth_token and self.auth_token.id)
             return next_ticket, HTTPStatus.OK
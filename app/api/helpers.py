@@ -1,10 +1,14 @@
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
 from functools import wraps
 from http import HTTPStatus
 from flask import request, current_app
 from flask_restx import abort
+from sqlalchemy.sql import and_, or_
 
 from app.database import AuthTokens
-from app.api.constants import AUTH_HEADER_KEY
+from app.api.constants import AUTH_HEADER_KEY, LIMIT_PER_CHUNK, CURSOR_TIMESTAMP_FORMAT
 
 
 def token_required(function):
@@ -66,3 +70,75 @@ def get_or_reject(**models):
                 return function(*args, **new_kwargs)
         return decorator
     return wrapper
+
+
+def encode_cursor(record):
+    ''' Encode an opaque pagination cursor pointing after a given record.
+
+    Parameters
+    ----------
+        record: db.Model
+            record with `timestamp` and `id` columns to paginate after.
+
+    Returns
+    -------
+        URL safe string of the cursor.
+    '''
+    position = [record.timestamp.strftime(CURSOR_TIMESTAMP_FORMAT), record.id]
+
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    ''' Decode an opaque pagination cursor, or abort if it's invalid.
+
+    Parameters
+    ----------
+        cursor: str
+            cursor encoded with `encode_cursor`.
+
+    Returns
+    -------
+        Tuple of the timestamp and the id of the record to paginate after.
+    '''
+    try:
+        timestamp, id = json.loads(urlsafe_b64decode(cursor.encode()))
+
+        return datetime.strptime(timestamp, CURSOR_TIMESTAMP_FORMAT), int(id)
+    except Exception:
+        abort(message='Invalid pagination cursor.', code=HTTPStatus.BAD_REQUEST)
+
+
+def paginate(query, model, limit=LIMIT_PER_CHUNK):
+    ''' Get a page of records, by the request `cursor` argument or the `chunk` one.
+
+    Parameters
+    ----------
+        query: Query
+            query of the records to paginate.
+        model: db.Model
+            model of the records, with `timestamp` and `id` columns to paginate with.
+        limit: int
+            count of records per page.
+
+    Returns
+    -------
+        Tuple of the page records and the cursor of the next page, None if it's the last.
+    '''
+    cursor = request.args.get('cursor', None)
+    chunk = request.args.get('chunk', 1, type=int)
+    query = query.order_by(model.timestamp, model.id)
+
+    if cursor:
+        timestamp, id = decode_cursor(cursor)
+        query = query.filter(or_(model.timestamp > timestamp,
+                                 and_(model.timestamp == timestamp, model.id > id)))
+    else:
+        # NOTE: deprecated in favor of `cursor`, deep chunks get slower the further they are.
+        query = query.offset(max(chunk - 1, 0) * limit)
+
+    # NOTE: fetching an extra record to tell if there's a next page, instead of counting.
+    records = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(records[limit - 1]) if len(records) > limit else None
+
+    return records[:limit], next_cursor
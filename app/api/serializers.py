@@ -20,9 +20,33 @@ TicketSerializer = api.model('Ticket', {
 })
 
 
+StatisticsSerializer = api.model('Statistics', {
+    'office_id': fields.Integer(required=False, description='office the statistics are of, all if empty.'),
+    'task_id': fields.Integer(required=False, description='task the statistics are of, instead of the office.'),
+    'estimated_wait': fields.Integer(required=False, description='estimated waiting time in minutes of a new ticket.'),
+    'service_time': fields.Float(required=False, description='moving average of the service time in seconds.'),
+    'arrival_rate': fields.Float(required=False, description='moving average of the tickets issued per minute.'),
+    'served': fields.Integer(required=False, description='count of the tickets pulled.'),
+    'wait_p50': fields.Integer(required=False, description='median wait in minutes, empty if past the longest bucket.'),
+    'wait_p90': fields.Integer(required=False, description='90th percentile wait in minutes, empty if past the longest bucket.'),
+    'wait_p95': fields.Integer(required=False, description='95th percentile wait in minutes, empty if past the longest bucket.'),
+})
+
+
 TaskSerializer = api.model('Task', {
     'id': fields.Integer(required=False, description='task identification number.'),
     'name': fields.String(required=False, description='task name.'),
     'timestamp': fields.DateTime(required=False, description='date and time of task creation.'),
     'hidden': fields.Boolean(required=False, description='task is is hidden in the touch screen.'),
 })
+
+
+PrintJobSerializer = api.model('PrintJob', {
+    'id': fields.Integer(required=False, description='print job identification number.'),
+    'ticket_id': fields.Integer(required=False, description='ticket to be printed.'),
+    'status': fields.String(required=False, description='print job status, pending, printed or failed.'),
+    'attempts': fields.Integer(required=False, description='count of printing attempts.'),
+    'error': fields.String(required=False, description='error of the last failed printing attempt.'),
+    'timestamp': fields.DateTime(required=False, description='date and time of print job creation.'),
+    'next_attempt': fields.DateTime(required=False, description='date and time of the next printing attempt.'),
+})
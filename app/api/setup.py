@@ -3,6 +3,7 @@ from flask import Blueprint
 from app.api import api
 from app.api.endpoints.tickets import setup_tickets_endpoint
 from app.api.endpoints.tasks import setup_tasks_endpoint
+from app.api.endpoints.statistics import setup_statistics_endpoint
 
 
 def setup_api():
@@ -16,5 +17,6 @@ def setup_api():
     api.init_app(blueprint)
     setup_tickets_endpoint()
     setup_tasks_endpoint()
+    setup_statistics_endpoint()
 
     return blueprint
@@ -12,6 +12,10 @@ SUPPORTED_LANGUAGES = {
     'es': 'Spanish'
 }
 
+# NOTE: translations source, compiled into the catalog looked up at runtime.
+TRANSLATIONS_SOURCE_FILE = 'gt_cached.json'
+TRANSLATIONS_CATALOG_FILE = 'gt_cached.catalog'
+
 SUPPORTED_MEDIA_FILES = [
     # NOTE: The officially supported media files.
     ['jpg', 'JPG', 'png', 'PNG'],  # Images
@@ -41,6 +45,15 @@ PRINTED_TICKET_DIMENSIONS = {
     'large': (3, 3)
 }
 
+ARABIC_TICKET_WIDTH = 400
+ARABIC_TICKET_ROWS = [
+    # NOTE: Arabic ticket rows from top to bottom (field, height, font size).
+    ('logo', 60, 50), ('title', 60, 30), ('link', 50, 25), ('border', 50, 25),
+    ('ticket', 60, 50), ('border', 50, 25), ('office', 50, 25), ('current_ticket', 50, 25),
+    ('tickets_ahead', 50, 25), ('task', 50, 25), ('time', 50, 25)
+]
+ARABIC_TICKET_HEIGHT = sum(height for _, height, _ in ARABIC_TICKET_ROWS)
+
 DEFAULT_PASSWORD = 'admin'
 DEFAULT_USER = 'Admin'
 
@@ -51,11 +64,62 @@ PREFIXES = [p for p in list(map(lambda i: chr(i).upper(), range(97, 123)))]
 
 TICKET_STATUSES = ['Waiting', 'Processed', 'Unattended']
 TICKET_WAITING, TICKET_PROCESSED, TICKET_UNATTENDED = TICKET_STATUSES
+# NOTE: tickets numbering continues from the highest number, starting after the base.
+TICKETS_NUMBERING_BASE = 100
+TICKETS_NUMBERING_SCOPES = ['global', 'office', 'task']
+TICKETS_NUMBERING_GLOBAL, TICKETS_NUMBERING_OFFICE, TICKETS_NUMBERING_TASK = TICKETS_NUMBERING_SCOPES
+
+PRINT_JOB_STATUSES = ['Pending', 'Printed', 'Failed']
+PRINT_JOB_PENDING, PRINT_JOB_PRINTED, PRINT_JOB_FAILED = PRINT_JOB_STATUSES
+# NOTE: failed print jobs are retried after a backoff that doubles with every attempt,
+# until they exceed the maximum attempts and are left as failed.
+PRINT_JOB_MAX_ATTEMPTS = 5
+PRINT_JOB_BACKOFF = 2
+# NOTE: duration in seconds printed and failed print jobs are kept for, to check their status.
+PRINT_JOB_RETENTION = 24 * 60 * 60
+
+# NOTE: announcements are synthesized in parallel, waiting for each batch up to the timeout.
+TTS_CACHE_WORKERS = 4
+TTS_CACHE_TIMEOUT = 30
+# NOTE: tickets numbers spoken as fragments, synthesized ahead of the tickets.
+TTS_FRAGMENTS_NUMBERS = 1000
+# NOTE: synthesized audio files are evicted least recently used first, once their total size
+# exceeds the budget in bytes, or once they've not been used for the budget in seconds.
+TTS_CACHE_MAX_SIZE = 100 * 1024 * 1024
+TTS_CACHE_MAX_AGE = 24 * 60 * 60
+# NOTE: text-to-speech engines selectable per language, the local engine runs a bounded pool
+# of subprocesses, each limited to the timeout in seconds.
+TTS_ENGINES = ['gtts', 'espeak']
+TTS_DEFAULT_ENGINE = 'gtts'
+TTS_LOCAL_WORKERS = os.cpu_count() or 1
+TTS_LOCAL_TIMEOUT = 10
 
 SECRET_KEY = os.environ.get('SECRET_KEY', os.urandom(24))
 
 
 BACKGROUNDTASKS_DEFAULTS = {
     'CacheTicketsAnnouncements': {'enabled': True, 'every': 'second'},
-    'DeleteTickets': {'enabled': False, 'every': 'hour'}
+    'DeleteTickets': {'enabled': False, 'every': 'hour'},
+    'PrintTickets': {'enabled': True, 'every': 'second'}
 }
+
+# NOTE: opt-in SQL queries profiling per endpoint, logging the requests that run more queries
+# than the threshold, or that repeat the same statement more than the repeats threshold.
+PROFILE_QUERIES_THRESHOLD = 50
+PROFILE_QUERIES_REPEATS = 10
+
+# NOTE: runtime metrics exposed in the Prometheus text format, with the upper bounds in seconds
+# of the latencies histograms buckets.
+METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# NOTE: maximum number of display feed snapshots to cache, one per office and language.
+SNAPSHOTS_CACHE_MAX_SIZE = 256
+
+# NOTE: streaming queue statistics, weighting each new observation by the smoothing factor, and
+# leaving out intervals longer than the maximum in seconds (breaks, closing hours). Waiting
+# durations are counted in a histogram, with the upper bounds in minutes of its buckets.
+STATISTICS_SMOOTHING = 0.2
+STATISTICS_MAX_INTERVAL = 60 * 60
+STATISTICS_WAIT_BUCKETS = [1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240]
+STATISTICS_PERCENTILES = [50, 90, 95]
@@ -1,15 +1,92 @@
 import os
+from itertools import chain
+from flask import current_app
 from flask_login import UserMixin, current_user
 from flask_sqlalchemy import BaseQuery
-from sqlalchemy.sql import and_, or_
+from sqlalchemy import event, inspect, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import and_, or_, case
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from random import randint
 from uuid import uuid4
 
 from app.middleware import db
+from app.events import events
+from app.statistics import queue_statistics
 from app.constants import (USER_ROLES, DEFAULT_PASSWORD, PREFIXES, TICKET_WAITING,
-                           TICKET_PROCESSED, TICKET_UNATTENDED, USER_ROLE_ADMIN)
+                           TICKET_PROCESSED, TICKET_UNATTENDED, USER_ROLE_ADMIN,
+                           TICKETS_NUMBERING_BASE, TICKETS_NUMBERING_SCOPES, TICKETS_NUMBERING_GLOBAL,
+                           TICKETS_NUMBERING_OFFICE, TICKETS_NUMBERING_TASK, PRINT_JOB_PENDING,
+                           PRINT_JOB_PRINTED, PRINT_JOB_FAILED, PRINT_JOB_MAX_ATTEMPTS,
+                           PRINT_JOB_BACKOFF, PRINT_JOB_RETENTION, TTS_DEFAULT_ENGINE)
+
+class DetachedRecords:
+    ''' Records loaded in a session of their own, and kept process-wide detached from it till
+        they change. Clearing them bumps the generation, so a load that raced with a change is
+        not kept.
+    '''
+    def __init__(self):
+        self.records = {}
+        self.generation = 0
+
+    def get(self, key, load):
+        ''' Get the kept records, or load and keep them.
+
+        Parameters
+        ----------
+            key: str
+                name to keep the records under.
+            load: callable
+                takes a session and returns the records loaded with it.
+
+        Returns
+        -------
+            The kept records, detached from any session.
+        '''
+        if key in self.records:
+            return self.records[key]
+
+        generation = self.generation
+        session = db.create_session({})()
+
+        try:
+            records = load(session)
+            session.expunge_all()
+        finally:
+            session.close()
+
+        if generation == self.generation:
+            self.records[key] = records
+
+        return records
+
+    def clear(self):
+        self.generation += 1
+        self.records.clear()
+
+    def merge(self, record):
+        ''' Merge a kept record into the session, without querying it. '''
+        merged = db.session.identity_map.get(inspect(record).key)
+
+        if merged is None or inspect(merged).expired_attributes:
+            merged = db.session.merge(record, load=False)
+
+        return merged
+
+    def is_cachable(self, *models):
+        ''' Check if the models records can be served from the kept ones. '''
+        changed = {type(r) for r in chain(db.session.new, db.session.dirty, db.session.deleted)}
+        pending = db.session.info.get('cached_changes', [])
+        uncommitted = any(m in changed or m.__name__ in pending for m in models)
+
+        # NOTE: workers can't share the kept records, nor uncommitted changes be kept.
+        return not current_app.config.get('GUNICORN', False) and not uncommitted
+
+
+detached_records = DetachedRecords()
+
 
 mtasks = db.Table(
     'mtasks',
@@ -43,10 +120,26 @@ class Mixin:
         return cls.get(record.id)
 
 
+class SingletonMixin(Mixin):
+    ''' Mixin of the single row settings records, loaded once and kept process-wide till they change.
+
+    `get()` merges the kept record into the session without querying it, and then the session's
+    identity map memoizes it for the rest of the request.
+    '''
+    @classmethod
+    def get(cls, id=False, **kwargs):
+        if id is not False or kwargs or not detached_records.is_cachable(cls):
+            return super().get(id, **kwargs)
+
+        record = detached_records.get(cls.__name__, lambda session: session.query(cls).first())
+
+        return record and detached_records.merge(record)
+
+
 class TicketsMixin:
     @property
     def display_text(self):
-        display_settings = Display_store.query.first()
+        display_settings = Display_store.get()
         always_show_ticket_number = display_settings.always_show_ticket_number
         name_and_or_number = f'{getattr(self, "number", "")}'
         prefix = f'{self.office.prefix} ' if display_settings.prefix else ''
@@ -76,6 +169,22 @@ class Office(db.Model, Mixin):
         self.name = name or self.get_generic_available_name()
         self.prefix = prefix or self.get_first_available_prefix()
 
+    @classmethod
+    def get_all_cached(cls):
+        ''' Get all the offices with their operators, kept process-wide till offices, tasks or
+            operators change.
+
+        Returns
+        -------
+            List of offices records, merged into the session without querying them.
+        '''
+        load = lambda session: session.query(cls).options(selectinload(cls.operators)).all()
+
+        if not detached_records.is_cachable(cls, Task, Operators):
+            return load(db.session)
+
+        return [detached_records.merge(office) for office in detached_records.get('offices', load)]
+
     @classmethod
     def get_all_used_prefixes(cls):
         return [o.prefix for o in cls.query.all()]
@@ -110,8 +219,7 @@ class Office(db.Model, Mixin):
 
     @property
     def tickets(self):
-        return Serial.query.filter(Serial.office_id == self.id,
-                                   Serial.number != 100)
+        return Serial.query.filter(Serial.office_id == self.id)
 
     @property
     def display_text(self):
@@ -121,8 +229,7 @@ class Office(db.Model, Mixin):
         return f'{self.prefix if show_prefix else ""}{self.name}'
 
     def delete_all(self):
-        for ticket in self.tickets:
-            db.session.delete(ticket)
+        self.tickets.delete()
 
         for task in self.tasks:
             if task.common:
@@ -170,8 +277,7 @@ class Task(db.Model, Mixin):
 
     @property
     def tickets(self):
-        return Serial.query.filter(Serial.task_id == self.id,
-                                   Serial.number != 100)
+        return Serial.query.filter(Serial.task_id == self.id)
 
     def migrate_tickets(self, from_office, to_office):
         params = dict(office_id=from_office.id, task_id=self.id)
@@ -196,6 +302,13 @@ class SerialQuery(BaseQuery):
     def waiting(self):
         return self.filter_by(p=False)
 
+    @property
+    def eager(self):
+        ''' Load the tickets office, task and puller along, instead of a query each per ticket. '''
+        return self.options(selectinload(Serial.office),
+                            selectinload(Serial.task),
+                            selectinload(Serial.puller))
+
 
 class Serial(db.Model, TicketsMixin, Mixin):
     __tablename__ = "serials"
@@ -204,6 +317,14 @@ class Serial(db.Model, TicketsMixin, Mixin):
     STATUS_PROCESSED = TICKET_PROCESSED
     STATUS_UNATTENDED = TICKET_UNATTENDED
 
+    __table_args__ = (
+        # NOTE: covering the waiting list, the last pulled and the next ticket lookups.
+        db.Index('ix_serials_p_on_hold_timestamp', 'p', 'on_hold', 'timestamp'),
+        db.Index('ix_serials_office_id_p_pdt', 'office_id', 'p', 'pdt'),
+        db.Index('ix_serials_task_id_office_id_p_timestamp',
+                 'task_id', 'office_id', 'p', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.Integer)
     timestamp = db.Column(db.DateTime(), index=True, default=datetime.utcnow)
@@ -219,8 +340,11 @@ class Serial(db.Model, TicketsMixin, Mixin):
     status = db.Column(db.String(10), default=TICKET_PROCESSED)
     office_id = db.Column(db.Integer, db.ForeignKey('offices.id'))
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'))
+    office = db.relationship('Office')
+    task = db.relationship('Task')
+    puller = db.relationship('User', primaryjoin='foreign(Serial.pulledBy) == User.id', viewonly=True)
 
-    def __init__(self, number=100, office_id=1, task_id=1, name=None,
+    def __init__(self, number=TICKETS_NUMBERING_BASE, office_id=1, task_id=1, name=None,
                  n=False, p=False, pulledBy=0, status=TICKET_WAITING):
         self.number = number
         self.office_id = office_id
@@ -231,21 +355,9 @@ class Serial(db.Model, TicketsMixin, Mixin):
         self.pulledBy = pulledBy
         self.status = status
 
-    @property
-    def task(self):
-        return Task.query.filter_by(id=self.task_id).first()
-
-    @property
-    def office(self):
-        return Office.query.filter_by(id=self.office_id).first()
-
     @property
     def puller_name(self):
-        return User.get(self.pulledBy).name
-
-    @classmethod
-    def all_clean(cls):
-        return cls.query.filter(cls.number != 100)
+        return self.puller and self.puller.name
 
     @classmethod
     def all_office_tickets(cls, office_id):
@@ -262,8 +374,7 @@ class Serial(db.Model, TicketsMixin, Mixin):
         '''
         strict_pulling = Settings.get().strict_pulling
         office = Office.get(office_id)
-        all_tickets = cls.query.filter(cls.office_id == office_id,
-                                       cls.number != 100)
+        all_tickets = cls.query.filter(cls.office_id == office_id)
 
         if not strict_pulling:
             for task in office.tasks:
@@ -273,8 +384,7 @@ class Serial(db.Model, TicketsMixin, Mixin):
                 if other_office_tickets.count():
                     all_tickets = all_tickets.union(other_office_tickets)
 
-        return all_tickets.filter(Serial.number != 100)\
-                          .order_by(Serial.p, Serial.timestamp.desc())
+        return all_tickets.order_by(Serial.p, Serial.timestamp.desc())
 
     @classmethod
     def all_task_tickets(cls, office_id, task_id):
@@ -298,7 +408,6 @@ class Serial(db.Model, TicketsMixin, Mixin):
             filter_parameters.pop('office_id')
 
         return cls.query.filter_by(**filter_parameters)\
-                        .filter(cls.number != 100)\
                         .order_by(cls.p, cls.timestamp.desc())
 
     @classmethod
@@ -314,8 +423,7 @@ class Serial(db.Model, TicketsMixin, Mixin):
         -------
             Last ticket pulled record.
         '''
-        last_ticket = cls.query.filter_by(p=True)\
-                               .filter(cls.number != 100)
+        last_ticket = cls.query.filter_by(p=True)
 
         if office_id:
             last_ticket = last_ticket.filter_by(office_id=office_id)
@@ -338,8 +446,7 @@ class Serial(db.Model, TicketsMixin, Mixin):
         -------
             List of waiting list tickets.
         '''
-        waiting_tickets = cls.query.filter_by(p=False)\
-                                   .filter(cls.number != 100)
+        waiting_tickets = cls.query.filter_by(p=False)
 
         if office_id:
             waiting_tickets = waiting_tickets.filter(cls.office_id == office_id)
@@ -348,6 +455,36 @@ class Serial(db.Model, TicketsMixin, Mixin):
                               .limit(limit)\
                               .all()
 
+    @classmethod
+    def get_estimated_wait(cls, office_id=None, task_id=None):
+        ''' get the estimated waiting time of a new ticket, from the queue running statistics.
+
+        Parameters
+        ----------
+            office_id: int
+                office's id to estimate the waiting time in.
+            task_id: int
+                task's id to estimate the waiting time of, instead of the office's.
+
+        Returns
+        -------
+            Estimated waiting time in minutes, None if no tickets were served yet.
+        '''
+        def load():
+            return db.session.query(cls.office_id, cls.task_id, func.count(cls.id))\
+                             .filter(cls.p == False)\
+                             .group_by(cls.office_id, cls.task_id)\
+                             .all()
+
+        # NOTE: tickets issued and pulled by other workers are not picked up, so counted instead
+        if current_app.config.get('GUNICORN', False):
+            waiting = sum(count for o, t, count in load()
+                          if (not office_id or o == office_id) and (not task_id or t == task_id))
+        else:
+            waiting = queue_statistics.get_waiting(load, office_id, task_id)
+
+        return queue_statistics.estimate_wait(waiting, office_id, task_id)
+
     @classmethod
     def get_processed_tickets(cls, office_id=None, limit=9, offset=0):
         '''get list of last processed tickets.
@@ -359,8 +496,7 @@ class Serial(db.Model, TicketsMixin, Mixin):
         limit : int, optional
             limit the list of ticket to it, by default 9
         '''
-        processed_tickets = cls.query.filter(cls.p == True,
-                                             cls.number != 100)
+        processed_tickets = cls.query.filter(cls.p == True)
 
         if office_id:
             processed_tickets = processed_tickets.filter(cls.office_id == office_id)
@@ -371,33 +507,84 @@ class Serial(db.Model, TicketsMixin, Mixin):
                                 .all()
 
     @classmethod
-    def get_next_ticket(cls, task_id=None, office_id=None):
+    def get_numbering_scope(cls, task, office):
+        ''' get the tickets numbering scope a new ticket falls in.
+
+        Parameters
+        ----------
+            task: Task instance
+                task the new ticket is linked to.
+            office: Office instance
+                office the new ticket is linked to.
+
+        Returns
+        -------
+            Tuple of the numbering scope and the id of its office or task.
+        '''
+        scope = Settings.get().numbering or TICKETS_NUMBERING_GLOBAL
+        scope_id = {TICKETS_NUMBERING_OFFICE: office.id,
+                    TICKETS_NUMBERING_TASK: task.id}.get(scope, 0)
+
+        return scope, scope_id
+
+    @classmethod
+    def get_next_number(cls, task, office):
+        ''' allocate the number of the next new ticket, within the ongoing transaction.
+
+        Parameters
+        ----------
+            task: Task instance
+                task the new ticket is linked to.
+            office: Office instance
+                office the new ticket is linked to.
+
+        Returns
+        -------
+            Integer of the next number in the tickets numbering scope.
+        '''
+        return TicketsCounter.increment(*cls.get_numbering_scope(task, office),
+                                        daily=Settings.get().daily_numbering)
+
+    @classmethod
+    def get_next_tickets(cls, task_id=None, office_id=None):
+        ''' get the tickets to be pulled next, in order.
+
+        Parameters
+        ----------
+            task_id: int
+                id of the task to pull tickets from, if None pull globally.
+            office_id: int
+                id of the office to pull tickets from, if None pull globally.
+
+        Returns
+        -------
+            Query of the waiting tickets, ordered by their issuance.
+        '''
         strict_pulling = Settings.get().strict_pulling
-        single_row = Settings.get().single_row
-        task = Task.get(0 if single_row else task_id)
-        office = Office.get(0 if single_row else office_id)
         global_pull = not bool(task_id and office_id)
-
-        next_tickets = Serial.query.filter(Serial.number != 100,
-                                           Serial.p != True,
-                                           Serial.on_hold == False)
-        next_ticket = None
+        next_tickets = cls.query.filter(cls.p == False,
+                                        cls.on_hold == False)
 
         if not global_pull:
-            next_ticket = next_tickets.filter(Serial.task_id == task.id)
+            next_tickets = next_tickets.filter(cls.task_id == task_id)
 
             if strict_pulling:
-                next_ticket = next_ticket.filter(Serial.office_id == office.id)
+                next_tickets = next_tickets.filter(cls.office_id == office_id)
+
+        return next_tickets.order_by(cls.timestamp)
 
-        next_ticket = (next_tickets if global_pull else next_ticket)\
-            .order_by(Serial.timestamp)\
-            .first()
+    @classmethod
+    def get_next_ticket(cls, task_id=None, office_id=None):
+        single_row = Settings.get().single_row
+        task = Task.get(0 if single_row else task_id)
+        office = Office.get(0 if single_row else office_id)
+        next_ticket = cls.get_next_tickets(task_id, office_id).first()
 
         if single_row:
-            current_ticket = office.tickets\
-                                   .order_by(Serial.timestamp.desc())\
-                                   .first()
-            next_ticket = Serial(number=getattr(current_ticket, 'number', 100) + 1,
+            # NOTE: single row queue is numbered on its own, regardless of the numbering scope
+            number = TicketsCounter.increment(TICKETS_NUMBERING_OFFICE, office.id,
+                                              daily=Settings.get().daily_numbering)
+            next_ticket = Serial(number=number,
                                  office_id=office.id,
                                  task_id=task.id)
 
@@ -406,6 +593,58 @@ class Serial(db.Model, TicketsMixin, Mixin):
 
         return next_ticket
 
+    @classmethod
+    def claim_next(cls, task_id=None, office_id=None, puller_id=None):
+        ''' Pull the next ticket, making sure concurrent pulls never claim the same ticket.
+
+        Parameters
+        ----------
+            task_id: int
+                id of the task to pull tickets from, if None pull globally.
+            office_id: int
+                id of the office to pull tickets from, if None pull globally.
+            puller_id: int
+                id of the user or the token pulling the ticket.
+
+        Returns
+        -------
+            The pulled ticket, or None if no tickets left to pull.
+        '''
+        if Settings.get().single_row:
+            ticket = cls.get_next_ticket()
+
+            ticket.pull(office_id, puller_id)
+            return ticket
+
+        next_tickets = cls.get_next_tickets(task_id, office_id)\
+                          .with_for_update(skip_locked=True)
+
+        # NOTE: tickets locked by concurrent pulls are skipped where `SKIP LOCKED` is supported,
+        # otherwise the conditional update fails for the tickets pulled in-between, to retry.
+        while True:
+            ticket = next_tickets.first()
+
+            if not ticket:
+                return None
+
+            pulled_office_id = office_id or ticket.office_id
+            pulled = datetime.utcnow()
+            claimed = db.session.execute(
+                cls.__table__.update()
+                             .where(and_(cls.id == ticket.id, cls.p == False))
+                             .values(p=True, pdt=pulled, status=TICKET_PROCESSED,
+                                     pulledBy=puller_id or getattr(current_user, 'id', None),
+                                     office_id=pulled_office_id))
+
+            if claimed.rowcount:
+                track_queue_changes(db.session, ticket.office_id, pulled_office_id)
+                track_queue_statistics(db.session, (pulled_office_id, ticket.task_id,
+                                                    ticket.timestamp, pulled, ticket.office_id))
+                db.session.commit()
+                return ticket
+
+            db.session.rollback()
+
     @classmethod
     def create_new_ticket(cls, task, office=None, name_or_number=None):
         '''Create a new registered or printed ticket.
@@ -424,53 +663,104 @@ class Serial(db.Model, TicketsMixin, Mixin):
         Serial, exception
             a new ticket printed or registered ticket.
         '''
-        from app.printer import assign, printit, printit_ar, print_ticket_cli, print_ticket_cli_ar
+        from app.tasks import get_task
 
-        windows = os.name == 'nt'
         touch_screen_stings = Touch_store.get()
-        ticket_settings = Printer.get()
-        settings = Settings.get()
         printed = not touch_screen_stings.n
-        next_number = cls.query.order_by(cls.number.desc()).first().number + 1
         office = office or task.least_tickets_office()
-        ticket, exception = None, None
+        # NOTE: printing is left to the `PrintTickets` task if running, otherwise it's done
+        # right away, once the ticket is committed, not to keep the numbering counter locked
+        # while printing.
+        queued = bool(get_task('PrintTickets'))
+        job, exception = None, None
 
         if printed:
             current_ticket = getattr(Serial.all_office_tickets(office.id).first(), 'number', None)
-            common_arguments = (f'{office.prefix}.{next_number}',
-                                f'{office.prefix}{office.name}',
-                                Serial.all_office_tickets(office.id).count(),
-                                task.name,
-                                f'{office.prefix}.{current_ticket}')
+            job = PrintJob(office=f'{office.prefix}{office.name}',
+                           tickets_ahead=Serial.all_office_tickets(office.id).count(),
+                           task=task.name,
+                           current_ticket=f'{office.prefix}.{current_ticket}',
+                           estimated_wait=Serial.get_estimated_wait(office.id))
 
-            try:
-                if windows or settings.lp_printing:
-                    (print_ticket_cli_ar
-                     if ticket_settings.langu == 'ar' else
-                     print_ticket_cli)(ticket_settings.name,
-                                       *common_arguments,
-                                       language=ticket_settings.langu,
-                                       windows=windows,
-                                       unix=not windows)
-                else:
-                    printer = assign(ticket_settings.vendor, ticket_settings.product,
-                                     ticket_settings.in_ep, ticket_settings.out_ep)
-                    (printit_ar if ticket_settings.langu == 'ar' else printit)(printer,
-                                                                               *common_arguments,
-                                                                               lang=ticket_settings.langu,
-                                                                               scale=ticket_settings.scale)
-            except Exception as e:
-                exception = e
+        ticket = Serial(number=cls.get_next_number(task, office), office_id=office.id,
+                        task_id=task.id, name=name_or_number, n=not printed)
 
-        if not exception:
-            ticket = Serial(number=next_number, office_id=office.id, task_id=task.id,
-                            name=name_or_number, n=not printed)
+        db.session.add(ticket)
+
+        if job:
+            db.session.flush()
+            job.ticket_id = ticket.id
+            job.ticket = f'{office.prefix}.{ticket.number}'
+            db.session.add(job)
+
+        db.session.commit()
+
+        if job and not queued:
+            exception = job.print()
+
+            # NOTE: the job is done once printed, otherwise it's kept failed along with the
+            # ticket, to retry printing it with `/api/v1/tickets/<id>/print`.
+            if exception:
+                job.status = PRINT_JOB_FAILED
+                job.attempts = 1
+                job.error = str(exception)[:300]
+            else:
+                db.session.delete(job)
 
-            db.session.add(ticket)
             db.session.commit()
 
         return ticket, exception
 
+    @classmethod
+    def create_new_tickets(cls, entries):
+        '''Create new registered tickets in bulk, within a single transaction.
+
+        Parameters
+        ----------
+        entries: list
+            tuples of `(task, office, name)` to create tickets for, office can be None.
+
+        Returns
+        -------
+        list
+            the new tickets, in the same order as the entries.
+        '''
+        now = datetime.utcnow()
+        daily = Settings.get().daily_numbering
+        offices_load = dict(db.session.query(cls.office_id, func.count(cls.id))
+                                      .group_by(cls.office_id))
+        new_tickets, scopes = [], {}
+
+        for task, office, name in entries:
+            # NOTE: same as `Task.least_tickets_office`, without recounting for every ticket
+            office = office or min(task.offices, key=lambda o: offices_load.get(o.id, 0))
+            offices_load[office.id] = offices_load.get(office.id, 0) + 1
+            ticket = cls(office_id=office.id, task_id=task.id, name=name, n=True)
+            ticket.on_hold = False
+            ticket.timestamp = now
+            ticket.date = now.date()
+
+            new_tickets.append(ticket)
+            scopes.setdefault(cls.get_numbering_scope(task, office), []).append(ticket)
+
+        for (scope, scope_id), scope_tickets in scopes.items():
+            last_number = TicketsCounter.increment(scope, scope_id, daily, by=len(scope_tickets))
+
+            for number, ticket in enumerate(scope_tickets, last_number - len(scope_tickets) + 1):
+                ticket.number = number
+
+        # NOTE: bulk saved tickets skip the session's flush hooks, so their changes are tracked here
+        db.session.bulk_save_objects(new_tickets, return_defaults=True)
+        track_queue_changes(db.session, *{ticket.office_id for ticket in new_tickets})
+        track_queue_statistics(db.session, *[(ticket.office_id, ticket.task_id, now, None,
+                                              ticket.office_id)
+                                             for ticket in new_tickets])
+        db.session.commit()
+
+        tickets = {t.id: t for t in cls.query.filter(cls.id.in_([t.id for t in new_tickets]))}
+
+        return [tickets[ticket.id] for ticket in new_tickets]
+
     def pull(self, office_id=None, puller_id=None):
         ''' Mark a ticket as pulled and do the dues.
 
@@ -498,6 +788,240 @@ class Serial(db.Model, TicketsMixin, Mixin):
         db.session.commit()
 
 
+class TicketsCounter(db.Model):
+    __tablename__ = 'tickets_counters'
+    __table_args__ = (db.UniqueConstraint('scope', 'scope_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(10))
+    scope_id = db.Column(db.Integer)
+    number = db.Column(db.Integer)
+    date = db.Column(db.Date())
+
+    def __init__(self, scope=TICKETS_NUMBERING_GLOBAL, scope_id=0,
+                 number=TICKETS_NUMBERING_BASE, date=None):
+        self.scope = scope
+        self.scope_id = scope_id
+        self.number = number
+        self.date = date
+
+    @classmethod
+    def get_highest_number(cls, scope, scope_id=0, daily=False):
+        ''' get the highest number of the existing tickets in a given scope.
+
+        Parameters
+        ----------
+            scope: str
+                tickets numbering scope, one of `TICKETS_NUMBERING_SCOPES`.
+            scope_id: int
+                id of the office or the task the numbering is scoped to.
+            daily: bool
+                consider only the tickets issued today.
+
+        Returns
+        -------
+            Integer of the highest ticket number, or the numbering base.
+        '''
+        query = db.session.query(func.max(Serial.number))
+
+        if scope == TICKETS_NUMBERING_OFFICE:
+            query = query.filter(Serial.office_id == scope_id)
+        elif scope == TICKETS_NUMBERING_TASK:
+            query = query.filter(Serial.task_id == scope_id)
+
+        if daily:
+            query = query.filter(Serial.timestamp >= datetime.combine(datetime.utcnow(), time.min))
+
+        return query.scalar() or TICKETS_NUMBERING_BASE
+
+    @classmethod
+    def increment(cls, scope=TICKETS_NUMBERING_GLOBAL, scope_id=0, daily=False, by=1):
+        ''' atomically increment the counter of a given scope, within the ongoing transaction.
+
+        Parameters
+        ----------
+            scope: str
+                tickets numbering scope, one of `TICKETS_NUMBERING_SCOPES`.
+            scope_id: int
+                id of the office or the task the numbering is scoped to.
+            daily: bool
+                restart the numbering from the base every day.
+            by: int
+                count of numbers to reserve at once.
+
+        Returns
+        -------
+            Integer of the incremented counter number, the last of the reserved numbers.
+        '''
+        if scope not in TICKETS_NUMBERING_SCOPES:
+            raise AttributeError(f'Invalid tickets numbering scope: {scope}')
+
+        today = datetime.utcnow().date()
+        parameters = dict(scope=scope, scope_id=scope_id)
+        number = cls.number + by
+
+        if daily:
+            number = case([(cls.date == today, cls.number + by)], else_=TICKETS_NUMBERING_BASE + by)
+
+        # NOTE: the update locks the counter until the end of the transaction, so concurrent
+        # increments are serialized instead of reading the same number.
+        updated = cls.query.filter_by(**parameters)\
+                           .update({'number': number, 'date': today}, synchronize_session=False)
+
+        if not updated:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(number=cls.get_highest_number(scope, scope_id, daily) + by,
+                                       date=today, **parameters))
+            except IntegrityError:  # NOTE: counter got created concurrently
+                return cls.increment(scope, scope_id, daily, by)
+
+        return db.session.query(cls.number).filter_by(**parameters).scalar()
+
+
+class PrintJob(db.Model, Mixin):
+    __tablename__ = 'print_jobs'
+    __table_args__ = (db.Index('ix_print_jobs_status_next_attempt', 'status', 'next_attempt'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    # NOTE: not a foreign key, so tickets can still be bulk deleted with their jobs pending
+    ticket_id = db.Column(db.Integer, index=True)
+    status = db.Column(db.String(10), default=PRINT_JOB_PENDING)
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.String(300), nullable=True)
+    timestamp = db.Column(db.DateTime(), default=datetime.utcnow)
+    next_attempt = db.Column(db.DateTime(), default=datetime.utcnow)
+    # NOTE: printed content is captured at the ticket creation
+    ticket = db.Column(db.String(300))
+    office = db.Column(db.String(300))
+    tickets_ahead = db.Column(db.Integer)
+    task = db.Column(db.String(300))
+    current_ticket = db.Column(db.String(300))
+    estimated_wait = db.Column(db.Integer, nullable=True)
+
+    def __init__(self, ticket_id=None, ticket=None, office=None, tickets_ahead=0,
+                 task=None, current_ticket=None, estimated_wait=None, status=PRINT_JOB_PENDING):
+        self.ticket_id = ticket_id
+        self.ticket = ticket
+        self.office = office
+        self.tickets_ahead = tickets_ahead
+        self.task = task
+        self.current_ticket = current_ticket
+        self.estimated_wait = estimated_wait
+        self.status = status
+        self.attempts = 0
+        self.next_attempt = datetime.utcnow()
+
+    @classmethod
+    def get_due(cls, limit=10):
+        ''' get the pending print jobs due to be attempted, oldest first.
+
+        Parameters
+        ----------
+            limit: int
+                limit of print jobs to get.
+
+        Returns
+        -------
+            Query of the due print jobs.
+        '''
+        return cls.query.filter(cls.status == PRINT_JOB_PENDING,
+                                cls.next_attempt <= datetime.utcnow())\
+                        .order_by(cls.next_attempt, cls.id)\
+                        .limit(limit)
+
+    def print(self):
+        ''' Print the job's ticket with the current printer settings.
+
+        Returns
+        -------
+            Exception raised while printing, if failed.
+        '''
+        from app.printer import (printer_sessions, printit, printit_ar, print_ticket_cli,
+                                 print_ticket_cli_ar)
+
+        windows = os.name == 'nt'
+        ticket_settings = Printer.get()
+        settings = Settings.get()
+        common_arguments = (self.ticket, self.office, self.tickets_ahead, self.task,
+                            self.current_ticket)
+
+        try:
+            if windows or settings.lp_printing:
+                (print_ticket_cli_ar
+                 if ticket_settings.langu == 'ar' else
+                 print_ticket_cli)(ticket_settings.name,
+                                   *common_arguments,
+                                   language=ticket_settings.langu,
+                                   estimated_wait=self.estimated_wait,
+                                   windows=windows,
+                                   unix=not windows)
+            else:
+                with printer_sessions.use(ticket_settings.vendor, ticket_settings.product,
+                                          ticket_settings.in_ep, ticket_settings.out_ep) as printer:
+                    (printit_ar if ticket_settings.langu == 'ar' else printit)(printer,
+                                                                               *common_arguments,
+                                                                               lang=ticket_settings.langu,
+                                                                               scale=ticket_settings.scale,
+                                                                               estimated_wait=self.estimated_wait)
+        except Exception as exception:
+            return exception
+
+    def attempt(self):
+        ''' Attempt printing the job, and reschedule it with a backoff if failed.
+
+        Returns
+        -------
+            Exception raised while printing, if failed.
+        '''
+        exception = self.print()
+        self.attempts += 1
+
+        if not exception:
+            self.status = PRINT_JOB_PRINTED
+            self.error = None
+        elif self.attempts >= PRINT_JOB_MAX_ATTEMPTS:
+            self.status = PRINT_JOB_FAILED
+            self.error = str(exception)[:300]
+        else:
+            self.error = str(exception)[:300]
+            self.next_attempt = datetime.utcnow() + timedelta(
+                seconds=PRINT_JOB_BACKOFF * 2 ** (self.attempts - 1))
+
+        db.session.add(self)
+        db.session.commit()
+        return exception
+
+    @classmethod
+    def purge(cls, age=PRINT_JOB_RETENTION):
+        ''' delete the printed and failed print jobs, older than a given age.
+
+        Parameters
+        ----------
+            age: int
+                duration in seconds to keep the print jobs for, since their creation.
+
+        Returns
+        -------
+            Count of the deleted print jobs.
+        '''
+        purged = cls.query.filter(cls.status.in_([PRINT_JOB_PRINTED, PRINT_JOB_FAILED]),
+                                  cls.timestamp <= datetime.utcnow() - timedelta(seconds=age))\
+                          .delete(synchronize_session=False)
+
+        db.session.commit()
+        return purged
+
+    def retry(self):
+        ''' Put a failed print job back in the queue, with its attempts reset. '''
+        self.status = PRINT_JOB_PENDING
+        self.attempts = 0
+        self.next_attempt = datetime.utcnow()
+
+        db.session.add(self)
+        db.session.commit()
+
+
 class BackgroundTask(db.Model, Mixin):
     __tablename__ = 'background_tasks'
     id = db.Column(db.Integer, primary_key=True)
@@ -602,7 +1126,7 @@ class AuthTokens(db.Model, Mixin):
         return token
 
 
-class Printer(db.Model, Mixin):
+class Printer(db.Model, SingletonMixin):
     __tablename__ = "printers"
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.Integer, nullable=True, unique=True)
@@ -631,7 +1155,7 @@ class Printer(db.Model, Mixin):
 # -- Touch custimization table
 
 
-class Touch_store(db.Model, Mixin):
+class Touch_store(db.Model, SingletonMixin):
     __tablename__ = 'touchs'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(300))
@@ -696,7 +1220,7 @@ class Touch_store(db.Model, Mixin):
 # -- Touch customization table
 
 
-class Display_store(db.Model, Mixin):
+class Display_store(db.Model, SingletonMixin):
     __tablename__ = 'displays'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(300))
@@ -729,6 +1253,8 @@ class Display_store(db.Model, Mixin):
     hide_ticket_index = db.Column(db.Boolean)
     # adding repeat announcement value
     r_announcement = db.Column(db.Boolean)
+    # text-to-speech engine of each announced language `language:engine,...`
+    tts_engines = db.Column(db.String(300), default='')
     akey = db.Column(db.Integer, db.ForeignKey("media.id",
                                                ondelete='cascade'),
                      nullable=True)
@@ -785,6 +1311,22 @@ class Display_store(db.Model, Mixin):
         self.wait_for_announcement = wait_for_announcement
         self.hide_ticket_index = hide_ticket_index
 
+    def get_tts_engine(self, language):
+        ''' Get the text-to-speech engine selected for a language.
+
+        Parameters
+        ----------
+            language: str
+                language of the announcements.
+
+        Returns
+        -------
+            String of the engine name.
+        '''
+        engines = dict(pair.split(':', 1) for pair in (self.tts_engines or '').split(',') if ':' in pair)
+
+        return engines.get(language, TTS_DEFAULT_ENGINE)
+
 
 # -- Slides storage table
 
@@ -891,7 +1433,7 @@ class Vid(db.Model, Mixin):
         self.vkey = vkey
 
 
-class Aliases(db.Model, Mixin):
+class Aliases(db.Model, SingletonMixin):
     __tablename__ = "aliases"
     id = db.Column(db.Integer, primary_key=True)
     office = db.Column(db.String(100))
@@ -910,7 +1452,7 @@ class Aliases(db.Model, Mixin):
         self.number = number
 
 
-class Settings(db.Model, Mixin):
+class Settings(db.Model, SingletonMixin):
     __tablename__ = 'settings'
     id = db.Column(db.Integer, primary_key=True)
     notifications = db.Column(db.Boolean, nullable=True)
@@ -918,12 +1460,233 @@ class Settings(db.Model, Mixin):
     visual_effects = db.Column(db.Boolean, nullable=True)
     lp_printing = db.Column(db.Boolean, nullable=True)
     single_row = db.Column(db.Boolean, nullable=True)
+    numbering = db.Column(db.String(10), nullable=True)
+    daily_numbering = db.Column(db.Boolean, nullable=True)
 
     def __init__(self, notifications=True, strict_pulling=True, visual_effects=True,
-                 lp_printing=False, single_row=False):
+                 lp_printing=False, single_row=False, numbering=TICKETS_NUMBERING_GLOBAL,
+                 daily_numbering=False):
         self.id = 0
         self.notifications = notifications
         self.strict_pulling = strict_pulling
         self.visual_effects = visual_effects
         self.lp_printing = lp_printing
         self.single_row = single_row
+        self.numbering = numbering
+        self.daily_numbering = daily_numbering
+
+
+# 00 Queue changes tracking 00 #
+# -- Notify the display feed of changes, only after they're committed
+
+
+def track_queue_changes(session, *offices_ids):
+    ''' Collect the offices affected by the session's changes, `None` stands for all offices.
+
+    Parameters
+    ----------
+        session: Session
+            session the changes are made within.
+        offices_ids: list
+            ids of the offices affected by the changes.
+    '''
+    session.info.setdefault('queue_changes', set()).update(offices_ids)
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_queue_changes(session, flush_context):
+    ''' Collect the offices affected by the flushed changes. '''
+    for record in chain(session.new, session.dirty, session.deleted):
+        if isinstance(record, Serial):
+            track_queue_changes(session, record.office_id,
+                                *(inspect(record).attrs.office_id.history.deleted or []))
+        elif isinstance(record, (Office, Task, Display_store, Settings)):
+            track_queue_changes(session, None)
+
+
+@event.listens_for(db.session, 'after_bulk_update')
+@event.listens_for(db.session, 'after_bulk_delete')
+def collect_bulk_queue_changes(context):
+    ''' Collect bulk changes as affecting all offices. '''
+    if context.mapper.class_ in (Serial, Office, Task, Display_store, Settings):
+        track_queue_changes(context.session, None)
+
+
+@event.listens_for(db.session, 'after_commit')
+def notify_queue_changes(session):
+    ''' Notify the committed changes, `None` stands for all offices. '''
+    changes = session.info.pop('queue_changes', None)
+
+    if changes:
+        events.notify(*([] if None in changes else changes))
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_queue_changes(session):
+    session.info.pop('queue_changes', None)
+
+
+# 00 Queue statistics 00 #
+# -- Update the queue running statistics with the issued and pulled tickets, once committed
+
+
+def track_queue_statistics(session, *observations):
+    ''' Collect the tickets issued and pulled within the session.
+
+    Parameters
+    ----------
+        session: Session
+            session the tickets are issued and pulled within.
+        observations: list
+            tuples of `(office_id, task_id, issued, pulled, waiting_office_id)`, `pulled` is
+            None for the issued tickets, `waiting_office_id` is the id of the office the ticket
+            joined or left the waiting queue of, None if it didn't.
+    '''
+    session.info.setdefault('queue_statistics', []).extend(observations)
+
+
+def get_waiting_queue(record, previous=False):
+    ''' Get the `(office_id, task_id)` queue a ticket is waiting in, None if it's not waiting,
+        or False if its previous queue is not known.
+    '''
+    values = []
+
+    for attribute in ('p', 'office_id', 'task_id'):
+        history = inspect(record).attrs[attribute].history
+
+        if not previous or not history.added:
+            values.append(getattr(record, attribute))
+        elif history.deleted:
+            values.append(history.deleted[0])
+        else:
+            return False
+
+    pulled, office_id, task_id = values
+
+    return None if pulled else (office_id, task_id)
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_queue_statistics(session, flush_context):
+    ''' Collect the flushed tickets issued and pulled, and the waiting tickets otherwise
+        changed, which the waiting counts are loaded again for.
+    '''
+    for record in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(record, Serial):
+            continue
+
+        queue = None if record in session.new else get_waiting_queue(record, previous=True)
+        new_queue = None if record in session.deleted else get_waiting_queue(record)
+        counted = queue == new_queue
+
+        if record in session.new:
+            track_queue_statistics(session, (record.office_id, record.task_id,
+                                             record.timestamp, None,
+                                             new_queue and new_queue[0]))
+            counted = True
+        elif record.p and record.pdt and inspect(record).attrs.pdt.history.added:
+            track_queue_statistics(session, (record.office_id, record.task_id,
+                                             record.timestamp, record.pdt,
+                                             queue[0] if queue else None))
+            counted = queue is not False and (not queue or queue[1] == record.task_id)
+
+        if not counted:
+            session.info['queue_waiting_changed'] = True
+
+
+@event.listens_for(db.session, 'after_bulk_update')
+@event.listens_for(db.session, 'after_bulk_delete')
+def collect_bulk_queue_statistics(context):
+    ''' Collect bulk changes of tickets as changing the waiting counts. '''
+    if context.mapper.class_ is Serial:
+        context.session.info['queue_waiting_changed'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def update_queue_statistics(session):
+    observations = session.info.pop('queue_statistics', None)
+
+    if observations:
+        queue_statistics.record(*observations)
+
+    if session.info.pop('queue_waiting_changed', None):
+        queue_statistics.reset_waiting()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_queue_statistics(session):
+    session.info.pop('queue_statistics', None)
+    session.info.pop('queue_waiting_changed', None)
+
+
+# 00 Cached records 00 #
+# -- Drop what's cached from the settings records, once they change
+
+
+def clear_printer_sessions():
+    from app.printer import printer_sessions
+
+    printer_sessions.clear()
+
+
+def clear_aliases_cache():
+    from app.utils import get_with_alias
+
+    get_with_alias.__dict__.pop('LABELS', None)
+
+
+def clear_detached_records():
+    detached_records.clear()
+
+
+CACHED_RECORDS = {
+    # NOTE: models cached from, with the callbacks to clear their caches with.
+    'Printer': (clear_printer_sessions, clear_detached_records),
+    'Aliases': (clear_aliases_cache, clear_detached_records),
+    'Settings': (clear_detached_records,),
+    'Display_store': (clear_detached_records,),
+    'Touch_store': (clear_detached_records,),
+    'Office': (clear_detached_records,),
+    'Task': (clear_detached_records,),
+    'Operators': (clear_detached_records,),
+}
+
+
+def track_cached_changes(session, *models):
+    session.info.setdefault('cached_changes', set()).update(
+        m.__name__ for m in models if m.__name__ in CACHED_RECORDS)
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_cached_changes(session, flush_context):
+    track_cached_changes(session, *{type(r) for r in chain(session.new, session.dirty, session.deleted)})
+
+
+@event.listens_for(db.session, 'after_bulk_update')
+@event.listens_for(db.session, 'after_bulk_delete')
+def collect_bulk_cached_changes(context):
+    track_cached_changes(context.session, context.mapper.class_)
+
+
+@event.listens_for(db.session, 'after_commit')
+def clear_cached_changes(session):
+    ''' Clear the caches of the committed changed records. '''
+    for model in session.info.pop('cached_changes', []):
+        for callback in CACHED_RECORDS[model]:
+            callback()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_cached_changes(session):
+    session.info.pop('cached_changes', None)
+
+
+# 00 Tickets numbering 00 #
+# -- Restart the numbering from the remaining tickets, once they're reset
+
+
+@event.listens_for(db.session, 'after_bulk_delete')
+def reset_tickets_counters(context):
+    ''' Drop the tickets counters, to get reseeded from the remaining tickets. '''
+    if context.mapper.class_ is Serial:
+        context.session.query(TicketsCounter).delete(synchronize_session=False)
@@ -0,0 +1,159 @@
+from uuid import uuid4
+from threading import Lock
+from collections import OrderedDict
+from gevent import sleep
+
+from app.constants import SNAPSHOTS_CACHE_MAX_SIZE
+
+
+class QueueEvents:
+    ''' In-process registry of the queue state changes, to notify the display screens with.
+
+        NOTE: the registry lives in the process memory, so changes made by other processes
+        (multiple `gunicorn` workers) will not be picked up.
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.version = 0
+        self.offices = {}
+        self.repeats = 0
+        # NOTE: to distinguish versions from the ones of previous runs
+        self.token = f'{uuid4()}'.replace('-', '')[:8]
+
+    def notify(self, *offices_ids):
+        ''' Bump the queue version for the given offices.
+
+        Parameters
+        ----------
+            offices_ids: list
+                ids of the offices affected by the change, if empty all offices are affected.
+        '''
+        with self.lock:
+            self.version += 1
+
+            for office_id in (offices_ids or [None]):
+                self.offices[office_id] = self.version
+
+    def notify_repeat(self):
+        ''' Request the display screens to repeat the last announcement. '''
+        with self.lock:
+            self.repeats += 1
+
+    def get_version(self, office_id=None):
+        ''' Get the queue version of a given office, or the global version.
+
+        Parameters
+        ----------
+            office_id: int
+                id of the office to get its queue version.
+
+        Returns
+        -------
+            Integer of the latest change version.
+        '''
+        if office_id is None:
+            return self.version
+
+        return max(self.offices.get(office_id, 0), self.offices.get(None, 0))
+
+    def get_etag(self, office_id=None, *extras):
+        ''' Get an entity tag of the queue version of a given office, or the global version.
+
+        Parameters
+        ----------
+            office_id: int
+                id of the office to get its queue version.
+            extras: list
+                other values the tagged representation depends on.
+
+        Returns
+        -------
+            String of the entity tag, unquoted.
+        '''
+        return '-'.join(map(str, [self.token, office_id, *extras, self.get_version(office_id)]))
+
+    def listen(self, office_id=None, interval=0.25, keep_alive=15):
+        ''' Generator to wait for the queue changes without blocking the server.
+
+        Parameters
+        ----------
+            office_id: int
+                id of the office to listen to its changes, if None listen to all changes.
+            interval: float
+                duration of sleep between checks in seconds.
+            keep_alive: int
+                duration in seconds after which to yield even if nothing changed.
+
+        Yields
+        ------
+            Tuple of `(changed, repeat)` booleans, the first yield is always changed.
+        '''
+        version, repeats, idle = None, self.repeats, 0
+
+        while True:
+            current_version = self.get_version(office_id)
+            changed = current_version != version
+            repeat = self.repeats != repeats
+
+            if changed or repeat or idle >= keep_alive:
+                version, repeats, idle = current_version, self.repeats, 0
+                yield changed, repeat
+            else:
+                sleep(interval)
+                idle += interval
+
+
+class SnapshotsCache:
+    ''' Cache of snapshots computed from the queue state, invalidated by its version, and kept
+        within a maximum number of snapshots by dropping the least recently used first.
+    '''
+    def __init__(self, registry, max_size=SNAPSHOTS_CACHE_MAX_SIZE):
+        self.registry = registry
+        self.max_size = max_size
+        self.snapshots = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key, getter, office_id=None):
+        ''' Get a cached snapshot, or compute it if the queue changed since.
+
+        Parameters
+        ----------
+            key: hashable
+                key to store the snapshot under.
+            getter: callable
+                function to compute the snapshot with.
+            office_id: int
+                id of the office the snapshot depends on, if None depends on all.
+
+        Returns
+        -------
+            The cached or the newly computed snapshot.
+        '''
+        # NOTE: version has to be read before computing, so changes in-between are not missed
+        version = self.registry.get_version(office_id)
+
+        with self.lock:
+            cached_version, snapshot = self.snapshots.get(key, (None, None))
+
+            if cached_version == version:
+                self.snapshots.move_to_end(key)
+                return snapshot
+
+        snapshot = getter()
+
+        with self.lock:
+            self.snapshots[key] = (version, snapshot)
+            self.snapshots.move_to_end(key)
+
+            while len(self.snapshots) > self.max_size:
+                self.snapshots.popitem(last=False)
+
+        return snapshot
+
+    def clear(self):
+        with self.lock:
+            self.snapshots.clear()
+
+
+events = QueueEvents()
+feeds_cache = SnapshotsCache(events)
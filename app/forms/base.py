@@ -1,7 +1,7 @@
 from flask import current_app, session
 from flask_wtf import FlaskForm
 
-from app.middleware import gtranslator as translator
+from app.translations import translations
 
 
 class LocalizedForm(FlaskForm):
@@ -21,7 +21,7 @@ class LocalizedForm(FlaskForm):
         with current_app.app_context():
             language = session.get('lang', 'en')
 
-        return translator.translate(text, _from, [language])
+        return translations.translate(text, _from, [language])
 
     def __init__(self, *args, **kwargs):
         super(LocalizedForm, self).__init__(*args, **kwargs)
@@ -36,6 +36,8 @@ ANNOUNCEMENT_REPEATS = [(i, f'{i} {"time" if i == 1 else "times"}') for i in ran
 ANNOUNCEMENT_REPEAT_TYPE = [
     ('each', 'Each: to repeat each announcement and notification'),
     ('whole', 'Whole: to repeat all the announcements and notification as whole')]
+TTS_ENGINES_CHOICES = [('gtts', 'Google text-to-speech (online)'),
+                       ('espeak', 'eSpeak NG (offline)')]
 
 TICKET_TYPES = [(1, 'Registered'), (2, 'Printed')]
 TICKET_REGISTERED_TYPES = [(1, 'Name'), (2, 'Number')]
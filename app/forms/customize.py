@@ -9,9 +9,11 @@ from app.forms.base import LocalizedForm
 from app.forms.constents import (FONT_SIZES, BTN_COLORS, DURATIONS, TOUCH_TEMPLATES, DISPLAY_TEMPLATES,
                                  ANNOUNCEMENT_REPEATS, ANNOUNCEMENT_REPEAT_TYPE, VISUAL_EFFECTS,
                                  VISUAL_EFFECT_REPEATS, BOOLEAN_SELECT_1, TICKET_TYPES,
-                                 TICKET_REGISTERED_TYPES, SLIDE_EFFECTS, SLIDE_DURATIONS, EVERY_OPTIONS)
+                                 TICKET_REGISTERED_TYPES, SLIDE_EFFECTS, SLIDE_DURATIONS, EVERY_OPTIONS,
+                                 TTS_ENGINES_CHOICES)
 from app.database import Media
-from app.constants import SUPPORTED_MEDIA_FILES, SUPPORTED_LANGUAGES, PRINTED_TICKET_SCALES
+from app.constants import (SUPPORTED_MEDIA_FILES, SUPPORTED_LANGUAGES, PRINTED_TICKET_SCALES,
+                           TTS_DEFAULT_ENGINE)
 from app.helpers import get_tts_safely
 
 
@@ -128,6 +130,9 @@ class DisplayScreenForm(LocalizedForm):
 
     for shortcode in get_tts_safely().keys():
         locals()[f'check{shortcode}'] = BooleanField()
+        locals()[f'engine{shortcode}'] = SelectField(coerce=str,
+                                                     choices=TTS_ENGINES_CHOICES,
+                                                     default=TTS_DEFAULT_ENGINE)
 
     def __init__(self, *args, **kwargs):
         super(DisplayScreenForm, self).__init__(*args, **kwargs)
@@ -139,6 +144,8 @@ class DisplayScreenForm(LocalizedForm):
 
         for shortcode, bundle in get_tts_safely().items():
             self[f'check{shortcode}'].label = self.translate(bundle.get('language'))
+            self[f'engine{shortcode}'].label = (f'{self.translate(bundle.get("language"))} - '
+                                                f'{self.translate("Text-to-speech engine")} :')
 
 
 class SlideAddForm(LocalizedForm):
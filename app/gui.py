@@ -8,7 +8,7 @@ from gevent import monkey, pywsgi
 from gevent.event import Event as thevent
 
 from app.utils import absolute_path, solve_path, get_accessible_ips, get_random_available_port, is_port_available
-from app.middleware import gtranslator
+from app.translations import translations
 from app.constants import SUPPORTED_LANGUAGES, VERSION
 from app.tasks import stop_tasks
 
@@ -129,7 +129,7 @@ class MainWindow(QWidget):
 
     def get_translation(self, text):
         current_language = list(self.languages.keys())[self.languages_list.currentIndex()]
-        return gtranslator.translate(text, dest=[current_language])
+        return translations.translate(text, dest=[current_language])
 
     def current_language(self):
         return list(self.languages.keys())[self.languages_list.currentIndex()]
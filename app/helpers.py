@@ -1,11 +1,14 @@
 import os
 import json
+from http import HTTPStatus
 from urllib.parse import unquote
 from functools import wraps
-from flask import current_app, flash, redirect, url_for
+from flask import current_app, flash, redirect, url_for, request, session, make_response, Response
 from flask_login import current_user
+from werkzeug.http import quote_etag
 
 import app.database as data
+from app.events import events
 from app.utils import absolute_path, log_error
 
 
@@ -318,6 +321,46 @@ def decode_links(function):
     return decorated
 
 
+def conditional_on_queue(office_kwarg=None):
+    ''' Decorator to respond with `304 Not Modified` if the queue didn't change since
+        the client's last request, without running the endpoint.
+
+    Parameters
+    ----------
+        office_kwarg: str
+            name of the endpoint argument of the office id the response depends on,
+            if not passed depends on all offices.
+
+    Returns
+    -------
+        Decorator for the passed `function`
+    '''
+    def wrapper(function):
+        @wraps(function)
+        def decorator(*args, **kwargs):
+            # NOTE: queue changes are tracked in-process, so not reliable with multiple workers
+            if current_app.config.get('GUNICORN', False):
+                return function(*args, **kwargs)
+
+            etag = events.get_etag(kwargs.get(office_kwarg), session.get('lang'))
+            headers = {'ETag': quote_etag(etag), 'Cache-Control': 'no-cache'}
+
+            if request.if_none_match.contains(etag):
+                return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+            response = function(*args, **kwargs)
+
+            if isinstance(response, tuple):  # NOTE: API resource response
+                content, code, *other_headers = response
+                return content, code, {**(other_headers[0] if other_headers else {}), **headers}
+
+            response = make_response(response)
+            response.headers.extend(headers)
+            return response
+        return decorator
+    return wrapper
+
+
 def get_tts_safely():
     ''' Helper to read gTTS data from `static/tts.json` file safely.
 
@@ -13,13 +13,15 @@ from flask_fontpicker import fontpicker
 from flask_minify import minify
 from sqlalchemy.exc import OperationalError
 
-from app.middleware import db, login_manager, files, gtranslator, gTTs, migrate
+from app.middleware import db, login_manager, files, gTTs, migrate, profiler
 from app.printer import get_printers_usb
 from app.views.administrate import administrate
 from app.views.core import core
 from app.views.customize import cust_app
 from app.views.manage import manage_app
 from app.utils import absolute_path, log_error, create_default_records, get_bp_endpoints
+from app.translations import translations
+from app.metrics import metrics
 from app.database import Settings, Serial, Office
 from app.tasks import start_tasks
 from app.api.setup import setup_api
@@ -41,6 +43,7 @@ def create_app(config={}):
                                                            (f'sqlite:///{absolute_path(DATABASE_FILE)}'
                                                             '?check_same_thread=False'))
     app.config['DB_NAME'] = DATABASE_FILE
+    app.config['PROFILE_QUERIES'] = bool(os.environ.get('PROFILE_QUERIES'))
     # Autoreload if templates change
     app.config['TEMPLATES_AUTO_RELOAD'] = True
     # flask_upload settings
@@ -63,11 +66,10 @@ def create_app(config={}):
     fontpicker(app, local=['static/jquery-ui.min.js', 'static/css/jquery-ui.min.css', 'static/webfont.min.js',
                            'static/webfont.select.min.js', 'static/css/webfont.select.css'])
     gTTs.init_app(app)
-    gtranslator.init_app(app)
+    profiler.init_app(app)
+    metrics.init_app(app)
 
-    if app.config.get('GUNICORN', False):
-        gtranslator.readonly = True
-    else:
+    if not app.config.get('GUNICORN', False):
         minify(app, js=True, cssless=True, caching_limit=3, fail_safe=True,
                bypass=['.min.*', 'restx_doc.static'])
 
@@ -78,6 +80,7 @@ def create_app(config={}):
     app.register_blueprint(manage_app)
     app.register_blueprint(setup_api(), url_prefix='/api/v1')
     app.jinja_env.add_extension('jinja2.ext.loopcontrols')
+    app.jinja_env.globals['translate'] = translations.translate
 
     return app
 
@@ -113,6 +116,8 @@ def bundle_app(config={}):
         create_db(app)
         start_tasks(app)
 
+    translations.load()
+
     if os.name != 'nt':
         # !!! it did not work creates no back-end available error !!!
         # !!! strange bug , do not remove !!!
@@ -191,10 +196,14 @@ def bundle_app(config={}):
         ''' Injecting default variables to all templates. '''
         ar = session.get('lang') == 'AR'  # adding language support var
         path = request.path or ''
+        offices = Office.get_all_cached()
+        user_id = getattr(current_user, 'id', None)
+        operated_offices = {o.id for o in offices if user_id in {operator.id for operator in o.operators}}
 
         return dict(brp=Markup('<br>'), ar=ar, version=VERSION, str=str, defLang=session.get('lang'),
                     getattr=getattr, settings=Settings.get(), Serial=Serial, next=next, it=iter,
-                    checkId=lambda id, records: id in [i.id for i in records], offices=Office.query.all(),
+                    checkId=lambda id, records: id in {i.id for i in records}, offices=offices,
+                    operated_offices=operated_offices,
                     moment_wrapper=moment_wrapper, current_path=quote(path, safe=''), windows=os.name == 'nt',
                     unix=os.name != 'nt', setattr=lambda *args, **kwargs: setattr(*args, **kwargs) or '',
                     adme=path in get_bp_endpoints(administrate))
@@ -0,0 +1,203 @@
+''' Runtime metrics of the queue, exposed in the Prometheus text format.
+
+Requests latencies, print jobs and background tasks are recorded as they happen, while the
+queue and the text-to-speech cache gauges are collected from their current state on each
+scrape. Metrics are kept per process, so each gunicorn worker reports its own.
+'''
+from time import perf_counter
+from threading import Lock
+from datetime import datetime, timedelta
+from flask import request, Response
+from sqlalchemy import func
+
+import app.database as data
+from app.middleware import db, gTTs
+from app.constants import METRICS_BUCKETS, METRICS_CONTENT_TYPE
+
+
+def format_labels(labels):
+    ''' Format labels into the Prometheus text format, escaping their values. '''
+    escape = lambda value: str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    formated = ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+    return f'{{{formated}}}' if formated else ''
+
+
+class Metric:
+    ''' Base of the metrics, with a value per labels values. '''
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = Lock()
+
+    def get_key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self.get_key(labels)] = value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def samples(self):
+        ''' Get the metric samples, as tuples of name, labels and value. '''
+        with self.lock:
+            return [(self.name, list(zip(self.labels, key)), value)
+                    for key, value in self.values.items()]
+
+    def expose(self):
+        ''' Get the metric in the Prometheus text format. '''
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines += [f'{name}{format_labels(labels)} {float(value)}'
+                  for name, labels, value in self.samples()]
+
+        return '\n'.join(lines)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            key = self.get_key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=METRICS_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value, **labels):
+        with self.lock:
+            key = self.get_key(labels)
+            counts, count, total = self.values.get(key, ([0] * len(self.buckets), 0, 0))
+            counts = [bucket_count + (value <= bucket)
+                      for bucket_count, bucket in zip(counts, self.buckets)]
+            self.values[key] = (counts, count + 1, total + value)
+
+    def samples(self):
+        samples = []
+
+        for name, labels, (counts, count, total) in super().samples():
+            samples += [(f'{name}_bucket', labels + [('le', float(bucket))], bucket_count)
+                        for bucket, bucket_count in zip(self.buckets, counts)]
+            samples += [(f'{name}_bucket', labels + [('le', '+Inf')], count),
+                        (f'{name}_sum', labels, total),
+                        (f'{name}_count', labels, count)]
+
+        return samples
+
+
+class MetricsRegistry:
+    ''' Flask extension keeping the metrics, and timing the requests per endpoint. '''
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.lock = Lock()
+
+    def init_app(self, app):
+        app.before_request(self.start)
+        app.teardown_request(self.stop)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, function):
+        ''' Register a function to update metrics from the current state, on each scrape. '''
+        self.collectors.append(function)
+        return function
+
+    def start(self):
+        # NOTE: kept in the request environ, the app context can be gone by the request teardown.
+        request.environ['metrics.started'] = perf_counter()
+
+    def stop(self, exception=None):
+        started = request.environ.pop('metrics.started', None)
+
+        if started is not None:
+            requests_latency.observe(perf_counter() - started,
+                                     endpoint=request.endpoint or 'unmatched')
+
+    def expose(self):
+        ''' Get all the metrics in the Prometheus text format. '''
+        with self.lock:
+            for collect in self.collectors:
+                collect()
+
+            return '\n'.join(metric.expose() for metric in self.metrics) + '\n'
+
+    def response(self):
+        return Response(self.expose(), content_type=METRICS_CONTENT_TYPE)
+
+
+metrics = MetricsRegistry()
+requests_latency = metrics.register(Histogram('fqm_request_duration_seconds',
+                                              'Requests latency per endpoint.',
+                                              ['endpoint']))
+waiting_tickets = metrics.register(Gauge('fqm_waiting_tickets',
+                                         'Waiting tickets per office and task.',
+                                         ['office_id', 'task_id']))
+issued_tickets = metrics.register(Gauge('fqm_tickets_issued_per_minute',
+                                        'Tickets issued in the last minute.'))
+pulled_tickets = metrics.register(Gauge('fqm_tickets_pulled_per_minute',
+                                        'Tickets pulled in the last minute.'))
+print_jobs = metrics.register(Gauge('fqm_print_jobs',
+                                    'Print jobs per status.',
+                                    ['status']))
+print_jobs_latency = metrics.register(Histogram('fqm_print_job_latency_seconds',
+                                                'Duration from queueing a print job to printing it.'))
+print_jobs_failures = metrics.register(Counter('fqm_print_job_failures_total',
+                                               'Failed attempts of printing jobs.'))
+tts_cache_hit_ratio = metrics.register(Gauge('fqm_tts_cache_hit_ratio',
+                                             'Text-to-speech audio files cache hits ratio.'))
+tts_cache_size = metrics.register(Gauge('fqm_tts_cache_size_bytes',
+                                        'Text-to-speech audio files cache size.'))
+background_tasks_duration = metrics.register(Histogram('fqm_background_task_duration_seconds',
+                                                       'Background tasks runs durations.',
+                                                       ['task']))
+
+
+@metrics.collector
+def collect_tickets():
+    minute_ago = datetime.utcnow() - timedelta(minutes=1)
+    waiting = db.session.query(data.Serial.office_id, data.Serial.task_id, func.count())\
+                        .filter(data.Serial.p == False)\
+                        .group_by(data.Serial.office_id, data.Serial.task_id)
+
+    waiting_tickets.clear()
+    for office_id, task_id, count in waiting:
+        waiting_tickets.set(count, office_id=office_id, task_id=task_id)
+
+    issued_tickets.set(data.Serial.query.filter(data.Serial.timestamp >= minute_ago).count())
+    pulled_tickets.set(data.Serial.query.filter(data.Serial.p == True,
+                                                data.Serial.pdt >= minute_ago).count())
+
+
+@metrics.collector
+def collect_print_jobs():
+    print_jobs.clear()
+    for status, count in db.session.query(data.PrintJob.status, func.count())\
+                                   .group_by(data.PrintJob.status):
+        print_jobs.set(count, status=status)
+
+
+@metrics.collector
+def collect_tts_cache():
+    stats = gTTs.stats()
+
+    tts_cache_hit_ratio.set(stats['hit_rate'])
+    tts_cache_size.set(stats['size'])
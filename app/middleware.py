@@ -2,9 +2,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_uploads import UploadSet, ALL
-from flask_googletrans import translator
-from flask_gtts import gtts
 
+from app.tts import AnnouncementsCache
+from app.profiler import QueriesProfiler
 from app.constants import MIGRATION_FOLDER
 
 # NOTE: Work around for flask imports and registering blueprints
@@ -15,5 +15,5 @@ migrate = Migrate(directory=MIGRATION_FOLDER, compare_type=True)
 login_manager = LoginManager()
 login_manager.login_view = "login"
 files = UploadSet('files', ALL)
-gtranslator = translator(cache=True, skip_app=True, fail_safe=True)
-gTTs = gtts(route=True, failsafe=True, logging=False)
+gTTs = AnnouncementsCache(route=True, failsafe=True, logging=False)
+profiler = QueriesProfiler()
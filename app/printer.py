@@ -1,17 +1,21 @@
-import uuid
 import usb.core
 import usb.util
 import arabic_reshaper
 from escpos import printer as getp
 from escpos.printer import Dummy
 from datetime import datetime
+from threading import Lock
+from contextlib import contextmanager
+from functools import lru_cache
 from bidi.algorithm import get_display
 from PIL import Image, ImageDraw, ImageFont
-from os import remove, getcwd, path, name, system
+from os import path
+from subprocess import run, DEVNULL, PIPE
 
 from app.utils import absolute_path, get_with_alias, log_error, convert_to_int_or_hex, execute
-from app.middleware import gtranslator
-from app.constants import VERSION, PRINTED_TICKET_DIMENSIONS, PRINTED_TICKET_MAXIMUM_HEIGH_OR_WIDTH
+from app.translations import translations
+from app.constants import (VERSION, PRINTED_TICKET_DIMENSIONS, PRINTED_TICKET_MAXIMUM_HEIGH_OR_WIDTH,
+                           ARABIC_TICKET_WIDTH, ARABIC_TICKET_ROWS, ARABIC_TICKET_HEIGHT)
 
 
 class find_class(object):
@@ -148,8 +152,102 @@ def assign(vendor_id, product_id, in_ep=None, out_ep=None):
     return printer
 
 
+class PrinterSessions:
+    ''' Pool of open USB printers sessions, one per printer configuration, to skip finding
+        and claiming the device on every print.
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.sessions = {}
+        # NOTE: a printer's lock is never replaced, so writing to the printer stays exclusive
+        # across its sessions.
+        self.locks = {}
+
+    def is_healthy(self, printer):
+        ''' Check if a printer session's device is still connected, without enumerating devices.
+
+        Parameters
+        ----------
+            printer: escpos.printer.Usb
+                printer session to check.
+
+        Returns
+        -------
+            Boolean of the session's health.
+        '''
+        try:
+            printer.device.get_active_configuration()
+            return True
+        except Exception:
+            return False
+
+    def get_lock(self, key):
+        ''' Get the lock of a printer configuration, created once. '''
+        with self.lock:
+            return self.locks.setdefault(key, Lock())
+
+    def discard(self, key):
+        ''' Close and remove a printer session, if existing. Must be called with the printer
+            lock held.
+
+        Parameters
+        ----------
+            key: tuple
+                printer configuration the session is stored under.
+        '''
+        printer = self.sessions.pop(key, None)
+
+        try:
+            printer and printer.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def use(self, vendor_id, product_id, in_ep=None, out_ep=None):
+        ''' Acquire the printer session of a given configuration, to write to it exclusively.
+            The session is opened or reconnected if needed, and dropped if writing fails.
+
+        Parameters
+        ----------
+            vendor_id: int
+            product_id: int
+            in_ep: int
+            out_ep: int
+
+        Yields
+        ------
+            ESCPOS Printer instance.
+        '''
+        key = (vendor_id, product_id, in_ep, out_ep)
+
+        with self.get_lock(key):
+            printer = self.sessions.get(key)
+
+            if not printer or not self.is_healthy(printer):
+                self.discard(key)
+                printer = self.sessions[key] = assign(*key)
+
+            try:
+                yield printer
+            except Exception:
+                self.discard(key)
+                raise
+
+    def clear(self):
+        ''' Close all the printers sessions, waiting for the ongoing prints. '''
+        with self.lock:
+            locks = list(self.locks.items())
+
+        for key, printer_lock in locks:
+            with printer_lock:
+                self.discard(key)
+
+
+printer_sessions = PrinterSessions()
+
+
 def get_translation(text, language):
-    translated = gtranslator.translate(text, dest=[language])
+    translated = translations.translate(text, dest=[language])
 
     if language == 'en':
         translated = get_with_alias().get(text) or translated
@@ -159,7 +257,7 @@ def get_translation(text, language):
 
 def printit(printer, ticket, office, tnumber,
             task, cticket, site='https://fqms.github.io', lang='en',
-            scale=1):
+            scale=1, estimated_wait=None):
     printer.set(align='center', **get_font_height_width('logo', scale))
     printer.text("FQM\n")
     printer.set(align='center', **get_font_height_width('regular', scale))
@@ -176,6 +274,8 @@ def printit(printer, ticket, office, tnumber,
     printer.text(f'\n{get_translation("Office : ", lang)}{office}\n')
     printer.text(f'\n{get_translation("Current ticket : ", lang)}{cticket}\n')
     printer.text(f'\n{get_translation("Tickets ahead : ", lang)}{tnumber}\n')
+    if estimated_wait is not None:
+        printer.text(f'\n{get_translation("Estimated wait : ", lang)}~{estimated_wait} min\n')
     try:
         printer.text(f'\n{get_translation("Task : ", lang)}{task}\n')
     except Exception:
@@ -186,7 +286,8 @@ def printit(printer, ticket, office, tnumber,
 
 
 def print_ticket_cli(printer, ticket, office, tickets_ahead, task, current_ticket,
-                     host='localhost', language='en', scale=1, windows=False, unix=False):
+                     host='localhost', language='en', scale=1, estimated_wait=None,
+                     windows=False, unix=False):
     '''Print a ticket through the Command-Line interface.
 
     Parameters
@@ -209,283 +310,150 @@ def print_ticket_cli(printer, ticket, office, tickets_ahead, task, current_ticke
         printing language, by default 'en'
     scale : int, optional
         ticket font scale, by default 1
+    estimated_wait : int, optional
+        estimated waiting time in minutes, by default None
     windows : bool, optional
         if printing on Windows, by default False
     unix : bool, optional
         if printing on Unix-like, by default False
     '''
     ticket_content = printit(Dummy(), ticket, office, tickets_ahead, task,
-                             current_ticket, lang=language, scale=scale).output
-    file_path = path.join(getcwd(),
-                          f'{uuid.uuid4()}'.replace('-', '') + '.txt')
+                             current_ticket, lang=language, scale=scale,
+                             estimated_wait=estimated_wait).output
+
+    print_raw(ticket_content, printer, host=host, windows=windows, unix=unix)
+
 
-    with open(file_path, 'wb+') as file:
-        file.write(ticket_content)
+def print_raw(content, printer, host='localhost', windows=False, unix=False):
+    ''' Send a rendered ESC/POS bytes stream to a printer as is, without temporary files.
 
+    Parameters
+    ----------
+    content : bytes
+        ESC/POS bytes stream to print.
+    printer : str
+        the printer name.
+    host : str, optional
+        host to find printer on, by default 'localhost'
+    windows : bool, optional
+        if printing on Windows, by default False
+    unix : bool, optional
+        if printing on Unix-like, by default False
+    '''
     if unix:
-        system(f'lp -d "{printer}" -o raw "{file_path}"')
+        # NOTE: `lp` reads the job from its standard input, when no files are passed
+        run(['lp', '-d', printer, '-o', 'raw'], input=content, stdout=DEVNULL,
+            stderr=PIPE, check=True)
     elif windows:
-        system(f'print /D:\\\{host}\\"{printer}" "{file_path}"')
+        # NOTE: the shared printer is written to as a device file, same as `copy /b`
+        with open(f'\\\\{host}\\{printer}', 'wb') as device:
+            device.write(content)
 
-    if path.isfile(file_path):
-        remove(file_path)
 
+def reshape_arabic(text):
+    return get_display(arabic_reshaper.reshape(text))
+
+
+@lru_cache(maxsize=None)
+def get_arabic_font(size):
+    ''' Load the Arabic ticket font of a given size, only once.
+
+    Parameters
+    ----------
+        size: int
+            font size to load.
+
+    Returns
+    -------
+        PIL ImageFont instance.
+    '''
+    return ImageFont.truetype(absolute_path(path.join('static', 'gfonts', 'arial.ttf')), size)
+
+
+def draw_arabic_rows(image, **fields):
+    ''' Draw the given fields centered in their rows of an Arabic ticket image.
+
+    Parameters
+    ----------
+        image: PIL.Image
+            Arabic ticket image to draw on.
+        fields: dict
+            text of the fields to draw, keyed with their `ARABIC_TICKET_ROWS` names.
+    '''
+    drawing = ImageDraw.Draw(image)
+    top = 0
+
+    for field, height, size in ARABIC_TICKET_ROWS:
+        text = fields.get(field)
+
+        if text is not None:
+            font = get_arabic_font(size)
+            text_width, text_height = font.getsize(text)
+            drawing.text(((image.size[0] - text_width) / 2, top + (height - text_height) / 2),
+                         text, font=font, fill='black')
+
+        top += height
+
+
+@lru_cache(maxsize=1)
+def get_arabic_ticket_template():
+    ''' Render the static parts of the Arabic ticket, only once.
+
+    Returns
+    -------
+        PIL.Image of the ticket without its changing fields, not to be drawn on.
+    '''
+    template = Image.new('RGB', (ARABIC_TICKET_WIDTH, ARABIC_TICKET_HEIGHT), 'white')
+
+    draw_arabic_rows(template,
+                     logo='FQM ' + VERSION[:4],
+                     title=reshape_arabic(u'نظام إدارة الحشود الحر'),
+                     link='http://fqms.github.io',
+                     border='#' * 20)
+    return template
+
+
+def render_arabic_ticket(ti, ofc, tnu, tas, cticket, estimated_wait=None):
+    ''' Render an Arabic ticket image, drawing only its changing fields on the cached template.
+
+    Returns
+    -------
+        PIL.Image of the ticket.
+    '''
+    ticket = get_arabic_ticket_template().copy()
 
-def printit_ar(pname, ti, ofc, tnu, tas, cticket, **kwargs):
-    def fsizeit(text, t, f):
-        ltxt = "A" * len(t)
-        return f.getsize(t)
-
-    def center(text, t, f):
-        fs1, fs2 = fsizeit(text, t, f)
-        return ((text.size[0] - fs1) / 2, (text.size[1] - fs2) / 2)
-    if name == 'nt':
-        fpath = absolute_path('static\\gfonts\\arial.ttf')
-    else:
-        fpath = absolute_path('static/gfonts/arial.ttf')
-    fonts = [ImageFont.truetype(fpath, 50),
-             ImageFont.truetype(fpath, 30),
-             ImageFont.truetype(fpath, 25)]
-
-    logo = 'FQM ' + VERSION[:4]
-    title = u'نظام إدارة الحشود الحر'
-    title = arabic_reshaper.reshape(title)
-    title = get_display(title)
-    link = 'http://fqms.github.io'
-    border = "#" * 20
-    ticket = str(ti)
-    officet = u'المكتب : ' + ofc
-    office = arabic_reshaper.reshape(officet)
-    office = get_display(office)
     try:
-        taskt = u'المهمة : ' + tas
+        task = u'المهمة : ' + tas
     except Exception:
-        taskt = tas
-    task = arabic_reshaper.reshape(taskt)
-    task = get_display(task)
-    datet = u'الوقت : '
-    datet += str(datetime.now())[:-7]
-    date = arabic_reshaper.reshape(datet)
-    date = get_display(date)
-    aheadt = u'تذاكر قبلك : '
-    aheadt += str(tnu)
-    ahead = arabic_reshaper.reshape(aheadt)
-    ahead = get_display(ahead)
-    cutit = u'التذكرة الحالية : '
-    cutit += str(cticket)
-    cuti = arabic_reshaper.reshape(cutit)
-    cuti = get_display(cuti)
-
-    w = 400
-    bt_1 = Image.new('RGB', (w, 60), "white")
-    bt_2 = Image.new('RGB', (w, 60), "white")
-    bt_3 = Image.new('RGB', (w, 60), "white")
-    st_1 = Image.new('RGB', (w, 50), "white")
-    st_2 = Image.new('RGB', (w, 50), "white")
-    st_3 = Image.new('RGB', (w, 50), "white")
-    st_4 = Image.new('RGB', (w, 50), "white")
-    st_5 = Image.new('RGB', (w, 50), "white")
-    st_6 = Image.new('RGB', (w, 50), "white")
-    st_7 = Image.new('RGB', (w, 50), "white")
-    st_8 = Image.new('RGB', (w, 50), "white")
-    tt = 50 * 8
-    tt += 60 * 3
-    mt = Image.new('RGB', (w, tt), "white")
-
-    bd_1 = ImageDraw.Draw(bt_1)
-    bd_2 = ImageDraw.Draw(bt_2)
-    bd_3 = ImageDraw.Draw(bt_3)
-    sd_1 = ImageDraw.Draw(st_1)
-    sd_2 = ImageDraw.Draw(st_2)
-    sd_3 = ImageDraw.Draw(st_3)
-    sd_4 = ImageDraw.Draw(st_4)
-    sd_5 = ImageDraw.Draw(st_5)
-    sd_6 = ImageDraw.Draw(st_6)
-    sd_7 = ImageDraw.Draw(st_7)
-    sd_8 = ImageDraw.Draw(st_8)
-    md = ImageDraw.Draw(mt)
-
-    b = "black"
-    bd_1.text(center(bt_1, logo, fonts[0]), logo,
-              font=fonts[0], fill=b)
-    bd_2.text(center(bt_2, title, fonts[1]), title,
-              font=fonts[1], fill=b)
-    bd_3.text(center(bt_3, ticket, fonts[0]), ticket,
-              font=fonts[0], fill=b)
-    sd_1.text(center(st_1, link, fonts[2]), link, font=fonts[2], fill=b)
-    sd_2.text(center(st_2, border, fonts[2]), border, font=fonts[2], fill=b)
-    sd_3.text(center(st_3, border, fonts[2]), border, font=fonts[2], fill=b)
-    sd_4.text(center(st_4, office, fonts[2]), office, font=fonts[2], fill=b)
-    sd_5.text(center(st_5, task, fonts[2]), task, font=fonts[2], fill=b)
-    sd_6.text(center(st_6, date, fonts[2]), date, font=fonts[2], fill=b)
-    sd_7.text(center(st_7, ahead, fonts[2]), ahead, font=fonts[2], fill=b)
-    sd_8.text(center(st_8, cuti, fonts[2]), cuti, font=fonts[2], fill=b)
-
-    tts = 0
-    mt.paste(bt_1, (0, 0))
-    tts += bt_1.size[1]
-    mt.paste(bt_2, (0, tts))
-    tts += bt_2.size[1]
-    mt.paste(st_1, (0, tts))
-    tts += st_1.size[1]
-    mt.paste(st_2, (0, tts))
-    tts += st_2.size[1]
-    mt.paste(bt_3, (0, tts))
-    tts += bt_3.size[1]
-    mt.paste(st_3, (0, tts))
-    tts += st_3.size[1]
-    mt.paste(st_4, (0, tts))
-    tts += st_4.size[1]
-    mt.paste(st_8, (0, tts))
-    tts += st_8.size[1]
-    mt.paste(st_7, (0, tts))
-    tts += st_7.size[1]
-    mt.paste(st_5, (0, tts))
-    tts += st_5.size[1]
-    mt.paste(st_6, (0, tts))
-
-    iname = 'dummy.jpg'
-    finame = path.join(getcwd(), iname)
-    mt.save(iname, format="JPEG")
-    pname.image(finame, fragment_height=tt, high_density_vertical=True)
+        task = tas
+
+    tickets_ahead = u'تذاكر قبلك : ' + str(tnu)
+
+    # NOTE: estimated waiting time shares the tickets ahead row, to keep the ticket's height
+    if estimated_wait is not None:
+        tickets_ahead += u' (~' + str(estimated_wait) + u' دقيقة)'
+
+    draw_arabic_rows(ticket,
+                     ticket=str(ti),
+                     office=reshape_arabic(u'المكتب : ' + ofc),
+                     current_ticket=reshape_arabic(u'التذكرة الحالية : ' + str(cticket)),
+                     tickets_ahead=reshape_arabic(tickets_ahead),
+                     task=reshape_arabic(task),
+                     time=reshape_arabic(u'الوقت : ' + str(datetime.now())[:-7]))
+    return ticket
+
+
+def printit_ar(pname, ti, ofc, tnu, tas, cticket, **kwargs):
+    pname.image(render_arabic_ticket(ti, ofc, tnu, tas, cticket, kwargs.get('estimated_wait')),
+                fragment_height=ARABIC_TICKET_HEIGHT,
+                high_density_vertical=True)
     pname.cut()
-    pname.close()
-    if path.isfile(finame):
-        remove(finame)
+    return pname
 
 
 def print_ticket_cli_ar(pname, ti, ofc, tnu, tas, cticket, host='localhost', **kwargs):
-    def fsizeit(text, t, f):
-        return f.getsize(t)
-
-    def center(text, t, f):
-        fs1, fs2 = fsizeit(text, t, f)
-        return ((text.size[0] - fs1) / 2, (text.size[1] - fs2) / 2)
-
-    fpath = absolute_path('static/gfonts/arial.ttf')
-    fonts = [ImageFont.truetype(fpath, 50),
-             ImageFont.truetype(fpath, 30),
-             ImageFont.truetype(fpath, 25)]
-
-    logo = 'FQM ' + VERSION[:4]
-    title = u'نظام إدارة الحشود الحر'
-    title = arabic_reshaper.reshape(title)
-    title = get_display(title)
-    link = 'http://fqms.github.io'
-    border = "#" * 20
-    ticket = str(ti)
-    officet = u'المكتب : ' + ofc
-    office = arabic_reshaper.reshape(officet)
-    office = get_display(office)
-    try:
-        taskt = u'المهمة : ' + tas
-    except Exception:
-        taskt = tas
-    task = arabic_reshaper.reshape(taskt)
-    task = get_display(task)
-    datet = u'الوقت : '
-    datet += str(datetime.now())[:-7]
-    date = arabic_reshaper.reshape(datet)
-    date = get_display(date)
-    aheadt = u'تذاكر قبلك : '
-    aheadt += str(tnu)
-    ahead = arabic_reshaper.reshape(aheadt)
-    ahead = get_display(ahead)
-    cutit = u'التذكرة الحالية : '
-    cutit += str(cticket)
-    cuti = arabic_reshaper.reshape(cutit)
-    cuti = get_display(cuti)
-
-    w = 400
-    bt_1 = Image.new('RGB', (w, 60), "white")
-    bt_2 = Image.new('RGB', (w, 60), "white")
-    bt_3 = Image.new('RGB', (w, 60), "white")
-    st_1 = Image.new('RGB', (w, 50), "white")
-    st_2 = Image.new('RGB', (w, 50), "white")
-    st_3 = Image.new('RGB', (w, 50), "white")
-    st_4 = Image.new('RGB', (w, 50), "white")
-    st_5 = Image.new('RGB', (w, 50), "white")
-    st_6 = Image.new('RGB', (w, 50), "white")
-    st_7 = Image.new('RGB', (w, 50), "white")
-    st_8 = Image.new('RGB', (w, 50), "white")
-    tt = 50 * 8
-    tt += 60 * 3
-    mt = Image.new('RGB', (w, tt), "white")
-
-    bd_1 = ImageDraw.Draw(bt_1)
-    bd_2 = ImageDraw.Draw(bt_2)
-    bd_3 = ImageDraw.Draw(bt_3)
-    sd_1 = ImageDraw.Draw(st_1)
-    sd_2 = ImageDraw.Draw(st_2)
-    sd_3 = ImageDraw.Draw(st_3)
-    sd_4 = ImageDraw.Draw(st_4)
-    sd_5 = ImageDraw.Draw(st_5)
-    sd_6 = ImageDraw.Draw(st_6)
-    sd_7 = ImageDraw.Draw(st_7)
-    sd_8 = ImageDraw.Draw(st_8)
-    md = ImageDraw.Draw(mt)
-
-    b = "black"
-    bd_1.text(center(bt_1, logo, fonts[0]), logo,
-              font=fonts[0], fill=b)
-    bd_2.text(center(bt_2, title, fonts[1]), title,
-              font=fonts[1], fill=b)
-    bd_3.text(center(bt_3, ticket, fonts[0]), ticket,
-              font=fonts[0], fill=b)
-    sd_1.text(center(st_1, link, fonts[2]), link, font=fonts[2], fill=b)
-    sd_2.text(center(st_2, border, fonts[2]), border, font=fonts[2], fill=b)
-    sd_3.text(center(st_3, border, fonts[2]), border, font=fonts[2], fill=b)
-    sd_4.text(center(st_4, office, fonts[2]), office, font=fonts[2], fill=b)
-    sd_5.text(center(st_5, task, fonts[2]), task, font=fonts[2], fill=b)
-    sd_6.text(center(st_6, date, fonts[2]), date, font=fonts[2], fill=b)
-    sd_7.text(center(st_7, ahead, fonts[2]), ahead, font=fonts[2], fill=b)
-    sd_8.text(center(st_8, cuti, fonts[2]), cuti, font=fonts[2], fill=b)
-
-    tts = 0
-    mt.paste(bt_1, (0, 0))
-    tts += bt_1.size[1]
-    mt.paste(bt_2, (0, tts))
-    tts += bt_2.size[1]
-    mt.paste(st_1, (0, tts))
-    tts += st_1.size[1]
-    mt.paste(st_2, (0, tts))
-    tts += st_2.size[1]
-    mt.paste(bt_3, (0, tts))
-    tts += bt_3.size[1]
-    mt.paste(st_3, (0, tts))
-    tts += st_3.size[1]
-    mt.paste(st_4, (0, tts))
-    tts += st_4.size[1]
-    mt.paste(st_8, (0, tts))
-    tts += st_8.size[1]
-    mt.paste(st_7, (0, tts))
-    tts += st_7.size[1]
-    mt.paste(st_5, (0, tts))
-    tts += st_5.size[1]
-    mt.paste(st_6, (0, tts))
-
-    sffs = []
-    sfs = [
-        f'{uuid.uuid4()}'.replace('-', '') + '.jpg',
-        f'{uuid.uuid4()}'.replace('-', '') + '.txt'
-    ]
-
-    for f in sfs:
-        sffs.append(path.join(getcwd(), f))
-    mt.save(sfs[0], format="JPEG")
-    p = Dummy()
-    p.image(sfs[0], fragment_height=tt, high_density_vertical=True)
-    p.cut()
-    f = open(sfs[1], 'wb+')
-    f.write(p.output)
-    p.close()
-    f.close()
-
-    if kwargs.get('windows'):
-        system(f'print /D:\\\{host}\\"{pname}" "{sffs[1]}"')
-    elif kwargs.get('unix'):
-        system(f'lp -d "{pname}" -o raw "{sffs[1]}"')
-
-    for f in sffs:
-        if path.isfile(f):
-            remove(f)
+    ticket_content = printit_ar(Dummy(), ti, ofc, tnu, tas, cticket,
+                                estimated_wait=kwargs.get('estimated_wait')).output
+
+    print_raw(ticket_content, pname, host=host, windows=kwargs.get('windows'),
+              unix=kwargs.get('unix'))
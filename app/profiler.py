@@ -0,0 +1,116 @@
+''' Opt-in profiling of the SQL queries each endpoint runs, to catch N+1 queries patterns.
+
+Queries are counted and timed through the SQLAlchemy engine events, per request, and then
+aggregated per endpoint. A request that runs more queries than the threshold, or repeats the
+same statement more than the repeats threshold, is logged as an offender.
+'''
+import re
+from time import perf_counter
+from threading import Lock
+from collections import Counter
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+
+from app.constants import PROFILE_QUERIES_THRESHOLD, PROFILE_QUERIES_REPEATS
+
+
+def get_statement_shape(statement):
+    ''' Get the shape of a statement, with its whitespaces and parameters lists collapsed. '''
+    statement = ' '.join(statement.split())
+
+    return re.sub(r'\(\?(, \?)+\)', '(?)', statement)
+
+
+class QueriesProfiler:
+    ''' Flask extension to profile the SQL queries per endpoint, if `PROFILE_QUERIES` is enabled. '''
+    def __init__(self, threshold=PROFILE_QUERIES_THRESHOLD, repeats=PROFILE_QUERIES_REPEATS):
+        self.threshold = threshold
+        self.repeats = repeats
+        self.enabled = False
+        self.endpoints = {}
+        self.lock = Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILE_QUERIES', False)
+        self.threshold = app.config.get('PROFILE_QUERIES_THRESHOLD', self.threshold)
+        self.repeats = app.config.get('PROFILE_QUERIES_REPEATS', self.repeats)
+
+        if not self.enabled:
+            return
+
+        engine = app.extensions['sqlalchemy'].db.get_engine(app)
+
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+        app.before_request(self.start)
+        app.teardown_request(self.stop)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('queries_started', []).append(perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - conn.info['queries_started'].pop()
+        # NOTE: background tasks queries are not tied to any endpoint.
+        profile = g.get('queries_profile') if has_request_context() else None
+
+        if profile is not None:
+            profile['queries'] += 1
+            profile['time'] += duration
+            profile['statements'][get_statement_shape(statement)] += 1
+
+    def start(self):
+        g.queries_profile = dict(queries=0, time=0, statements=Counter())
+
+    def stop(self, exception=None):
+        profile = g.pop('queries_profile', None)
+
+        if profile is None:
+            return
+
+        endpoint = request.endpoint or request.path
+        repeated = {s: count for s, count in profile['statements'].items() if count > 1}
+        too_many = profile['queries'] > self.threshold
+        too_repeated = any(count > self.repeats for count in repeated.values())
+        offender = too_many or too_repeated
+
+        with self.lock:
+            aggregate = self.endpoints.setdefault(endpoint, dict(requests=0, queries=0, max_queries=0,
+                                                                 time=0, offenders=0,
+                                                                 repeated=Counter()))
+            aggregate['requests'] += 1
+            aggregate['queries'] += profile['queries']
+            aggregate['max_queries'] = max(aggregate['max_queries'], profile['queries'])
+            aggregate['time'] += profile['time']
+            aggregate['offenders'] += int(offender)
+            aggregate['repeated'].update(repeated)
+
+        if offender:
+            most_repeated = max(repeated.items(), key=lambda item: item[1], default=None)
+
+            current_app.logger.warning(f'{endpoint} ran {profile["queries"]} queries in '
+                                       f'{profile["time"] * 1000:.2f}ms, most repeated: {most_repeated}')
+
+    def stats(self, limit=5):
+        ''' Get the SQL queries statistics per endpoint.
+
+        Parameters
+        ----------
+            limit: int
+                number of the most repeated statements to list per endpoint.
+
+        Returns
+        -------
+            Dict of endpoints requests, queries, sql time in seconds, offenders and most repeated
+            statements.
+        '''
+        with self.lock:
+            return {endpoint: dict(requests=aggregate['requests'],
+                                   queries=aggregate['queries'],
+                                   average_queries=round(aggregate['queries'] / aggregate['requests'], 2),
+                                   max_queries=aggregate['max_queries'],
+                                   time=round(aggregate['time'], 4),
+                                   average_time=round(aggregate['time'] / aggregate['requests'], 4),
+                                   offenders=aggregate['offenders'],
+                                   repeated=[dict(statement=statement, count=count)
+                                             for statement, count in aggregate['repeated'].most_common(limit)])
+                    for endpoint, aggregate in self.endpoints.items()}
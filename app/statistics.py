@@ -0,0 +1,240 @@
+''' Streaming statistics of the queue, to estimate the waiting time without scanning the tickets.
+
+Running aggregates are kept overall, per office and per task, and updated in constant time as
+tickets are issued and pulled: moving averages of the service time and of the interval between
+arrivals, and a histogram of the waiting durations to get the percentiles from. Statistics are
+kept per process and start over with it, so estimates are available after the first pulls.
+
+The counts of waiting tickets are kept the same way, loaded once from the database and then
+updated with the issued and pulled tickets, so estimates don't count the waiting tickets.
+'''
+from bisect import bisect_left
+from threading import Lock
+from collections import Counter
+
+from app.constants import (STATISTICS_SMOOTHING, STATISTICS_MAX_INTERVAL, STATISTICS_WAIT_BUCKETS,
+                           STATISTICS_PERCENTILES)
+
+
+def get_moving_average(average, value, smoothing=STATISTICS_SMOOTHING):
+    ''' Get the exponentially weighted moving average, updated with a new value. '''
+    return value if average is None else average + smoothing * (value - average)
+
+
+class RunningStatistics:
+    ''' Running aggregates of a queue, overall or an office's or a task's. '''
+    def __init__(self, smoothing=STATISTICS_SMOOTHING, max_interval=STATISTICS_MAX_INTERVAL,
+                 buckets=STATISTICS_WAIT_BUCKETS):
+        self.smoothing = smoothing
+        self.max_interval = max_interval
+        self.buckets = sorted(buckets)
+        # NOTE: the last count is of the waits longer than the last bucket
+        self.waits = [0] * (len(self.buckets) + 1)
+        self.service_time = None
+        self.arrival_interval = None
+        self.last_arrival = None
+        self.last_pull = None
+
+    def is_observable(self, interval):
+        return 0 <= interval <= self.max_interval
+
+    def arrive(self, issued):
+        ''' Update the statistics with a ticket issued at the given date and time. '''
+        if self.last_arrival is not None:
+            interval = (issued - self.last_arrival).total_seconds()
+
+            if self.is_observable(interval):
+                self.arrival_interval = get_moving_average(self.arrival_interval, interval,
+                                                           self.smoothing)
+
+        self.last_arrival = max(issued, self.last_arrival or issued)
+
+    def serve(self, issued, pulled):
+        ''' Update the statistics with a ticket issued and pulled at the given dates and times. '''
+        if self.last_pull is not None:
+            # NOTE: serving starts with the previous pull, or with the ticket's arrival if the
+            # queue was empty, not to count the idle operators in.
+            service_time = (pulled - max(issued, self.last_pull)).total_seconds()
+
+            if self.is_observable(service_time):
+                self.service_time = get_moving_average(self.service_time, service_time,
+                                                       self.smoothing)
+
+        wait = max((pulled - issued).total_seconds(), 0) / 60
+        self.waits[bisect_left(self.buckets, wait)] += 1
+        self.last_pull = max(pulled, self.last_pull or pulled)
+
+    @property
+    def arrival_rate(self):
+        ''' Tickets issued per minute, None if not observed yet. '''
+        return 60 / self.arrival_interval if self.arrival_interval else None
+
+    def get_percentile(self, percentile):
+        ''' Get the waiting duration percentile in minutes, as the upper bound of its bucket.
+
+        Parameters
+        ----------
+            percentile: int
+                percentile to get, from 0 to 100.
+
+        Returns
+        -------
+            Waiting duration in minutes, None if no tickets were pulled yet or if the percentile
+            is past the last bucket, being only known to be longer than it.
+        '''
+        total = sum(self.waits)
+        count = 0
+
+        if not total:
+            return None
+
+        for bucket, bucket_count in zip(self.buckets, self.waits):
+            count += bucket_count
+
+            if count * 100 >= percentile * total:
+                return bucket
+
+        return None
+
+    def estimate_wait(self, tickets_ahead):
+        ''' Get the estimated waiting time in minutes, None if no tickets were served yet. '''
+        if self.service_time is None:
+            return None
+
+        return round(self.service_time * tickets_ahead / 60)
+
+
+class QueueStatistics:
+    ''' In-process registry of the queue running statistics.
+
+        NOTE: same as `QueueEvents`, tickets issued and pulled by other processes (multiple
+        `gunicorn` workers) will not be picked up.
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.offices = {}
+        self.tasks = {}
+        # NOTE: counts of waiting tickets keyed with `(office_id, task_id)`, None if unknown
+        self.waiting = None
+        self.waiting_generation = 0
+
+    def record(self, *observations):
+        ''' Update the statistics and the waiting counts with the issued and pulled tickets.
+
+        Parameters
+        ----------
+            observations: list
+                tuples of `(office_id, task_id, issued, pulled, waiting_office_id)`, `pulled`
+                is None for the issued tickets. `waiting_office_id` is the id of the office the
+                ticket joined or left the waiting queue of, None if it didn't.
+        '''
+        with self.lock:
+            for office_id, task_id, issued, pulled, waiting_office_id in observations:
+                for statistics in (self.offices.setdefault(None, RunningStatistics()),
+                                   self.offices.setdefault(office_id, RunningStatistics()),
+                                   self.tasks.setdefault(task_id, RunningStatistics())):
+                    if pulled is None:
+                        statistics.arrive(issued)
+                    else:
+                        statistics.serve(issued, pulled)
+
+                if waiting_office_id is not None and self.waiting is not None:
+                    self.waiting[(waiting_office_id, task_id)] += 1 if pulled is None else -1
+
+            self.waiting_generation += 1
+
+    def reset_waiting(self):
+        ''' Mark the waiting counts unknown, to be loaded again. '''
+        with self.lock:
+            self.waiting = None
+            self.waiting_generation += 1
+
+    def get_waiting(self, load, office_id=None, task_id=None):
+        ''' Get the count of waiting tickets, overall or of an office, a task or both.
+
+        Parameters
+        ----------
+            load: callable
+                to load the waiting counts from the database if unknown, returns tuples of
+                `(office_id, task_id, count)`.
+            office_id: int
+                id of the office to count the waiting tickets of.
+            task_id: int
+                id of the task to count the waiting tickets of.
+
+        Returns
+        -------
+            Count of waiting tickets.
+        '''
+        def count_waiting(waiting):
+            return sum(count for (o, t), count in waiting.items()
+                       if (not office_id or o == office_id) and (not task_id or t == task_id))
+
+        with self.lock:
+            if self.waiting is not None:
+                return count_waiting(self.waiting)
+
+            generation = self.waiting_generation
+
+        waiting = Counter({(o, t): count for o, t, count in load()})
+
+        with self.lock:
+            # NOTE: counts loaded while tickets were issued or pulled are only used once
+            if generation == self.waiting_generation:
+                self.waiting = waiting
+
+        return count_waiting(waiting)
+
+    def get_statistics(self, office_id=None, task_id=None):
+        ''' Get the running statistics of a task, an office or overall. '''
+        statistics = self.tasks.get(task_id) if task_id else self.offices.get(office_id)
+
+        return statistics or RunningStatistics()
+
+    def estimate_wait(self, tickets_ahead, office_id=None, task_id=None):
+        ''' Get the estimated waiting time of a ticket.
+
+        Parameters
+        ----------
+            tickets_ahead: int
+                number of tickets waiting ahead of the ticket.
+            office_id: int
+                id of the office to estimate with its statistics.
+            task_id: int
+                id of the task to estimate with its statistics, instead of the office's.
+
+        Returns
+        -------
+            Estimated waiting time in minutes, None if no tickets were served yet.
+        '''
+        with self.lock:
+            return self.get_statistics(office_id, task_id).estimate_wait(tickets_ahead)
+
+    def stats(self, office_id=None, task_id=None):
+        ''' Get the running statistics of a task, an office or overall.
+
+        Returns
+        -------
+            Dict of the service time in seconds, arrival rate per minute and waiting durations
+            percentiles in minutes.
+        '''
+        with self.lock:
+            statistics = self.get_statistics(office_id, task_id)
+            arrival_rate = statistics.arrival_rate
+            service_time = statistics.service_time
+
+            return dict(service_time=service_time and round(service_time, 2),
+                        arrival_rate=arrival_rate and round(arrival_rate, 2),
+                        served=sum(statistics.waits),
+                        **{f'wait_p{percentile}': statistics.get_percentile(percentile)
+                           for percentile in STATISTICS_PERCENTILES})
+
+    def clear(self):
+        with self.lock:
+            self.offices.clear()
+            self.tasks.clear()
+            self.waiting = None
+            self.waiting_generation += 1
+
+
+queue_statistics = QueueStatistics()
@@ -1,10 +1,11 @@
 from app.utils import find
 from app.tasks.cache_tickets_tts import CacheTicketsAnnouncements
 from app.tasks.delete_tickets import DeleteTickets
+from app.tasks.print_tickets import PrintTickets
 
 
 THREADS = {}
-TASKS = [CacheTicketsAnnouncements, DeleteTickets]
+TASKS = [CacheTicketsAnnouncements, DeleteTickets, PrintTickets]
 
 
 def start_tasks(app=None, tasks=TASKS):
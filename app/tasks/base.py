@@ -1,9 +1,10 @@
 import schedule
-from time import sleep
+from time import sleep, perf_counter
 from importlib import import_module
 from threading import Thread
 
 from app.database import BackgroundTask
+from app.metrics import background_tasks_duration
 
 
 class TaskBase:
@@ -51,10 +52,14 @@ class TaskBase:
 
             def _doer():
                 self.spinned = False
+                started = perf_counter()
 
                 with self.app.app_context():
                     todo(*args, **kwargs)
 
+                background_tasks_duration.observe(perf_counter() - started,
+                                                  task=self.__class__.__name__)
+
                 self.spinned = True
                 self.spinned_once = True
 
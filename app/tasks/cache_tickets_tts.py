@@ -1,15 +1,16 @@
-from sqlalchemy.sql import not_
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
 
 from app.tasks.base import TaskBase
-from app.database import Serial, Display_store, Aliases, Settings
-from app.middleware import gTTs
+from app.database import Serial, Display_store, detached_records
 from app.utils import log_error
-from app.helpers import get_tts_safely
+from app.announcements import say, is_cached, pin, get_ticket_fragments, get_fragments_library
+from app.constants import TTS_CACHE_WORKERS, TTS_CACHE_TIMEOUT
 
 
 class CacheTicketsAnnouncements(TaskBase):
-    def __init__(self, app, interval=5, limit=30):
-        ''' Task to cache tickets text-to-speech announcement audio files.
+    def __init__(self, app, interval=5, limit=30, workers=TTS_CACHE_WORKERS,
+                 timeout=TTS_CACHE_TIMEOUT):
+        ''' Task to cache tickets text-to-speech announcements fragments audio files.
 
         Parameters
         ----------
@@ -17,47 +18,91 @@ class CacheTicketsAnnouncements(TaskBase):
             interval: int
                 duration of sleep between iterations in seconds
             limit: int
-                limit of tickets to processes each iteration.
+                limit of fragments to synthesize each iteration.
+            workers: int
+                count of fragments to synthesize concurrently.
+            timeout: int
+                duration to wait for each iteration's fragments in seconds.
         '''
         super().__init__(app)
         self.app = app
         self.interval = interval
         self.limit = limit
-        self.cached = []
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.library = {}
+        self.library_key = None
 
-    def format_announcement_text(self, ticket, aliases, language, show_prefix):
-        ''' Helper to format text-to-speech text.
+    def get_library(self, engines):
+        ''' Get the library fragments left to synthesize. The library is only rebuilt once the
+            records it's made of or the announced languages change.
 
         Parameters
         ----------
-            ticket: Serial record
-            aliases: Aliases record
-            language: str
-                language of text-to-speech to produce
-            show_prefix: bool
-                include the office prefix in the announcement
+            engines: dict
+                text-to-speech engines keyed with the announced languages.
 
         Returns
         -------
-            String of formated text-to-speech text ready to use.
+            Dict keyed with the library's (language, fragment, engine) tuples left.
         '''
-        with self.app.app_context():
-            single_row_queuing = Settings.get().single_row
-            office_text = ''
-            tts_text = ''
+        library_key = (detached_records.generation, tuple(engines.items()))
 
-            if not single_row_queuing:
-                office = ticket.office
-                prefix = office.prefix if show_prefix else ''
-                office_text = f'{prefix}{getattr(office, "name", "")}'
-                tts_text = get_tts_safely().get(language, {})\
-                                           .get('message')
+        if library_key != self.library_key:
+            self.library_key = library_key
+            self.library = dict.fromkeys((language, fragment, engine)
+                                         for language, engine in engines.items()
+                                         for fragment in get_fragments_library(language))
 
-                if language.startswith('en'):
-                    tts_text = tts_text.format(aliases.office)
+        return self.library
 
-            return ticket.display_text if single_row_queuing\
-                else f'{ticket.display_text}{tts_text}{office_text}'
+    def get_fragments(self, display_settings):
+        ''' Get the fragments to synthesize, the waiting tickets' first and then the library's.
+
+        Parameters
+        ----------
+            display_settings: Display_store record
+                settings of the announced languages and their engines.
+
+        Returns
+        -------
+            List of unique (language, fragment, engine) tuples.
+        '''
+        engines = {language: display_settings.get_tts_engine(language)
+                   for language in display_settings.announce.split(',')}
+        waiting_tickets = Serial.query.filter(Serial.p == False)\
+                                      .order_by(Serial.timestamp)\
+                                      .limit(self.limit)\
+                                      .all()
+        fragments = [(language, fragment, engine)
+                     for ticket in waiting_tickets
+                     for language, engine in engines.items()
+                     for fragment in get_ticket_fragments(ticket, language)]
+        fragments += list(self.get_library(engines))
+
+        return list(dict.fromkeys(fragments))
+
+    def get_pending(self, fragments):
+        ''' Get the fragments not cached yet, up to the limit. Library fragments found cached are
+            left out of the library from then on, being pinned in the cache.
+        '''
+        pending = []
+
+        for fragment in fragments:
+            if len(pending) >= self.limit:
+                break
+
+            if not is_cached(*fragment):
+                pending.append(fragment)
+            elif fragment in self.library:
+                pin(*fragment)
+                self.library.pop(fragment)
+
+        return pending
+
+    def stop(self):
+        super().stop()
+        self.pool.shutdown(wait=False)
 
     def run(self):
         @self.execution_loop()
@@ -65,40 +110,24 @@ class CacheTicketsAnnouncements(TaskBase):
             display_settings = Display_store.get()
 
             if display_settings.announce != 'false':
-                aliases = Aliases.get()
-                languages = display_settings.announce.split(',')
-                tickets_to_remove = Serial.query.filter(Serial.p == True,
-                                                        Serial.number.in_(self.cached))
-                tickets_to_cache = Serial.query.filter(Serial.p == False,
-                                                       Serial.number != 100,
-                                                       not_(Serial.number.in_(self.cached)))\
-                                               .order_by(Serial.timestamp)\
-                                               .limit(self.limit)
-
-                @self.none_blocking_loop(tickets_to_cache)
-                def cache_tickets(ticket):
-                    successes = []
-
-                    @self.none_blocking_loop(languages)
-                    def loop_languages(language):
-                        try:
-                            gTTs.say(language,
-                                     self.format_announcement_text(ticket,
-                                                                   aliases,
-                                                                   language,
-                                                                   display_settings.prefix))
-                            successes.append(language)
-                        except Exception as exception:
-                            log_error(exception, quiet=self.quiet)
-                            self.log(exception, error=True)
-
-                    if successes:
-                        self.cached.append(ticket.number)
-                        self.log(f'Cached TTS {ticket.number}')
-
-                @self.none_blocking_loop(tickets_to_remove)
-                def remove_processed_tickets_from_cache(ticket):
-                    self.cached.remove(ticket.number)
-
-            # NOTE: cache stack is adhereing to the limit to avoid overflow
-            self.cached = self.cached[:self.limit]
+                # NOTE: evicted tickets fragments are synthesized again, once their turn comes
+                pending = self.get_pending(self.get_fragments(display_settings))
+                jobs = {self.pool.submit(say, *fragment): fragment for fragment in pending}
+
+                try:
+                    for job in as_completed(jobs, timeout=self.timeout):
+                        language, fragment, engine = jobs[job]
+
+                        if job.exception():
+                            log_error(job.exception(), quiet=self.quiet)
+                            self.log(job.exception(), error=True)
+                        elif not job.result():
+                            self.log(f'Failed TTS {engine} {language} {fragment}')
+                        else:
+                            self.log(f'Cached TTS {engine} {language} {fragment}')
+                except TimeoutError as exception:
+                    # NOTE: jobs left are retried next iteration, unless already started
+                    for job in jobs:
+                        job.cancel()
+
+                    self.log(exception, error=True)
@@ -1,5 +1,5 @@
 from app.tasks.base import TaskBase
-from app.database import Serial
+from app.database import Serial, PrintJob
 from app.middleware import db
 
 
@@ -20,9 +20,11 @@ class DeleteTickets(TaskBase):
     def run(self):
         @self.execution_loop()
         def main():
-            tickets = Serial.query.filter(Serial.number != 100)
+            tickets = Serial.query
 
             if tickets.count():
                 tickets.delete()
                 db.session.commit()
+                # NOTE: pending print jobs are kept, to still print the deleted tickets
+                PrintJob.purge(age=0)
                 self.log('DeleteTickets(Task): All tickets deleted.')
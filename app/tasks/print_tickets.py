@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from app.tasks.base import TaskBase
+from app.database import PrintJob
+from app.metrics import print_jobs_latency, print_jobs_failures
+from app.utils import log_error
+
+
+class PrintTickets(TaskBase):
+    def __init__(self, app, interval=1, limit=10):
+        ''' Task to print the queued tickets print jobs.
+
+        Parameters
+        ----------
+            app: Flask app
+            interval: int
+                duration of sleep between iterations in seconds
+            limit: int
+                limit of print jobs to processes each iteration.
+        '''
+        super().__init__(app)
+        self.app = app
+        self.interval = interval
+        self.limit = limit
+        self.purged = None
+
+    def run(self):
+        @self.execution_loop()
+        def main():
+            @self.none_blocking_loop(PrintJob.get_due(self.limit).all())
+            def print_jobs(job):
+                exception = job.attempt()
+
+                if exception:
+                    print_jobs_failures.inc()
+                    log_error(exception, quiet=self.quiet)
+                    self.log(f'Failed printing {job.ticket}, attempt {job.attempts}', error=True)
+                else:
+                    print_jobs_latency.observe((datetime.utcnow() - job.timestamp).total_seconds())
+                    self.log(f'Printed {job.ticket}')
+
+            # NOTE: printed and failed jobs past their retention are purged once every hour
+            if not self.purged or datetime.utcnow() - self.purged >= timedelta(hours=1):
+                PrintJob.purge()
+                self.purged = datetime.utcnow()
@@ -0,0 +1,142 @@
+import os
+import json
+import pickle
+import click
+from tempfile import mkstemp
+from threading import Lock
+
+from app.utils import absolute_path
+from app.constants import SUPPORTED_LANGUAGES, TRANSLATIONS_SOURCE_FILE, TRANSLATIONS_CATALOG_FILE
+
+
+class TranslationsCatalog:
+    ''' Translations compiled ahead from `gt_cached.json`, to look up in-process without the
+        translator's disk or network access.
+    '''
+    def __init__(self, source=TRANSLATIONS_SOURCE_FILE, catalog=TRANSLATIONS_CATALOG_FILE):
+        self.source_path = source if os.path.isabs(source) else absolute_path(source)
+        self.catalog_path = catalog if os.path.isabs(catalog) else absolute_path(catalog)
+        self.lock = Lock()
+        self.languages = None
+
+    def compile(self):
+        ''' Compile the translations source into the binary catalog. If the catalog can't be
+            written, the compiled translations are still returned to keep in memory.
+
+        Returns
+        -------
+            Dict of translations keyed with the text, keyed with the language.
+        '''
+        with open(self.source_path, 'r', encoding='utf-8') as source:
+            translations = json.load(source)
+
+        languages = {language: {text: translated[language]
+                                for text, translated in translations.items()
+                                if translated.get(language)}
+                     for language in SUPPORTED_LANGUAGES}
+
+        # NOTE: written aside then moved in place, so concurrent loads never read it half-written
+        temporary_path = None
+
+        try:
+            descriptor, temporary_path = mkstemp(dir=os.path.dirname(self.catalog_path),
+                                                 suffix='.tmp')
+
+            with os.fdopen(descriptor, 'wb') as catalog:
+                pickle.dump(languages, catalog, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temporary_path, self.catalog_path)
+        except OSError:
+            temporary_path and os.path.isfile(temporary_path) and os.remove(temporary_path)
+
+        return languages
+
+    def load(self):
+        ''' Load the catalog, compiling it first if it's missing or older than its source.
+
+        Returns
+        -------
+            Dict of translations keyed with the text, keyed with the language.
+        '''
+        with self.lock:
+            missing = not os.path.isfile(self.catalog_path)
+            stale = not missing and os.path.isfile(self.source_path) and (
+                os.path.getmtime(self.catalog_path) < os.path.getmtime(self.source_path))
+
+            if not missing and not stale:
+                with open(self.catalog_path, 'rb') as catalog:
+                    self.languages = pickle.load(catalog)
+            else:
+                self.languages = self.compile()
+
+        return self.languages
+
+    def translate(self, text, src='en', dest=['en']):
+        ''' Translate text from the catalog, same as `gtranslator.translate`. Texts missing
+            from the catalog are returned as is.
+
+        Parameters
+        ----------
+            text: str
+                text to translate.
+            src: str
+                language of the text, only English is supported.
+            dest: list
+                languages to translate to.
+
+        Returns
+        -------
+            String of the translated text, or list of them if multiple languages passed.
+        '''
+        languages = self.languages if self.languages is not None else self.load()
+        translated = [languages.get(language, {}).get(text, text) for language in dest]
+
+        return translated[0] if len(translated) == 1 else translated
+
+
+translations = TranslationsCatalog()
+
+
+@click.group()
+def cli():
+    ''' FQM translations catalog tools. '''
+
+
+@cli.command('compile')
+def compile_catalog():
+    ''' Compile the translations source into the catalog. '''
+    languages = translations.compile()
+
+    click.echo(f'Compiled {len(languages.get("en", {}))} texts, '
+               f'into {translations.catalog_path}')
+
+
+@cli.command()
+@click.option('--text', multiple=True, help='New text to add to the translations source.')
+def fill(text):
+    ''' Fill the missing translations with Google Translate, then compile the catalog. '''
+    from googletrans import Translator
+
+    translator = Translator()
+
+    with open(translations.source_path, 'r', encoding='utf-8') as source:
+        source_translations = json.load(source)
+
+    for new_text in text:
+        source_translations.setdefault(new_text, {})
+
+    for source_text, translated in source_translations.items():
+        for language in SUPPORTED_LANGUAGES:
+            if source_text and not translated.get(language):
+                translated[language] = source_text if language == 'en' else\
+                    translator.translate(source_text, src='en', dest=language).text
+
+    with open(translations.source_path, 'w', encoding='utf-8') as source:
+        json.dump(source_translations, source, indent=4, sort_keys=True)
+
+    translations.compile()
+    click.echo(f'Filled and compiled {len(source_translations)} texts.')
+
+
+if __name__ == '__main__':
+    cli()
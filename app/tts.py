@@ -0,0 +1,219 @@
+import os
+from time import time
+from uuid import uuid4
+from subprocess import run, DEVNULL, PIPE
+from threading import Lock, BoundedSemaphore
+from collections import OrderedDict, namedtuple
+from flask_gtts import gtts
+from gtts import gTTS
+
+from app.constants import (TTS_CACHE_MAX_SIZE, TTS_CACHE_MAX_AGE, TTS_DEFAULT_ENGINE,
+                           TTS_LOCAL_WORKERS, TTS_LOCAL_TIMEOUT)
+
+
+# NOTE: pinned files are shared fragments synthesized ahead, kept regardless of their age
+CachedFile = namedtuple('CachedFile', ['path', 'size', 'accessed', 'pinned'], defaults=[False])
+
+
+class TTSEngine:
+    ''' Base of the text-to-speech engines, to synthesize text into an audio file. '''
+    name = None
+    extension = 'mp3'
+
+    def synthesize(self, lang, text, file_path):
+        ''' Synthesize text into an audio file.
+
+        Parameters
+        ----------
+            lang: str
+                language of the text.
+            text: str
+                text to synthesize.
+            file_path: str
+                path of the audio file to store.
+        '''
+        raise NotImplementedError
+
+
+class GoogleEngine(TTSEngine):
+    ''' Google text-to-speech, online through `gTTS`. '''
+    name = 'gtts'
+
+    def synthesize(self, lang, text, file_path):
+        generator = gTTS(text=text) if lang == 'skip' else gTTS(lang=lang, text=text)
+
+        generator.save(file_path)
+
+
+class EspeakEngine(TTSEngine):
+    ''' `espeak-ng` text-to-speech, offline in a bounded pool of subprocesses. '''
+    name = 'espeak'
+    extension = 'wav'
+
+    def __init__(self, command='espeak-ng', workers=TTS_LOCAL_WORKERS, timeout=TTS_LOCAL_TIMEOUT):
+        self.command = command
+        self.workers = BoundedSemaphore(workers)
+        self.timeout = timeout
+
+    def synthesize(self, lang, text, file_path):
+        with self.workers:
+            process = run([self.command, '-v', lang, '-w', file_path, '--stdin'],
+                          input=text.encode('utf-8'), stdout=DEVNULL, stderr=PIPE,
+                          timeout=self.timeout)
+
+        if process.returncode:
+            error = process.stderr.decode('utf-8', 'ignore').strip()
+
+            raise RuntimeError(error or f'{self.command} failed with {process.returncode}')
+
+
+class AnnouncementsCache(gtts):
+    ''' `flask_gtts` extension, with its audio files index kept within a size and age budget,
+        by evicting the least recently used files first.
+    '''
+    def __init__(self, max_size=TTS_CACHE_MAX_SIZE, max_age=TTS_CACHE_MAX_AGE, engines=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.engines = {engine.name: engine
+                        for engine in engines or [GoogleEngine(), EspeakEngine()]}
+        self.max_size = max_size
+        self.max_age = max_age
+        self.index = OrderedDict()
+        self.size = 0
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # NOTE: bumped whenever files are removed, so urls handed out before can be told stale
+        self.generation = 0
+
+    def init_app(self, app):
+        self.max_size = app.config.get('TTS_CACHE_MAX_SIZE', self.max_size)
+        self.max_age = app.config.get('TTS_CACHE_MAX_AGE', self.max_age)
+        super().init_app(app)
+
+    def teardown(self):
+        with self.lock:
+            self.index.clear()
+            self.size = 0
+            self.generation += 1
+
+        super().teardown()
+
+    def get_engine(self, engine):
+        ''' Get a text-to-speech engine by its name, falling back to the default engine. '''
+        return self.engines.get(engine) or self.engines[TTS_DEFAULT_ENGINE]
+
+    def get_url(self, file_path):
+        ''' Get the audio file relative url, without `url_for` which needs a request context. '''
+        relative_dir = os.path.basename(self.tempdir)
+
+        return f'{self.app.static_url_path}/{relative_dir}/{os.path.basename(file_path)}'
+
+    def remove(self, key):
+        ''' Remove a cached file from the index and the disk, must be called with the lock held. '''
+        cached_file = self.index.pop(key)
+        self.size -= cached_file.size
+        self.generation += 1
+
+        try:
+            os.path.isfile(cached_file.path) and os.remove(cached_file.path)
+        except Exception as e:
+            self._handle_exception(e)
+
+    def evict(self):
+        ''' Evict the least recently used files, until the cache is within its budget. Pinned
+            files are only evicted if the cache is over its size budget.
+        '''
+        expiry = time() - self.max_age
+
+        with self.lock:
+            for key, cached_file in list(self.index.items()):
+                if self.size <= self.max_size:
+                    if cached_file.pinned:
+                        continue
+
+                    if cached_file.accessed >= expiry:
+                        break
+
+                self.remove(key)
+                self.evictions += 1
+
+    def is_cached(self, lang, text, engine=TTS_DEFAULT_ENGINE):
+        with self.lock:
+            return (text, lang, self.get_engine(engine).name) in self.index
+
+    def pin(self, lang, text, engine=TTS_DEFAULT_ENGINE):
+        ''' Pin a cached file, to keep it regardless of its age. '''
+        key = (text, lang, self.get_engine(engine).name)
+
+        with self.lock:
+            if key in self.index:
+                self.index[key] = self.index[key]._replace(pinned=True)
+
+    def say(self, lang='en-us', text='Flask says Hi!', engine=TTS_DEFAULT_ENGINE):
+        ''' Get a TTS audio file from the cache, or synthesize and cache it.
+
+        Parameters
+        ----------
+            lang: str
+                language of the text.
+            text: str
+                text to convert into audio.
+            engine: str
+                name of the text-to-speech engine to synthesize with.
+
+        Returns
+        -------
+            String of the audio file relative url, empty if it failed.
+        '''
+        engine = self.get_engine(engine)
+        key = (text, lang, engine.name)
+
+        with self.lock:
+            cached_file = self.index.get(key)
+            hit = cached_file and os.path.isfile(cached_file.path)
+
+            if hit:
+                self.index[key] = cached_file._replace(accessed=time())
+                self.index.move_to_end(key)
+                self.hits += 1
+            else:
+                cached_file and self.remove(key)
+                self.misses += 1
+
+        if hit:
+            return self.get_url(cached_file.path)
+
+        file_path = os.path.join(self.tempdir, f'{uuid4().hex}.{engine.extension}')
+
+        try:
+            engine.synthesize(lang, text, file_path)
+        except Exception as e:
+            os.path.isfile(file_path) and os.remove(file_path)
+            return self._handle_exception(e)
+
+        with self.lock:
+            key in self.index and self.remove(key)
+            self.index[key] = CachedFile(file_path, os.path.getsize(file_path), time())
+            self.size += self.index[key].size
+
+        self.evict()
+        return self.get_url(file_path)
+
+    def stats(self):
+        ''' Get the cache usage statistics.
+
+        Returns
+        -------
+            Dict of the cache hits, misses, hit rate, evictions, files count and size in bytes.
+        '''
+        with self.lock:
+            requests = self.hits + self.misses
+
+            return dict(hits=self.hits,
+                        misses=self.misses,
+                        hit_rate=round(self.hits / requests, 4) if requests else 0,
+                        evictions=self.evictions,
+                        files=len(self.index),
+                        size=self.size)
@@ -1,21 +1,16 @@
 import os
 import sys
-from collections import namedtuple
 from uuid import uuid4
 from traceback import TracebackException
 from datetime import datetime
 from random import randint
 from socket import socket, AF_INET, SOCK_STREAM
 from netifaces import interfaces, ifaddresses
-from sqlalchemy.ext.automap import automap_base
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
 from flask import current_app, Flask
 
 import app.database as data
 from app.middleware import db
-from app.constants import (DEFAULT_PASSWORD, DEFAULT_USER, DATABASE_FILE,
-                           BACKGROUNDTASKS_DEFAULTS)
+from app.constants import DEFAULT_PASSWORD, DEFAULT_USER, BACKGROUNDTASKS_DEFAULTS
 
 
 def execute(command, parser=None, encoding='utf-8'):
@@ -129,9 +124,6 @@ def get_module_values(module, stringify=True):
     with current_app.app_context():
         query = getattr(module, 'query', [])
 
-        if query and module.__tablename__ == 'serials':
-            query = query.filter(module.number != 100)
-
         for record in query:
             values = [
                 getattr(record, getattr(column, 'name', None), None)
@@ -236,57 +228,28 @@ def get_random_available_port(ip):
     return available_port
 
 
-def create_aliternative_db(db_name=None):
-    ''' Utility to create an alternative database SQLAlchemy session.
-
-    Parameters
-    ----------
-        db_name: name of the database file.
+def get_with_alias():
+    ''' Resolve the printed tickets texts with aliases embodied, cached until the aliases change.
 
     Returns
     -------
-        session: SQLAlchemy Session
-        classes SQLAlchemy Base.classes
+        Dict of texts with aliases embodied.
     '''
-    session = None
-    classes = None
-
-    try:
-        db_path = absolute_path(db_name or DATABASE_FILE)
-        base = automap_base()
-        engine = create_engine(f'sqlite:///{db_path}?check_same_thread=False')
-
-        base.prepare(engine, reflect=True)
-
-        session = Session(engine)
-        classes = base.classes
-    except Exception as e:
-        log_error(e)
-
-    return session, classes, engine
-
+    labels = get_with_alias.__dict__.get('LABELS')
 
-def get_with_alias(db_name=None):
-    ''' Resolve querying aliases without app_context in languages.
+    if labels is None:
+        try:
+            alias = data.Aliases.get() or data.Aliases()
+        except Exception:
+            # NOTE: outside the app context, defaults are used and not cached
+            return get_aliases_labels(data.Aliases())
 
-    Parameters
-    ----------
-        db_name: name of the database file.
+        labels = get_with_alias.__dict__['LABELS'] = get_aliases_labels(alias)
 
-    Returns
-    -------
-        Dict of texts with aliases embodied.
-    '''
-    alias = namedtuple(
-        'alias', ['office', 'ticket', 'task']
-    )('office', 'ticket', 'task')
+    return labels
 
-    try:
-        session, db, eng = create_aliternative_db(db_name)
-        alias = session.query(db.aliases).first()
-    except Exception:
-        pass
 
+def get_aliases_labels(alias):
     return {
         'Version ': 'Version ',
         '\nOffice : ': '\n' + alias.office + ' : ',
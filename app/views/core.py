@@ -1,16 +1,25 @@
 import os
+import json
 from sys import platform
-from flask import url_for, flash, render_template, redirect, session, jsonify, Blueprint
+from http import HTTPStatus
+from flask import (url_for, flash, render_template, redirect, session, jsonify, Blueprint,
+                   Response, stream_with_context, current_app, request)
 from flask_login import current_user, login_required, login_user
+from werkzeug.http import quote_etag
 
 import app.database as data
 import app.settings as settings_handlers
-from app.middleware import db, gtranslator
+from app.middleware import db
+from app.translations import translations
+from app.announcements import get_announcement, get_announcement_etag
+from app.events import events, feeds_cache
+from app.metrics import metrics
+from app.constants import TICKETS_NUMBERING_SCOPES
 from app.utils import log_error, remove_string_noise
 from app.forms.core import LoginForm, TouchSubmitForm
 from app.helpers import (reject_no_offices, reject_operator, is_operator, reject_not_admin,
                          is_office_operator, is_common_task_operator, decode_links,
-                         reject_setting, get_or_reject)
+                         reject_setting, get_or_reject, conditional_on_queue)
 
 
 core = Blueprint('core', __name__)
@@ -135,7 +144,7 @@ def serial_r(office):
 @reject_setting('single_row', True)
 def serial_ra():
     ''' reset all offices by removing all tickets. '''
-    tickets = data.Serial.query.filter(data.Serial.number != 100)
+    tickets = data.Serial.query
 
     if not tickets.first():
         flash('Error: the office is already resetted', 'danger')
@@ -205,14 +214,13 @@ def pull(o_id=None, ofc_id=None):
                                   is_common_task_operator(task.id)):
             return operators_not_allowed()
 
-    next_ticket = data.Serial.get_next_ticket(task_id=o_id,
-                                              office_id=ofc_id)
+    next_ticket = data.Serial.claim_next(task_id=o_id,
+                                         office_id=office and office.id)
 
     if not next_ticket:
         flash('Error: no tickets left to pull from ..', 'danger')
         return general_redirection
 
-    next_ticket.pull(office and office.id or next_ticket.office_id)
     flash('Notice: Ticket has been pulled ..', 'info')
     return general_redirection
 
@@ -262,14 +270,22 @@ def on_hold(ticket, redirect_to):
     return redirect(redirect_to)
 
 
-@core.route('/feed', defaults={'office_id': None})
-@core.route('/feed/<int:office_id>')
-def feed(office_id=None):
-    ''' stream list of waiting tickets and current ticket. '''
+def get_feed_payload(office_id=None):
+    ''' get the display feed content of waiting tickets and current ticket.
+
+    Parameters
+    ----------
+        office_id: int
+            id of the office to filter the feed tickets by.
+
+    Returns
+    -------
+        Dict of the display feed content.
+    '''
     display_settings = data.Display_store.get()
     single_row = data.Settings.get().single_row
     current_ticket = data.Serial.get_last_pulled_ticket(office_id)
-    empty_text = gtranslator.translate('Empty', dest=[session.get('lang')])
+    empty_text = translations.translate('Empty', dest=[session.get('lang')])
     current_ticket_text = current_ticket and current_ticket.display_text or empty_text
     current_ticket_office_name = current_ticket and current_ticket.office.display_text or empty_text
     current_ticket_task_name = current_ticket and current_ticket.task.name or empty_text
@@ -304,10 +320,71 @@ def feed(office_id=None):
                                                          current_ticket.number
                                                          ) if current_ticket else empty_text
 
-    return jsonify(con=current_ticket_office_name,
-                   cot=current_ticket_text,
-                   cott=current_ticket_task_name,
-                   **tickets_parameters)
+    return dict(con=current_ticket_office_name,
+                cot=current_ticket_text,
+                cid=current_ticket and current_ticket.id,
+                cott=current_ticket_task_name,
+                ewt=data.Serial.get_estimated_wait(office_id),
+                **tickets_parameters)
+
+
+def get_cached_feed_payload(office_id=None):
+    ''' get the display feed content from memory, unless the office queue changed.
+
+    Parameters
+    ----------
+        office_id: int
+            id of the office to filter the feed tickets by.
+
+    Returns
+    -------
+        Dict of the display feed content.
+    '''
+    # NOTE: queue changes are tracked in-process, so caching is not reliable with multiple workers
+    if current_app.config.get('GUNICORN', False):
+        return get_feed_payload(office_id)
+
+    return feeds_cache.get((office_id, session.get('lang')),
+                           lambda: get_feed_payload(office_id),
+                           office_id)
+
+
+@core.route('/feed', defaults={'office_id': None})
+@core.route('/feed/<int:office_id>')
+@conditional_on_queue('office_id')
+def feed(office_id=None):
+    ''' stream list of waiting tickets and current ticket. '''
+    return jsonify(**get_cached_feed_payload(office_id))
+
+
+@core.route('/feed/stream', defaults={'office_id': None})
+@core.route('/feed/stream/<int:office_id>')
+def feed_stream(office_id=None):
+    ''' push the display feed with Server-Sent Events, whenever the queue changes. '''
+    def _stream():
+        last_payload = None
+
+        for changed, repeat in events.listen(office_id):
+            payload = json.dumps(get_cached_feed_payload(office_id)) if changed else last_payload
+
+            # NOTE: end the transaction to release the connection while idle,
+            # and to load fresh records on the next change
+            db.session.commit()
+
+            if payload != last_payload:
+                last_payload = payload
+                yield f'event: feed\ndata: {payload}\n\n'
+
+            if repeat:
+                yield 'event: repeat\ndata: {}\n\n'
+
+            if not changed and not repeat:
+                yield ': keep-alive\n\n'
+
+    return Response(stream_with_context(_stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
 
 
 @core.route('/set_repeat_announcement/<int:status>')
@@ -318,6 +395,9 @@ def set_repeat_announcement(status):
     display_settings.r_announcement = bool(status)
     db.session.commit()
 
+    if status:
+        events.notify_repeat()
+
     return jsonify(status=bool(status))
 
 
@@ -334,6 +414,34 @@ def repeat_announcement():
     return jsonify(status=status)
 
 
+@core.route('/announcement/<int:ticket_id>')
+def announcement(ticket_id):
+    ''' get the ticket TTS announcement audio files in all the announced languages, to play in order. '''
+    ticket = data.Serial.get(ticket_id)
+    announce = data.Display_store.get().announce
+
+    if not ticket:
+        return jsonify(mp3=[]), 404
+
+    languages = [] if announce == 'false' else announce.split(',')
+    headers = {'Cache-Control': 'no-cache'}
+
+    # NOTE: records and cache changes are tracked in-process, so not reliable with multiple workers
+    if not current_app.config.get('GUNICORN', False):
+        etag = get_announcement_etag(ticket, languages)
+        headers['ETag'] = quote_etag(etag)
+
+        if request.if_none_match.contains(etag):
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    files = [file for language in languages for file in get_announcement(ticket, language)]
+
+    if not all(files):
+        return jsonify(mp3=files), 500, {'Cache-Control': 'no-store'}
+
+    return jsonify(mp3=files), 200, headers
+
+
 @core.route('/display', defaults={'office_id': None})
 @core.route('/display/<int:office_id>')
 def display(office_id=None):
@@ -344,6 +452,9 @@ def display(office_id=None):
     aliases_settings = data.Aliases.query.first()
     video_settings = data.Vid.query.first()
     feed_url = url_for('core.feed', office_id=office_id)
+    # NOTE: queue changes are tracked in-process, so pushing is not reliable with multiple workers
+    stream_url = None if current_app.config.get('GUNICORN', False) else\
+        url_for('core.feed_stream', office_id=office_id)
 
     return render_template('display.html',
                            audio=1 if display_settings.audio == 'true' else 0,
@@ -352,7 +463,7 @@ def display(office_id=None):
                            slides=data.Slides.query, tv=display_settings.tmp,
                            page_title='Display Screen', anr=display_settings.anr,
                            alias=aliases_settings, vid=video_settings,
-                           feed_url=feed_url)
+                           feed_url=feed_url, stream_url=stream_url)
 
 
 @core.route('/touch/<int:a>', defaults={'office_id': None})
@@ -400,3 +511,30 @@ def settings(setting, togo=None):
           'info')
 
     return redirect(togo)
+
+
+@core.route('/numbering/<scope>', defaults={'togo': None})
+@core.route('/numbering/<scope>/<togo>')
+@login_required
+@reject_not_admin
+@decode_links
+def numbering(scope, togo=None):
+    ''' switch the tickets numbering scope. '''
+    togo = togo or '/'
+    settings = data.Settings.get()
+
+    if scope not in TICKETS_NUMBERING_SCOPES:
+        flash('Error: wrong entry, something went wrong', 'danger')
+        return redirect(togo)
+
+    settings.numbering = scope
+    db.session.commit()
+    flash('Notice: Tickets numbering got switched successfully.', 'info')
+
+    return redirect(togo)
+
+
+@core.route('/metrics')
+def metrics_endpoint():
+    ''' expose the runtime metrics in the Prometheus text format. '''
+    return metrics.response()
@@ -1,10 +1,10 @@
 import os
-from flask import url_for, flash, request, render_template, redirect, Blueprint
+from flask import url_for, flash, request, render_template, redirect, Blueprint, jsonify
 from flask_login import login_required
 from werkzeug import secure_filename
 
 import app.database as data
-from app.middleware import db, files
+from app.middleware import db, files, gTTs, profiler
 from app.forms.constents import EVERY_TIME_OPTIONS
 from app.forms.customize import (DisplayScreenForm, TouchScreenForm, TicketForm,
                                  AliasForm, VideoForm, MultimediaForm, SlideAddForm,
@@ -461,6 +461,7 @@ def displayscreen_c(stab):
 
         enabled_tts = [s for s in text_to_speech.keys() if form[f'check{s}'].data]
         touch_s.announce = ','.join(enabled_tts) if enabled_tts else 'false'
+        touch_s.tts_engines = ','.join(f'{s}:{form[f"engine{s}"].data}' for s in text_to_speech.keys())
 
         db.session.add(touch_s)
         db.session.commit()
@@ -512,6 +513,9 @@ def displayscreen_c(stab):
             if field:
                 field.data = short in touch_s.announce
 
+        for short in text_to_speech.keys():
+            form[f'engine{short}'].data = touch_s.get_tts_engine(short)
+
     return render_template('display_screen.html',
                            form=form,
                            page_title='Display Screen customize',
@@ -692,3 +696,19 @@ def background_tasks():
                            vtrue=data.Vid.get().enable,
                            strue=data.Slides_c.get().status,
                            time_options=','.join(EVERY_TIME_OPTIONS))
+
+
+@cust_app.route('/tts_cache')
+@login_required
+@reject_not_admin
+def tts_cache():
+    ''' view of the text-to-speech audio files cache statistics '''
+    return jsonify(gTTs.stats())
+
+
+@cust_app.route('/queries_profile')
+@login_required
+@reject_not_admin
+def queries_profile():
+    ''' view of the SQL queries statistics per endpoint, if `PROFILE_QUERIES` is enabled '''
+    return jsonify(profiler.stats())
@@ -27,7 +27,7 @@ def manage():
                            page_title='Management',
                            navbar='#snb1',
                            ooid=0,  # NOTE: filler to collapse specific office
-                           serial=data.Serial.all_clean(),
+                           serial=data.Serial.query,
                            offices=data.Office.query,
                            operators=data.Operators.query,
                            tasks=data.Task)
@@ -39,13 +39,10 @@ def manage():
 def all_offices():
     ''' lists all offices. '''
     page = request.args.get('page', 1, type=int)
-    tickets = data.Serial.query.filter(data.Serial.number != 100)\
-                               .order_by(data.Serial.p, data.Serial.timestamp.desc())
-    pagination = tickets.paginate(page, per_page=10, error_out=False)
+    tickets = data.Serial.query.order_by(data.Serial.p, data.Serial.timestamp.desc())
+    pagination = tickets.eager.paginate(page, per_page=10, error_out=False)
     last_ticket_pulled = tickets.filter_by(p=True).first()
-    last_ticket_office = last_ticket_pulled and data.Office.query\
-                                                    .filter_by(id=last_ticket_pulled.office_id)\
-                                                    .first()
+    last_ticket_office = last_ticket_pulled and last_ticket_pulled.office
     tickets_form = ProcessedTicketForm()
 
     return render_template('all_offices.html',
@@ -53,7 +50,7 @@ def all_offices():
                            pagination=pagination,
                            len=len,
                            page_title='All Offices',
-                           serial=data.Serial.all_clean(),
+                           serial=data.Serial.query,
                            offices=data.Office.query,
                            tasks=data.Task,
                            users=data.User.query,
@@ -80,7 +77,7 @@ def offices(office):
     page = request.args.get('page', 1, type=int)
     tickets = data.Serial.all_office_tickets(office.id)
     last_ticket_pulled = tickets.filter_by(p=True).first()
-    pagination = tickets.paginate(page, per_page=10, error_out=False)
+    pagination = tickets.eager.paginate(page, per_page=10, error_out=False)
     office_name = remove_string_noise(form.name.data or '',
                                       lambda s: s.startswith('0'),
                                       lambda s: s[1:]) or None
@@ -149,7 +146,7 @@ def office_a():
                            operators=data.Operators.query,
                            navbar='#snb1',
                            hash='#da3',
-                           serial=data.Serial.all_clean())
+                           serial=data.Serial.query)
 
 
 @manage_app.route('/office_d/<int:o_id>')
@@ -175,7 +172,7 @@ def office_d(office):
 @reject_setting('single_row', True)
 def office_da():
     ''' delete all offices and their belongings.'''
-    if data.Serial.query.filter(data.Serial.number != 100).count():
+    if data.Serial.query.count():
         flash('Error: you must reset it, before you delete it ', 'danger')
         return redirect(url_for('manage_app.all_offices'))
 
@@ -198,7 +195,7 @@ def search():
     base_template_arguments = dict(form=form, page_title='Tickets search', offices=data.Office.query,
                                    tasks=data.Task, users=data.User.query, len=len,
                                    operators=data.Operators.query, navbar='#snb1', hash='#da1',
-                                   serial=data.Serial.query.filter(data.Serial.number != 100))
+                                   serial=data.Serial.query)
 
     # NOTE: storing the first form submitted as an endpoint attr instead of a global variable
     if first_time:
@@ -218,8 +215,7 @@ def search():
             flash('Error: fault in search parameters', 'danger')
             return redirect(url_for('manage_app.search'))
 
-        tickets_found = data.Serial.query.filter(data.Serial.number != 100)\
-                                         .filter_by(**search_kwargs)
+        tickets_found = data.Serial.query.filter_by(**search_kwargs)
 
         if not tickets_found.first():
             flash('Notice: Sorry, no matching results were found ', 'info')
@@ -227,6 +223,7 @@ def search():
 
         page = request.args.get('page', 1, type=int)
         pagination = tickets_found.order_by(data.Serial.timestamp.desc())\
+                                  .eager\
                                   .paginate(page, per_page=10, error_out=False)
 
         return render_template('search_r.html', serials=tickets_found, pagination=pagination,
@@ -252,7 +249,7 @@ def task(task, ofc_id):
     page = request.args.get('page', 1, type=int)
     tickets = data.Serial.all_task_tickets(ofc_id, task.id)
     last_ticket_pulled = tickets.filter_by(p=True).first()
-    pagination = tickets.paginate(page, per_page=10, error_out=False)
+    pagination = tickets.eager.paginate(page, per_page=10, error_out=False)
 
     if form.validate_on_submit():
         if data.Task.query.filter_by(name=form.name.data).count() > 1:
@@ -331,7 +328,7 @@ def task_d(task, ofc_id):
 
     tickets = data.Serial.query.filter(data.Serial.task_id == task.id)
 
-    if tickets.filter(data.Serial.number != 100).count() > 0:
+    if tickets.count() > 0:
         flash('Error: you must reset it, before you delete it ', 'danger')
         return redirect(url_for('manage_app.task', o_id=task.id, ofc_id=ofc_id))
 
@@ -372,22 +369,12 @@ def common_task_a():
             if form['check%i' % office.id].data and office not in task.offices:
                 task.offices.append(office)
 
-        for office in task.offices:
-            initial_ticket = data.Serial.query\
-                                 .filter_by(office_id=office.id, number=100)\
-                                 .first()
-
-            if not initial_ticket:
-                db.session.add(data.Serial(office_id=office.id,
-                                           task_id=task.id,
-                                           p=True))
-
         db.session.commit()
         flash('Notice: a common task has been added.', 'info')
         return redirect(url_for('manage_app.all_offices'))
     return render_template('task_add.html', form=form,
                            offices=data.Office.query,
-                           serial=data.Serial.all_clean(),
+                           serial=data.Serial.query,
                            tasks=data.Task,
                            operators=data.Operators.query,
                            navbar='#snb1', common=True,
@@ -420,22 +407,11 @@ def task_a(office):
             task.offices.append(office)
             db.session.commit()
 
-        initial_ticket = data.Serial.query.filter_by(task_id=task.id,
-                                                     office_id=office.id,
-                                                     number=100)\
-                                          .first()
-
-        if not initial_ticket:
-            db.session.add(data.Serial(office_id=task.offices[0].id,
-                                       task_id=task.id,
-                                       p=True))
-            db.session.commit()
-
         flash('Notice: New task been added.', 'info')
         return redirect(url_for('manage_app.offices', o_id=office.id))
     return render_template('task_add.html', form=form,
                            offices=data.Office.query,
-                           serial=data.Serial.all_clean(),
+                           serial=data.Serial.query,
                            tasks=data.Task,
                            operators=data.Operators.query,
                            navbar='#snb1', common=False,
@@ -0,0 +1,28 @@
+""" Add `tts_engines` to display screen settings, to select the text-to-speech engine per language.
+
+Revision ID: 3e9d7c41a6b2
+Revises: 5b8e2f6a9c17
+Create Date: 2020-09-29 11:04:52.318940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9d7c41a6b2'
+down_revision = '5b8e2f6a9c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    try:
+        op.add_column('displays', sa.Column('tts_engines', sa.String(length=300), nullable=True))
+    except Exception:
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('displays') as batch:
+        batch.drop_column('tts_engines')
@@ -0,0 +1,37 @@
+"""Drop tickets placeholder rows and add `serials` queue indexes.
+
+Revision ID: 3f2c9b7d41a6
+Revises: cf6ed76ef146
+Create Date: 2020-09-20 14:32:08.117605
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2c9b7d41a6'
+down_revision = 'cf6ed76ef146'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_serials_p_on_hold_timestamp': ['p', 'on_hold', 'timestamp'],
+    'ix_serials_office_id_p_pdt': ['office_id', 'p', 'pdt'],
+    'ix_serials_task_id_office_id_p_timestamp': ['task_id', 'office_id', 'p', 'timestamp'],
+}
+
+
+def upgrade():
+    # NOTE: placeholder rows numbered `100` used to be added with every new task.
+    op.execute('DELETE FROM serials WHERE number = 100')
+
+    for name, columns in INDEXES.items():
+        try:
+            op.create_index(name, 'serials', columns)
+        except Exception:
+            pass
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='serials')
@@ -0,0 +1,46 @@
+"""Add `PrintJob` table to queue the tickets printing.
+
+Revision ID: 5b8e2f6a9c17
+Revises: a7d4e1c03b52
+Create Date: 2020-09-24 14:32:08.615203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f6a9c17'
+down_revision = 'a7d4e1c03b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    try:
+        op.create_table(
+            'print_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('ticket_id', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(length=10), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('error', sa.String(length=300), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.Column('next_attempt', sa.DateTime(), nullable=True),
+            sa.Column('ticket', sa.String(length=300), nullable=True),
+            sa.Column('office', sa.String(length=300), nullable=True),
+            sa.Column('tickets_ahead', sa.Integer(), nullable=True),
+            sa.Column('task', sa.String(length=300), nullable=True),
+            sa.Column('current_ticket', sa.String(length=300), nullable=True),
+            sa.PrimaryKeyConstraint('id'))
+        op.create_index('ix_print_jobs_ticket_id', 'print_jobs', ['ticket_id'])
+        op.create_index('ix_print_jobs_status_next_attempt', 'print_jobs',
+                        ['status', 'next_attempt'])
+    except Exception:
+        pass
+
+
+def downgrade():
+    op.drop_index('ix_print_jobs_status_next_attempt', table_name='print_jobs')
+    op.drop_index('ix_print_jobs_ticket_id', table_name='print_jobs')
+    op.drop_table('print_jobs')
@@ -0,0 +1,28 @@
+""" Add `estimated_wait` to print jobs, to print the ticket's estimated waiting time.
+
+Revision ID: 8c4f1d2e7a93
+Revises: 3e9d7c41a6b2
+Create Date: 2020-10-06 15:21:37.604812
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f1d2e7a93'
+down_revision = '3e9d7c41a6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    try:
+        op.add_column('print_jobs', sa.Column('estimated_wait', sa.Integer(), nullable=True))
+    except Exception:
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('print_jobs') as batch:
+        batch.drop_column('estimated_wait')
@@ -0,0 +1,45 @@
+"""Add `TicketsCounter` table and tickets numbering settings.
+
+Revision ID: a7d4e1c03b52
+Revises: 3f2c9b7d41a6
+Create Date: 2020-09-22 11:05:41.390274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e1c03b52'
+down_revision = '3f2c9b7d41a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    try:
+        op.create_table(
+            'tickets_counters',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('scope', sa.String(length=10), nullable=True),
+            sa.Column('scope_id', sa.Integer(), nullable=True),
+            sa.Column('number', sa.Integer(), nullable=True),
+            sa.Column('date', sa.Date(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('scope', 'scope_id'))
+    except Exception:
+        pass
+
+    try:
+        op.add_column('settings', sa.Column('numbering', sa.String(length=10), nullable=True))
+        op.add_column('settings', sa.Column('daily_numbering', sa.Boolean(), nullable=True))
+    except Exception:
+        pass
+
+
+def downgrade():
+    op.drop_table('tickets_counters')
+
+    with op.batch_alter_table('settings') as batch:
+        batch.drop_column('numbering')
+        batch.drop_column('daily_numbering')
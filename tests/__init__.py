@@ -8,9 +8,10 @@ from app.main import bundle_app
 from app.middleware import db
 from app.database import (User, Operators, Office, Task, Serial, Media, Touch_store,
                           Display_store, Vid, Slides_c, Slides, Aliases, Printer,
-                          Settings, AuthTokens)
+                          Settings, AuthTokens, PrintJob)
 from app.utils import absolute_path, is_iterable
 from app.tasks import stop_tasks
+from app.statistics import queue_statistics
 
 
 NAMES = ('Aaron Enlightened', 'Abbott Father', 'Abel Breath', 'Abner Father',
@@ -30,7 +31,7 @@ NAMES = ('Aaron Enlightened', 'Abbott Father', 'Abel Breath', 'Abner Father',
 TEST_PREFIX = 'Z'
 PREFIXES = [p for p in list(map(lambda i: chr(i).upper(), range(97, 123))) if p != TEST_PREFIX]
 
-MODULES = [Serial, User, Operators, Task, Office, Media, Slides, AuthTokens]
+MODULES = [Serial, User, Operators, Task, Office, Media, Slides, AuthTokens, PrintJob]
 DEFAULT_MODULES = [Touch_store, Display_store, Vid, Slides_c, Aliases, Printer, Settings]
 DB_NAME = 'testing.sqlite'
 DB_PATH = absolute_path(DB_NAME)
@@ -54,6 +55,7 @@ def c():
     app = bundle_app(app_config)
 
     stop_tasks()
+    queue_statistics.clear()
     with app.test_client() as client:
         with app.app_context():
             db.create_all()
@@ -138,8 +140,6 @@ def fill_tasks(entry_number=ENTRY_NUMBER):
         db.session.add(task)
         db.session.commit()
         task.offices = offices
-        # Add tasks initial tickets
-        db.session.add(Serial(number=100, office_id=office.id, task_id=task.id))
         db.session.commit()
 
 
@@ -181,12 +181,14 @@ def get_first_office_with_tickets(client):
         while offices:
             office = offices.pop()
 
-            if Serial.query.filter(Serial.number != 100,
-                                   Serial.office_id == office.id)\
-                           .first():
+            if Serial.query.filter_by(office_id=office.id).first():
                 return office
 
 
+def get_random_task_with_tickets():
+    return choice([task for task in Task.query.all() if task.tickets.first()])
+
+
 def do_until_truthy(todo, getter):
     value = getter()
 
@@ -0,0 +1,42 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.database import AuthTokens, Serial
+from app.statistics import queue_statistics
+
+
+BASE = '/api/v1/statistics'
+
+
+@pytest.mark.usefixtures('c')
+def test_get_statistics(c):
+    auth_token = AuthTokens.get()
+    ticket = Serial.query.filter_by(p=False).first()
+    office_id = ticket.office_id
+    waiting = Serial.query.filter_by(p=False, office_id=office_id).count()
+    now = datetime.utcnow()
+    queue_statistics.record((office_id, ticket.task_id, now, now + timedelta(minutes=1), None),
+                            (office_id, ticket.task_id, now, now + timedelta(minutes=4), None))
+
+    response = c.get(f'{BASE}?office_id={office_id}',
+                     follow_redirects=True,
+                     headers={'Authorization': auth_token.token})
+
+    assert response.status == '200 OK'
+    assert response.json['office_id'] == office_id
+    assert response.json['estimated_wait'] == waiting * 3
+    assert response.json['service_time'] == 180
+    assert response.json['served'] == 2
+    assert response.json['wait_p95'] == 5
+
+
+@pytest.mark.usefixtures('c')
+def test_get_statistics_not_served_yet(c):
+    auth_token = AuthTokens.get()
+    response = c.get(BASE,
+                     follow_redirects=True,
+                     headers={'Authorization': auth_token.token})
+
+    assert response.status == '200 OK'
+    assert response.json['estimated_wait'] is None
+    assert response.json['served'] == 0
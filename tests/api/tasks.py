@@ -2,7 +2,7 @@ import pytest
 
 from app.database import AuthTokens, Task
 from app.utils import get_module_columns
-from app.api.constants import LIMIT_PER_CHUNK
+from app.api.constants import LIMIT_PER_CHUNK, NEXT_CURSOR_HEADER_KEY
 
 
 BASE = '/api/v1/tasks'
@@ -18,6 +18,7 @@ def test_list_tickets(c):
     assert response.status == '200 OK'
     assert len(response.json) > 0
     assert LIMIT_PER_CHUNK > len(response.json)
+    assert NEXT_CURSOR_HEADER_KEY not in response.headers
 
     for t in response.json:
         assert Task.get(t.get('id')) is not None
@@ -1,8 +1,11 @@
 import pytest
 
-from app.database import Serial, AuthTokens, Task
+from .. import fill_tickets
+from app.database import Serial, AuthTokens, Task, Office, PrintJob, Touch_store
+from app.middleware import db
+from app.constants import PRINT_JOB_FAILED, PRINT_JOB_PENDING
 from app.utils import get_module_columns
-from app.api.constants import LIMIT_PER_CHUNK
+from app.api.constants import LIMIT_PER_CHUNK, NEXT_CURSOR_HEADER_KEY
 
 
 BASE = '/api/v1/tickets'
@@ -24,9 +27,67 @@ def test_list_tickets(c):
         assert all(p in t for p in get_module_columns(Serial)) is True
 
 
+@pytest.mark.usefixtures('c')
+def test_list_tickets_with_cursor(c):
+    fill_tickets(LIMIT_PER_CHUNK * 2)
+    auth_token = AuthTokens.get()
+    tickets_ids = []
+    cursor = ''
+
+    while cursor is not None:
+        response = c.get(f'{BASE}?cursor={cursor}',
+                         follow_redirects=True,
+                         headers={'Authorization': auth_token.token})
+        cursor = response.headers.get(NEXT_CURSOR_HEADER_KEY)
+
+        assert response.status == '200 OK'
+        assert LIMIT_PER_CHUNK >= len(response.json)
+        tickets_ids += [t.get('id') for t in response.json]
+
+    assert tickets_ids == [t.id for t in Serial.query.order_by(Serial.timestamp, Serial.id)]
+
+
+@pytest.mark.usefixtures('c')
+def test_list_tickets_invalid_cursor(c):
+    response = c.get(f'{BASE}?cursor=invalid',
+                     follow_redirects=True,
+                     headers={'Authorization': AuthTokens.get().token})
+
+    assert response.status == '400 BAD REQUEST'
+
+
+@pytest.mark.usefixtures('c')
+def test_list_tickets_not_modified(c):
+    auth_token = AuthTokens.get()
+    etag = c.get(BASE, follow_redirects=True,
+                 headers={'Authorization': auth_token.token}).headers.get('ETag')
+    response = c.get(BASE, follow_redirects=True,
+                     headers={'Authorization': auth_token.token, 'If-None-Match': etag})
+
+    assert etag is not None
+    assert response.status == '304 NOT MODIFIED'
+    assert response.data == b''
+
+    Serial.query.first().pull()
+    response = c.get(BASE, follow_redirects=True,
+                     headers={'Authorization': auth_token.token, 'If-None-Match': etag})
+
+    assert response.status == '200 OK'
+    assert len(response.json) > 0
+
+
+@pytest.mark.usefixtures('c')
+def test_list_tickets_not_modified_unauthorized(c):
+    etag = c.get(BASE, follow_redirects=True,
+                 headers={'Authorization': AuthTokens.get().token}).headers.get('ETag')
+    response = c.get(BASE, follow_redirects=True, headers={'If-None-Match': etag})
+
+    assert response.status == '401 UNAUTHORIZED'
+
+
 @pytest.mark.usefixtures('c')
 def test_get_ticket(c):
-    ticket = Serial.all_clean().first()
+    ticket = Serial.query.first()
     auth_token = AuthTokens.get()
     response = c.get(f'{BASE}/{ticket.id}',
                      follow_redirects=True,
@@ -39,7 +100,7 @@ def test_get_ticket(c):
 
 @pytest.mark.usefixtures('c')
 def test_update_ticket(c):
-    ticket = Serial.all_clean().first()
+    ticket = Serial.query.first()
     new_name = 'new testing name'
     auth_token = AuthTokens.get()
     response = c.put(f'{BASE}/{ticket.id}',
@@ -54,7 +115,7 @@ def test_update_ticket(c):
 
 @pytest.mark.usefixtures('c')
 def test_delete_ticket(c):
-    ticket = Serial.all_clean().first()
+    ticket = Serial.query.first()
     auth_token = AuthTokens.get()
     response = c.delete(f'{BASE}/{ticket.id}',
                         follow_redirects=True,
@@ -74,7 +135,7 @@ def test_delete_all_tickets(c):
 
     assert response.status == '204 NO CONTENT'
     assert response.data == b''
-    assert Serial.all_clean().count() == 0
+    assert Serial.query.count() == 0
 
 
 @pytest.mark.usefixtures('c')
@@ -99,6 +160,132 @@ def test_generate_ticket(c):
     assert all(p in response.json for p in get_module_columns(Serial)) is True
 
 
+@pytest.mark.usefixtures('c')
+def test_generate_printed_ticket_failed(c, monkeypatch):
+    monkeypatch.setattr(PrintJob, 'print', lambda job: Exception('USB device not found'))
+    touch_screen_settings = Touch_store.get()
+    touch_screen_settings.n = False
+    db.session.commit()
+    task = Task.get()
+    auth_token = AuthTokens.get()
+    response = c.post(f'{BASE}',
+                      follow_redirects=True,
+                      headers={'Authorization': auth_token.token},
+                      json={'task_id': task.id, 'office_id': task.offices[0].id})
+    ticket = Serial.get(response.json.get('ticket_id'))
+
+    assert response.status == '500 INTERNAL SERVER ERROR'
+    assert response.json.get('message') == 'USB device not found'
+    assert ticket.task_id == task.id
+    assert PrintJob.get(ticket_id=ticket.id).status == PRINT_JOB_FAILED
+
+    response = c.post(f'{BASE}/{ticket.id}/print',
+                      follow_redirects=True,
+                      headers={'Authorization': auth_token.token})
+
+    assert response.status == '200 OK'
+    assert response.json.get('status') == PRINT_JOB_PENDING
+
+
+@pytest.mark.usefixtures('c')
+def test_generate_tickets_in_bulk(c):
+    task = Task.get()
+    office = task.offices[0]
+    last_number = Serial.query.order_by(Serial.number.desc()).first().number
+    entries = [{'name': f'bulk testing name {i}', 'task_id': task.id, 'office_id': office.id}
+               for i in range(50)] + [{'name': 'bulk testing name', 'task_id': task.id}]
+    response = c.post(f'{BASE}/bulk',
+                      follow_redirects=True,
+                      headers={'Authorization': AuthTokens.get().token},
+                      json=entries)
+
+    assert response.status == '200 OK'
+    assert [t.get('name') for t in response.json] == [e['name'] for e in entries]
+    assert [t.get('number') for t in response.json] == [str(last_number + i + 1)
+                                                        for i in range(len(entries))]
+    assert [Serial.get(t.get('id')).task_id for t in response.json] == [task.id] * len(entries)
+    assert Serial.get(response.json[0].get('id')).office_id == office.id
+    assert response.json[-1].get('office_id') in [o.id for o in task.offices]
+
+
+@pytest.mark.usefixtures('c')
+def test_generate_tickets_in_bulk_task_not_found(c):
+    tickets_count = Serial.query.count()
+    response = c.post(f'{BASE}/bulk',
+                      follow_redirects=True,
+                      headers={'Authorization': AuthTokens.get().token},
+                      json=[{'name': 'bulk testing name', 'task_id': Task.get().id},
+                            {'name': 'bulk testing name', 'task_id': 0}])
+
+    assert response.status == '404 NOT FOUND'
+    assert Serial.query.count() == tickets_count
+
+
+@pytest.mark.usefixtures('c')
+def test_generate_tickets_in_bulk_rejected(c):
+    task = Task.get()
+    unlinked_office = Office.query.filter(~Office.id.in_([o.id for o in task.offices])).first()
+    task_without_offices = Task('bulk testing task')
+    db.session.add(task_without_offices)
+    db.session.commit()
+    tickets_count = Serial.query.count()
+
+    for entry, status in [({'task_id': task.id}, '400 BAD REQUEST'),
+                          ({'name': 'bulk testing name', 'task_id': task.id,
+                            'office_id': unlinked_office.id}, '400 BAD REQUEST'),
+                          ({'name': 'bulk testing name', 'task_id': task.id,
+                            'office_id': 0}, '404 NOT FOUND'),
+                          ({'name': 'bulk testing name', 'task_id': task_without_offices.id},
+                           '400 BAD REQUEST')]:
+        response = c.post(f'{BASE}/bulk',
+                          follow_redirects=True,
+                          headers={'Authorization': AuthTokens.get().token},
+                          json=[{'name': 'bulk testing name', 'task_id': task.id}, entry])
+
+        assert response.status == status
+
+    assert Serial.query.count() == tickets_count
+
+
+@pytest.mark.usefixtures('c')
+def test_get_and_retry_ticket_print_job(c):
+    ticket = Serial.query.first()
+    job = PrintJob(ticket_id=ticket.id, ticket=f'{ticket.number}', status=PRINT_JOB_FAILED)
+    db.session.add(job)
+    db.session.commit()
+    auth_token = AuthTokens.get()
+    response = c.get(f'{BASE}/{ticket.id}/print',
+                     follow_redirects=True,
+                     headers={'Authorization': auth_token.token})
+
+    assert response.status == '200 OK'
+    assert response.json.get('id') == job.id
+    assert response.json.get('status') == PRINT_JOB_FAILED
+
+    response = c.post(f'{BASE}/{ticket.id}/print',
+                      follow_redirects=True,
+                      headers={'Authorization': auth_token.token})
+
+    assert response.status == '200 OK'
+    assert response.json.get('status') == PRINT_JOB_PENDING
+    assert PrintJob.get(job.id).status == PRINT_JOB_PENDING
+
+    response = c.post(f'{BASE}/{ticket.id}/print',
+                      follow_redirects=True,
+                      headers={'Authorization': auth_token.token})
+
+    assert response.status == '400 BAD REQUEST'
+
+
+@pytest.mark.usefixtures('c')
+def test_get_ticket_print_job_not_found(c):
+    response = c.get(f'{BASE}/{Serial.query.first().id}/print',
+                     follow_redirects=True,
+                     headers={'Authorization': AuthTokens.get().token})
+
+    assert response.status == '404 NOT FOUND'
+
+
 @pytest.mark.usefixtures('c')
 def test_pull_ticket(c):
     auth_token = AuthTokens.get()
@@ -0,0 +1,74 @@
+''' Benchmark of printing tickets through the temporary files and `os.system` path, against
+    the in-memory raw bytes path.
+
+    python -m tests.benchmarks.printing --count 200 [--printer NAME]
+
+    Without a `--printer`, jobs are piped to `cat` instead of `lp`, to measure the path alone.
+'''
+import os
+import click
+from time import perf_counter
+from uuid import uuid4
+from subprocess import run, DEVNULL
+from escpos.printer import Dummy
+
+import app.printer
+from app.printer import printit, printit_ar
+
+
+TICKET_ARGUMENTS = ('A.101', 'AOFFICE', 3, 'TESTING_TASK', 'A.100')
+
+
+def render(arabic=False):
+    return (printit_ar if arabic else printit)(Dummy(), *TICKET_ARGUMENTS).output
+
+
+def print_with_temporary_file(content, printer=None):
+    ''' the replaced path, of `print_ticket_cli` and `print_ticket_cli_ar`. '''
+    file_path = os.path.join(os.getcwd(), f'{uuid4()}'.replace('-', '') + '.txt')
+
+    with open(file_path, 'wb+') as file:
+        file.write(content)
+
+    os.system(f'lp -d "{printer}" -o raw "{file_path}"'
+              if printer else
+              f'cat "{file_path}" > {os.devnull}')
+
+    if os.path.isfile(file_path):
+        os.remove(file_path)
+
+
+def print_in_memory(content, printer=None):
+    run(['lp', '-d', printer, '-o', 'raw'] if printer else ['cat'],
+        input=content, stdout=DEVNULL, check=True)
+
+
+def measure(todo, count):
+    started = perf_counter()
+
+    for _ in range(count):
+        todo()
+
+    return count / (perf_counter() - started)
+
+
+@click.command()
+@click.option('--count', default=200, help='Tickets to print with each path.')
+@click.option('--printer', default=None, help='CUPS printer to print to, instead of `cat`.')
+def benchmark(count, printer):
+    ''' Print tickets/second of each printing path. '''
+    # NOTE: translations and aliases need the database, and are not part of the printing path
+    app.printer.get_translation = lambda text, language: text
+
+    for arabic in (False, True):
+        language = 'ar' if arabic else 'en'
+        temporary_file = measure(lambda: print_with_temporary_file(render(arabic), printer), count)
+        in_memory = measure(lambda: print_in_memory(render(arabic), printer), count)
+
+        click.echo(f'{language}: temporary file {temporary_file:.1f} tickets/s, '
+                   f'in-memory {in_memory:.1f} tickets/s '
+                   f'({in_memory / temporary_file:.2f}x)')
+
+
+if __name__ == '__main__':
+    benchmark()
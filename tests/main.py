@@ -1,6 +1,9 @@
 import pytest
 from flask_migrate import upgrade as database_upgrade
+from sqlalchemy import event
 
+from app.middleware import db
+from app.database import Office
 from app.constants import MIGRATION_FOLDER
 from app.utils import absolute_path
 
@@ -8,3 +11,38 @@ from app.utils import absolute_path
 @pytest.mark.usefixtures('c')
 def test_upgrading_database(c):
     assert database_upgrade(directory=absolute_path(MIGRATION_FOLDER)) is None
+
+
+@pytest.mark.usefixtures('c')
+def test_inject_vars_cached_until_changed(c):
+    statements = []
+    track_statements = lambda conn, cursor, statement, *args: statements.append(statement)
+    context = {}
+
+    with c.application.test_request_context():
+        c.application.update_template_context(context)
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', track_statements)
+
+    try:
+        with c.application.test_request_context():
+            cached_context = {}
+            c.application.update_template_context(cached_context)
+
+            assert [o.id for o in cached_context['offices']] == [o.id for o in context['offices']]
+            assert [len(o.operators) for o in cached_context['offices']] ==\
+                [len(o.operators) for o in context['offices']]
+            assert cached_context['settings'].id == context['settings'].id
+            assert statements == []
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', track_statements)
+
+    office = Office()
+    db.session.add(office)
+    db.session.commit()
+
+    with c.application.test_request_context():
+        changed_context = {}
+        c.application.update_template_context(changed_context)
+
+        assert office.id in [o.id for o in changed_context['offices']]
@@ -0,0 +1,41 @@
+from app.metrics import Counter, Gauge, Histogram, format_labels
+
+
+def test_counter_exposed():
+    counter = Counter('failures_total', 'Failures.', ['kind'])
+
+    counter.inc(kind='usb')
+    counter.inc(2, kind='usb')
+
+    assert counter.expose() == '\n'.join(['# HELP failures_total Failures.',
+                                          '# TYPE failures_total counter',
+                                          'failures_total{kind="usb"} 3.0'])
+
+
+def test_gauge_cleared():
+    gauge = Gauge('waiting', 'Waiting.', ['office_id'])
+
+    gauge.set(4, office_id=1)
+    gauge.clear()
+    gauge.set(2, office_id=2)
+
+    assert gauge.samples() == [('waiting', [('office_id', '2')], 2)]
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram('latency_seconds', 'Latency.', ['endpoint'], buckets=[0.1, 1])
+
+    for value in [0.05, 0.5, 5]:
+        histogram.observe(value, endpoint='core.feed')
+
+    labels = [('endpoint', 'core.feed')]
+    assert histogram.samples() == [('latency_seconds_bucket', labels + [('le', 0.1)], 1),
+                                   ('latency_seconds_bucket', labels + [('le', 1.0)], 2),
+                                   ('latency_seconds_bucket', labels + [('le', '+Inf')], 3),
+                                   ('latency_seconds_sum', labels, 5.55),
+                                   ('latency_seconds_count', labels, 3)]
+
+
+def test_labels_escaped():
+    assert format_labels([('name', 'a "b"\\\n')]) == '{name="a \\"b\\"\\\\\\n"}'
+    assert format_labels([]) == ''
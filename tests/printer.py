@@ -1,10 +1,15 @@
 import pytest
+import escpos.printer
 from random import randint
 from datetime import datetime
+from threading import Thread
+from unittest.mock import MagicMock
 from escpos.printer import Dummy
 
-from app.printer import get_font_height_width, printit
-from app.constants import PRINTED_TICKET_DIMENSIONS, PRINTED_TICKET_SCALES, PRINTED_TICKET_MAXIMUM_HEIGH_OR_WIDTH
+from app.printer import (get_font_height_width, printit, PrinterSessions, render_arabic_ticket,
+                         get_arabic_ticket_template)
+from app.constants import (PRINTED_TICKET_DIMENSIONS, PRINTED_TICKET_SCALES, PRINTED_TICKET_MAXIMUM_HEIGH_OR_WIDTH,
+                           ARABIC_TICKET_WIDTH, ARABIC_TICKET_HEIGHT)
 
 
 def test_printer_height_and_width_random_scaling():
@@ -50,3 +55,79 @@ def test_printit_random_scales_sanity_check(scale):
     assert f'\nTask : {task}\n' in ticket_content
     assert f'\nTime : {datetime.now().__str__()[:-7]}\n' in ticket_content
     assert ticket_content.count(f'\n{"-" * 15}\n') == number_of_saperators
+    assert 'Estimated wait' not in ticket_content
+
+
+def test_printit_estimated_wait():
+    ticket_content = printit(Dummy(), 'A.101', 'AOFFICE', 3, 'TESTING_TASK', 'A.100',
+                             estimated_wait=12).output.decode('utf-8')
+
+    assert '\nEstimated wait : ~12 min\n' in ticket_content
+
+
+def test_printer_sessions_reused_and_reconnected(monkeypatch):
+    mock_printer = MagicMock()
+    monkeypatch.setattr(escpos.printer, 'Usb', mock_printer)
+    sessions = PrinterSessions()
+
+    with sessions.use(150, 3) as printer:
+        printer.text('first')
+
+    with sessions.use(150, 3) as printer:
+        printer.text('second')
+
+    assert mock_printer.call_count == 1
+
+    printer.device.get_active_configuration.side_effect = Exception('disconnected')
+
+    with sessions.use(150, 3) as printer:
+        printer.text('third')
+
+    assert mock_printer.call_count == 2
+    mock_printer().close.assert_called_once()
+
+
+def test_printer_sessions_dropped_on_failure(monkeypatch):
+    mock_printer = MagicMock()
+    monkeypatch.setattr(escpos.printer, 'Usb', mock_printer)
+    sessions = PrinterSessions()
+
+    with pytest.raises(Exception):
+        with sessions.use(150, 3):
+            raise Exception('paper jam')
+
+    assert sessions.sessions == {}
+
+
+def test_printer_sessions_cleared_after_printing(monkeypatch):
+    mock_printer = MagicMock()
+    monkeypatch.setattr(escpos.printer, 'Usb', mock_printer)
+    sessions = PrinterSessions()
+
+    with sessions.use(150, 3) as printer:
+        printer_lock = sessions.locks[(150, 3, None, None)]
+        clearing = Thread(target=sessions.clear)
+        clearing.start()
+        clearing.join(0.2)
+
+        assert clearing.is_alive()
+        printer.close.assert_not_called()
+
+    clearing.join()
+
+    printer.close.assert_called_once()
+    assert sessions.sessions == {}
+    assert sessions.locks[(150, 3, None, None)] is printer_lock
+
+
+def test_render_arabic_ticket_from_cached_template():
+    template = get_arabic_ticket_template()
+    template_content = template.tobytes()
+
+    first_ticket = render_arabic_ticket('A.101', 'AOFFICE', 3, 'TESTING_TASK', 'A.100')
+    second_ticket = render_arabic_ticket('A.102', 'AOFFICE', 4, 'TESTING_TASK', 'A.100')
+
+    assert first_ticket.size == (ARABIC_TICKET_WIDTH, ARABIC_TICKET_HEIGHT)
+    assert first_ticket.tobytes() != second_ticket.tobytes()
+    assert get_arabic_ticket_template() is template
+    assert template.tobytes() == template_content
@@ -0,0 +1,69 @@
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock
+
+from app.middleware import db
+from app.profiler import QueriesProfiler, get_statement_shape
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://',
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                      PROFILE_QUERIES=True,
+                      PROFILE_QUERIES_THRESHOLD=3,
+                      PROFILE_QUERIES_REPEATS=2)
+    db.init_app(app)
+    app.profiler = QueriesProfiler()
+    app.profiler.init_app(app)
+
+    @app.route('/queries/<int:count>')
+    def queries(count):
+        for number in range(count):
+            db.session.execute('SELECT :number', {'number': number})
+
+        return ''
+
+    yield app
+
+
+def test_profiler_aggregates_endpoint_queries(app):
+    client = app.test_client()
+
+    client.get('/queries/2')
+    client.get('/queries/0')
+
+    stats = app.profiler.stats()['queries']
+
+    assert stats['requests'] == 2
+    assert stats['queries'] == 2
+    assert stats['average_queries'] == 1
+    assert stats['max_queries'] == 2
+    assert stats['offenders'] == 0
+    assert stats['repeated'] == [dict(statement='SELECT ?', count=2)]
+
+
+def test_profiler_logs_offenders(app, monkeypatch):
+    monkeypatch.setattr(app, 'logger', MagicMock())
+    app.test_client().get('/queries/4')
+    message = app.logger.warning.call_args[0][0]
+
+    assert app.profiler.stats()['queries']['offenders'] == 1
+    assert message.startswith('queries ran 4 queries in ')
+    assert message.endswith("most repeated: ('SELECT ?', 4)")
+
+
+def test_profiler_disabled(app):
+    app.config['PROFILE_QUERIES'] = False
+    profiler = QueriesProfiler()
+    profiler.init_app(app)
+
+    assert profiler.enabled is False
+    assert profiler.stats() == {}
+
+
+def test_statement_shape():
+    statement = 'SELECT *\n FROM serials\n WHERE serials.id IN (?, ?, ?)'
+
+    assert get_statement_shape(statement) == 'SELECT * FROM serials WHERE serials.id IN (?)'
@@ -0,0 +1,168 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from . import fill_tickets
+from app.middleware import db
+from app.database import Serial, Task, Office
+from app.statistics import RunningStatistics, QueueStatistics, queue_statistics
+
+
+NOW = datetime(2020, 10, 6, 9)
+
+
+def minutes(count):
+    return NOW + timedelta(minutes=count)
+
+
+def test_service_time_moving_average():
+    statistics = RunningStatistics(smoothing=0.5)
+
+    statistics.serve(minutes(0), minutes(1))
+    statistics.serve(minutes(0), minutes(3))
+    statistics.serve(minutes(0), minutes(7))
+
+    assert statistics.service_time == 180
+    assert statistics.estimate_wait(4) == 12
+
+
+def test_service_time_excludes_idle_and_breaks():
+    statistics = RunningStatistics(smoothing=0.5, max_interval=60 * 60)
+
+    statistics.serve(minutes(0), minutes(1))
+    statistics.serve(minutes(9), minutes(11))
+    statistics.serve(minutes(12), minutes(200))
+
+    assert statistics.service_time == 120
+
+
+def test_arrival_rate():
+    statistics = RunningStatistics(smoothing=0.5)
+
+    assert statistics.arrival_rate is None
+
+    for count in [0, 2, 4]:
+        statistics.arrive(minutes(count))
+
+    assert statistics.arrival_rate == 0.5
+
+
+def test_wait_percentiles():
+    statistics = RunningStatistics(buckets=[5, 10, 30])
+
+    for wait in [1, 2, 3, 4, 6, 7, 8, 20, 25, 90]:
+        statistics.serve(minutes(0), minutes(wait))
+
+    assert statistics.get_percentile(40) == 5
+    assert statistics.get_percentile(50) == 10
+    assert statistics.get_percentile(90) == 30
+    assert statistics.get_percentile(100) is None
+    assert RunningStatistics().get_percentile(50) is None
+
+
+def test_queue_statistics_per_office_and_task():
+    statistics = QueueStatistics()
+
+    statistics.record((1, 1, minutes(0), None, 1), (2, 1, minutes(1), None, 2),
+                      (1, 1, minutes(0), minutes(2), 1), (1, 1, minutes(1), minutes(4), None),
+                      (2, 1, minutes(1), minutes(5), 2))
+
+    assert statistics.estimate_wait(10, office_id=1) == 20
+    assert statistics.estimate_wait(10, office_id=2) is None
+    assert statistics.estimate_wait(10, task_id=1) == 18
+    assert statistics.estimate_wait(10) == 18
+    assert statistics.stats(office_id=2) == dict(service_time=None, arrival_rate=None, served=1,
+                                                 wait_p50=5, wait_p90=5, wait_p95=5)
+    assert statistics.stats(office_id=3)['served'] == 0
+
+
+@pytest.mark.usefixtures('c')
+def test_statistics_updated_once_committed(c):
+    task = Task.query.first()
+    office = task.offices[0]
+    tickets = Serial.create_new_tickets([(task, office, f'STATISTICS {i}') for i in range(3)])
+
+    assert queue_statistics.get_statistics(office.id).last_arrival == tickets[0].timestamp
+    assert queue_statistics.estimate_wait(1, office.id) is None
+
+    tickets[0].pull(office.id)
+    Serial.claim_next(task.id, office.id)
+    tickets[2].p = True
+    tickets[2].pdt = datetime.utcnow()
+    db.session.flush()
+    db.session.rollback()
+
+    assert queue_statistics.stats(office.id)['served'] == 2
+    assert queue_statistics.stats(task_id=task.id)['served'] == 2
+    assert queue_statistics.get_statistics(office.id).service_time is not None
+
+
+@pytest.mark.usefixtures('c')
+def test_estimated_wait_of_waiting_tickets(c):
+    fill_tickets()
+    ticket = Serial.query.filter_by(p=False).first()
+    waiting = Serial.query.filter_by(p=False, office_id=ticket.office_id).count()
+    waiting_task = Serial.query.filter_by(p=False, office_id=ticket.office_id,
+                                          task_id=ticket.task_id).count()
+    queue_statistics.record((ticket.office_id, ticket.task_id, minutes(0), minutes(1), None),
+                            (ticket.office_id, ticket.task_id, minutes(0), minutes(3), None))
+
+    assert Serial.get_estimated_wait(ticket.office_id) == waiting * 2
+    assert Serial.get_estimated_wait(ticket.office_id, ticket.task_id) == waiting_task * 2
+
+
+def test_waiting_counts_loaded_once():
+    statistics = QueueStatistics()
+    load = MagicMock(return_value=[(1, 1, 2), (1, 2, 1), (2, 1, 3)])
+
+    assert statistics.get_waiting(load) == 6
+    assert statistics.get_waiting(load, office_id=1) == 3
+    assert statistics.get_waiting(load, task_id=1) == 5
+
+    statistics.record((1, 1, minutes(0), None, 1), (2, 1, minutes(0), minutes(1), 1))
+
+    assert statistics.get_waiting(load, office_id=1, task_id=1) == 2
+    assert statistics.get_waiting(load, office_id=2) == 3
+    assert load.call_count == 1
+
+    statistics.reset_waiting()
+
+    assert statistics.get_waiting(load) == 6
+    assert load.call_count == 2
+
+
+@pytest.mark.usefixtures('c')
+def test_waiting_counts_follow_the_tickets(c):
+    def get_counts():
+        return [(office_id, task_id, queue_statistics.get_waiting(MagicMock(), office_id, task_id))
+                for office_id, task_id in db.session.query(Serial.office_id, Serial.task_id)
+                                                    .distinct()]
+
+    def count_tickets():
+        return [(office_id, task_id, Serial.query.filter_by(p=False, office_id=office_id,
+                                                            task_id=task_id).count())
+                for office_id, task_id, _ in get_counts()]
+
+    fill_tickets()
+    task = Task.query.first()
+    office, other_office = task.offices[0], Office.query.filter(Office.id != task.offices[0].id)\
+                                                        .first()
+    Serial.get_estimated_wait()
+    Serial.create_new_tickets([(task, office, f'WAITING {i}') for i in range(3)])
+    Serial.create_new_ticket(task, office, 'WAITING')
+    Serial.claim_next(task.id, other_office.id)
+    Serial.query.filter_by(p=False, task_id=task.id).first().pull(other_office.id)
+    db.session.commit()
+
+    assert get_counts() == count_tickets()
+
+    Serial.query.filter(Serial.p == False, Serial.office_id != other_office.id)\
+                .first()\
+                .office_id = other_office.id
+    db.session.commit()
+
+    assert queue_statistics.waiting is None
+
+    Serial.get_estimated_wait()
+
+    assert get_counts() == count_tickets()
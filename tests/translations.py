@@ -0,0 +1,50 @@
+import os
+import json
+import pytest
+
+from app.translations import TranslationsCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    source = tmp_path / 'translations.json'
+    source.write_text(json.dumps({'Empty': {'en': 'Empty', 'fr': 'Vide', 'ar': ''}}))
+
+    yield TranslationsCatalog(str(source), str(tmp_path / 'translations.catalog'))
+
+
+def test_translate_from_compiled_catalog(catalog):
+    assert catalog.translate('Empty', dest=['fr']) == 'Vide'
+    assert catalog.translate('Empty', 'en', ['fr', 'en']) == ['Vide', 'Empty']
+    assert os.path.isfile(catalog.catalog_path)
+
+
+def test_catalog_written_in_place(catalog):
+    catalog.load()
+
+    assert sorted(os.listdir(os.path.dirname(catalog.catalog_path))) == ['translations.catalog',
+                                                                         'translations.json']
+
+
+def test_catalog_kept_in_memory_if_not_writable(catalog, tmp_path):
+    catalog.catalog_path = str(tmp_path / 'missing' / 'translations.catalog')
+
+    assert catalog.translate('Empty', dest=['fr']) == 'Vide'
+    assert not os.path.exists(catalog.catalog_path)
+
+
+def test_translate_missing_text_or_language(catalog):
+    assert catalog.translate('Not translated', dest=['fr']) == 'Not translated'
+    assert catalog.translate('Empty', dest=['ar']) == 'Empty'
+    assert catalog.translate('Empty', dest=[None]) == 'Empty'
+
+
+def test_catalog_recompiled_once_source_changes(catalog):
+    catalog.load()
+    os.utime(catalog.source_path, (0, 0))
+    os.utime(catalog.catalog_path, (1, 1))
+
+    with open(catalog.source_path, 'w') as source:
+        json.dump({'Empty': {'en': 'Empty', 'fr': 'Vide !'}}, source)
+
+    assert catalog.load()['fr']['Empty'] == 'Vide !'
@@ -0,0 +1,114 @@
+import os
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock
+
+import app.tts
+from app.tts import AnnouncementsCache, GoogleEngine, EspeakEngine
+
+
+def write_audio(lang, text, file_path):
+    with open(file_path, 'wb') as audio:
+        audio.write(b'0' * 10)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    engines = [GoogleEngine(), EspeakEngine()]
+
+    for engine in engines:
+        engine.synthesize = MagicMock(side_effect=write_audio)
+
+    cache = AnnouncementsCache(max_size=30, max_age=60, engines=engines, temporary=False)
+    cache.init_app(Flask(__name__, static_folder=str(tmp_path)))
+    yield cache
+
+
+def test_cache_hits_synthesized_files(cache):
+    url = cache.say('en-us', 'A1')
+
+    assert cache.say('en-us', 'A1') == url
+    assert cache.engines['gtts'].synthesize.call_count == 1
+    assert cache.stats() == dict(hits=1, misses=1, hit_rate=0.5, evictions=0, files=1, size=10)
+
+
+def test_cache_evicts_least_recently_used_over_size(cache):
+    for text in ['1', '2', '3']:
+        cache.say('en-us', text)
+
+    cache.say('en-us', '1')
+    cache.say('en-us', '4')
+
+    assert list(cache.index) == [('3', 'en-us', 'gtts'), ('1', 'en-us', 'gtts'), ('4', 'en-us', 'gtts')]
+    assert cache.stats()['evictions'] == 1
+    assert cache.size == 30
+    assert len(os.listdir(cache.tempdir)) == 3
+
+
+def test_cache_evicts_expired(cache):
+    cache.say('en-us', '1')
+    cache.index[('1', 'en-us', 'gtts')] = cache.index[('1', 'en-us', 'gtts')]._replace(accessed=0)
+
+    cache.say('en-us', '2')
+
+    assert list(cache.index) == [('2', 'en-us', 'gtts')]
+    assert os.listdir(cache.tempdir) == [os.path.basename(cache.index[('2', 'en-us', 'gtts')].path)]
+
+
+def test_cache_keeps_pinned_regardless_of_age(cache):
+    cache.say('en-us', '1')
+    cache.pin('en-us', '1')
+    cache.index[('1', 'en-us', 'gtts')] = cache.index[('1', 'en-us', 'gtts')]._replace(accessed=0)
+
+    cache.say('en-us', '2')
+
+    assert list(cache.index) == [('1', 'en-us', 'gtts'), ('2', 'en-us', 'gtts')]
+    assert cache.index[('1', 'en-us', 'gtts')].pinned is True
+
+
+def test_cache_evicts_pinned_over_size(cache):
+    cache.say('en-us', '1')
+    cache.pin('en-us', '1')
+
+    for text in ['2', '3', '4']:
+        cache.say('en-us', text)
+
+    assert ('1', 'en-us', 'gtts') not in cache.index
+    assert cache.size == 30
+
+
+def test_cache_failed_synthesis_not_cached(cache):
+    cache.failsafe = True
+    cache.logging = False
+    cache.engines['gtts'].synthesize.side_effect = Exception('No connection')
+
+    assert cache.say('en-us', '1') == ''
+    assert cache.index == {}
+    assert os.listdir(cache.tempdir) == []
+
+
+def test_cache_synthesize_with_selected_engine(cache):
+    url = cache.say('fr', '1', 'espeak')
+
+    assert url.endswith('.wav')
+    assert cache.is_cached('fr', '1', 'espeak')
+    assert not cache.is_cached('fr', '1', 'gtts')
+    assert cache.engines['gtts'].synthesize.called is False
+    assert cache.say('fr', '1', 'unknown').endswith('.mp3')
+
+
+def test_espeak_engine_subprocess(monkeypatch):
+    mock_run = MagicMock(return_value=MagicMock(returncode=0))
+    monkeypatch.setattr(app.tts, 'run', mock_run)
+
+    EspeakEngine().synthesize('fr', '-1', 'testing.wav')
+
+    assert mock_run.call_args[0][0] == ['espeak-ng', '-v', 'fr', '-w', 'testing.wav', '--stdin']
+    assert mock_run.call_args[1]['input'] == '-1'.encode('utf-8')
+
+
+def test_espeak_engine_subprocess_failed(monkeypatch):
+    monkeypatch.setattr(app.tts, 'run', MagicMock(return_value=MagicMock(returncode=1, stderr=b'')))
+
+    with pytest.raises(RuntimeError):
+        EspeakEngine().synthesize('fr', '1', 'testing.wav')
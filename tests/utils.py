@@ -1,9 +1,10 @@
 import pytest
 import os
+from unittest.mock import MagicMock
+from sqlalchemy import event
 
-from . import DB_NAME
 from app.middleware import db
-from app.database import (Aliases)
+from app.database import (Aliases, Settings)
 from app.utils import (get_with_alias, execute, absolute_path)
 
 
@@ -18,13 +19,56 @@ def test_get_with_alias(c, monkeypatch):
     aliases.ticket = ticket
     db.session.commit()
 
-    alt_aliases = get_with_alias(DB_NAME)
+    alt_aliases = get_with_alias()
 
     assert office in alt_aliases.get('\nOffice : ')
     assert ticket in alt_aliases.get('\nCurrent ticket : ')
     assert task in alt_aliases.get('\nTask : ')
 
 
+@pytest.mark.usefixtures('c')
+def test_get_with_alias_cached_until_changed(c, monkeypatch):
+    alt_aliases = get_with_alias()
+    mock_get = MagicMock()
+    monkeypatch.setattr(Aliases, 'get', mock_get)
+
+    assert get_with_alias() is alt_aliases
+    mock_get.assert_not_called()
+
+    monkeypatch.undo()
+    aliases = Aliases.get()
+    aliases.office = 'new_office'
+    db.session.commit()
+
+    assert 'new_office' in get_with_alias().get('\nOffice : ')
+
+
+@pytest.mark.usefixtures('c')
+def test_singletons_cached_until_changed(c):
+    statements = []
+    track_statements = lambda conn, cursor, statement, *args: statements.append(statement)
+    single_row = Settings.get().single_row
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', track_statements)
+
+    try:
+        assert Settings.get() is Settings.get()
+        assert Settings.get().single_row == single_row
+        assert statements == []
+
+        Settings.get().single_row = not single_row
+        db.session.commit()
+        statements.clear()
+
+        assert Settings.get().single_row is not single_row
+        assert Settings.get().single_row is not single_row
+        assert len(statements) == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', track_statements)
+        Settings.get().single_row = single_row
+        db.session.commit()
+
+
 def test_execute():
     path = absolute_path('static')
 
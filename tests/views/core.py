@@ -1,17 +1,27 @@
 import pytest
 import os
+import json
 import escpos.printer
+from escpos.exceptions import USBNotFoundError
 from random import choice
-from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, ANY
 
 import app.views.core
 import app.printer
+import app.announcements
 import app.database
-from .. import NAMES, TEST_REPEATS, fill_tickets, do_until_truthy
+import app.tasks
+from .. import (NAMES, TEST_REPEATS, fill_tickets, do_until_truthy,
+                get_random_task_with_tickets)
 from app.middleware import db
 from app.utils import absolute_path
+from app.announcements import get_message, get_fragments_library
+from app.events import QueueEvents, SnapshotsCache
 from app.database import (Task, Office, Serial, Settings, Touch_store, Display_store,
-                          Printer)
+                          Printer, PrintJob)
+from app.constants import (PRINT_JOB_PENDING, PRINT_JOB_PRINTED, PRINT_JOB_FAILED,
+                           PRINT_JOB_MAX_ATTEMPTS, METRICS_CONTENT_TYPE)
 
 
 @pytest.mark.usefixtures('c')
@@ -29,7 +39,7 @@ def test_new_registered_ticket(c):
     touch_screen_settings.n = True
     db.session.commit()
 
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -51,7 +61,7 @@ def test_new_noisy_registered_ticket(c):
     touch_screen_settings.n = True
     db.session.commit()
 
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -82,7 +92,7 @@ def test_new_printed_ticket(c, monkeypatch):
     printer_settings.in_ep = 170
     printer_settings.out_ep = 170
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -106,24 +116,18 @@ def test_new_printed_ticket(c, monkeypatch):
 def test_new_printed_ticket_windows(c, monkeypatch):
     last_ticket = None
     printer_name = 'testing_printer'
-    printer_path = 'testing_path'
-    printer_full_path = os.path.join(os.getcwd(), f'{printer_path}.txt')
-    mock_uuid = MagicMock()
-    mock_uuid.uuid4 = MagicMock(return_value=printer_path)
     mock_os = MagicMock()
     mock_os.name = 'nt'
-    mock_system = MagicMock()
+    mock_open = MagicMock()
     monkeypatch.setattr(app.database, 'os', mock_os)
-    monkeypatch.setattr(app.printer, 'name', 'nt')
-    monkeypatch.setattr(app.printer, 'uuid', mock_uuid)
-    monkeypatch.setattr(app.printer, 'system', mock_system)
+    monkeypatch.setattr(app.printer, 'open', mock_open, raising=False)
 
     printer_settings = Printer.get()
     touch_screen_settings = Touch_store.get()
     touch_screen_settings.n = False
     printer_settings.name = printer_name
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -137,25 +141,19 @@ def test_new_printed_ticket_windows(c, monkeypatch):
     assert response.status == '200 OK'
     assert last_ticket.number != new_ticket.number
     assert new_ticket.name == name
-    mock_system.assert_called_once_with(
-        f'print /D:\\\localhost\\"{printer_name}" "{printer_full_path}"') # noqa
+    mock_open.assert_called_once_with(f'\\\\localhost\\{printer_name}', 'wb')
+    mock_open().__enter__().write.assert_called_once()
 
 
 @pytest.mark.usefixtures('c')
 def test_new_printed_ticket_lp(c, monkeypatch):
     last_ticket = None
     printer_name = 'testing_printer'
-    printer_path = 'testing_path'
-    printer_full_path = os.path.join(os.getcwd(), f'{printer_path}.txt')
-    mock_uuid = MagicMock()
-    mock_uuid.uuid4 = MagicMock(return_value=printer_path)
     mock_os = MagicMock()
     mock_os.name = 'linux'
-    mock_system = MagicMock()
+    mock_run = MagicMock()
     monkeypatch.setattr(app.views.core, 'os', mock_os)
-    monkeypatch.setattr(app.printer, 'name', 'linux')
-    monkeypatch.setattr(app.printer, 'uuid', mock_uuid)
-    monkeypatch.setattr(app.printer, 'system', mock_system)
+    monkeypatch.setattr(app.printer, 'run', mock_run)
 
     settings = Settings.get()
     printer_settings = Printer.get()
@@ -164,7 +162,7 @@ def test_new_printed_ticket_lp(c, monkeypatch):
     touch_screen_settings.n = False
     printer_settings.name = printer_name
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -178,8 +176,9 @@ def test_new_printed_ticket_lp(c, monkeypatch):
     assert response.status == '200 OK'
     assert last_ticket.number != new_ticket.number
     assert new_ticket.name == name
-    mock_system.assert_called_once_with(
-        f'lp -d "{printer_name}" -o raw "{printer_full_path}"')
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0] == ['lp', '-d', printer_name, '-o', 'raw']
+    assert isinstance(mock_run.call_args[1]['input'], bytes)
 
 
 @pytest.mark.usefixtures('c')
@@ -198,7 +197,7 @@ def test_new_printed_ticket_arabic(c, monkeypatch):
     printer_settings.out_ep = 170
     printer_settings.langu = 'ar'
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -214,27 +213,22 @@ def test_new_printed_ticket_arabic(c, monkeypatch):
     assert new_ticket.name == name
     assert mock_printer().text.call_count == 1
     mock_printer().cut.assert_called_once()
-    mock_printer().close.assert_called_once()
-    mock_printer().image.assert_called_once_with(image_path,
+    mock_printer().close.assert_not_called()
+    mock_printer().image.assert_called_once_with(ANY,
                                                  fragment_height=580,
                                                  high_density_vertical=True)
+    assert not os.path.isfile(image_path)
 
 
 @pytest.mark.usefixtures('c')
 def test_new_printed_ticket_windows_arabic(c, monkeypatch):
     last_ticket = None
     printer_name = 'testing_printer'
-    printer_path = 'testing_path'
-    printer_full_path = os.path.join(os.getcwd(), f'{printer_path}.txt')
-    mock_uuid = MagicMock()
-    mock_uuid.uuid4 = MagicMock(return_value=printer_path)
     mock_os = MagicMock()
     mock_os.name = 'nt'
-    mock_system = MagicMock()
+    mock_open = MagicMock()
     monkeypatch.setattr(app.database, 'os', mock_os)
-    monkeypatch.setattr(app.printer, 'name', 'nt')
-    monkeypatch.setattr(app.printer, 'uuid', mock_uuid)
-    monkeypatch.setattr(app.printer, 'system', mock_system)
+    monkeypatch.setattr(app.printer, 'open', mock_open, raising=False)
 
     printer_settings = Printer.get()
     touch_screen_settings = Touch_store.get()
@@ -242,7 +236,7 @@ def test_new_printed_ticket_windows_arabic(c, monkeypatch):
     printer_settings.name = printer_name
     printer_settings.langu = 'ar'
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -256,25 +250,19 @@ def test_new_printed_ticket_windows_arabic(c, monkeypatch):
     assert response.status == '200 OK'
     assert last_ticket.number != new_ticket.number
     assert new_ticket.name == name
-    mock_system.assert_called_once_with(
-        f'print /D:\\\localhost\\"{printer_name}" "{printer_full_path}"')  # noqa
+    mock_open.assert_called_once_with(f'\\\\localhost\\{printer_name}', 'wb')
+    mock_open().__enter__().write.assert_called_once()
 
 
 @pytest.mark.usefixtures('c')
 def test_new_printed_ticket_lp_arabic(c, monkeypatch):
     last_ticket = None
     printer_name = 'testing_printer'
-    printer_path = 'testing_path'
-    printer_full_path = os.path.join(os.getcwd(), f'{printer_path}.txt')
-    mock_uuid = MagicMock()
-    mock_uuid.uuid4 = MagicMock(return_value=printer_path)
     mock_os = MagicMock()
     mock_os.name = 'linux'
-    mock_system = MagicMock()
+    mock_run = MagicMock()
     monkeypatch.setattr(app.views.core, 'os', mock_os)
-    monkeypatch.setattr(app.printer, 'name', 'linux')
-    monkeypatch.setattr(app.printer, 'uuid', mock_uuid)
-    monkeypatch.setattr(app.printer, 'system', mock_system)
+    monkeypatch.setattr(app.printer, 'run', mock_run)
 
     settings = Settings.get()
     printer_settings = Printer.get()
@@ -284,7 +272,7 @@ def test_new_printed_ticket_lp_arabic(c, monkeypatch):
     printer_settings.name = printer_name
     printer_settings.langu = 'ar'
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -298,16 +286,19 @@ def test_new_printed_ticket_lp_arabic(c, monkeypatch):
     assert response.status == '200 OK'
     assert last_ticket.number != new_ticket.number
     assert new_ticket.name == name
-    mock_system.assert_called_once_with(
-        f'lp -d "{printer_name}" -o raw "{printer_full_path}"')
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0] == ['lp', '-d', printer_name, '-o', 'raw']
+    assert isinstance(mock_run.call_args[1]['input'], bytes)
 
 
 @pytest.mark.usefixtures('c')
-def test_new_printed_ticket_fail(c):
+def test_new_printed_ticket_fail(c, monkeypatch):
+    monkeypatch.setattr(escpos.printer, 'Usb',
+                        MagicMock(side_effect=USBNotFoundError('USB device not found')))
     touch_screen_settings = Touch_store.query.first()
     touch_screen_settings.n = False
     db.session.commit()
-    task = choice(Task.query.all())
+    task = get_random_task_with_tickets()
     last_ticket = Serial.query.filter_by(task_id=task.id)\
                               .order_by(Serial.number.desc()).first()
 
@@ -319,10 +310,118 @@ def test_new_printed_ticket_fail(c):
         errors_log_content = errors_log.read()
 
     assert response.status == '200 OK'
-    assert new_ticket.id == last_ticket.id
+    assert new_ticket.id != last_ticket.id
+    assert PrintJob.get(ticket_id=new_ticket.id).status == PRINT_JOB_FAILED
     assert 'escpos.exceptions.USBNotFoundError: USB device not found' in errors_log_content
 
 
+@pytest.mark.usefixtures('c')
+def test_new_printed_ticket_committed_before_printing(c, monkeypatch):
+    committed = []
+
+    def print_committed(job):
+        committed.append(db.create_session({})().query(Serial).get(job.ticket_id))
+
+    monkeypatch.setattr(PrintJob, 'print', print_committed)
+    touch_screen_settings = Touch_store.get()
+    touch_screen_settings.n = False
+    db.session.commit()
+    task = get_random_task_with_tickets()
+
+    response = c.post(f'/serial/{task.id}', follow_redirects=True)
+    new_ticket = Serial.query.filter_by(task_id=task.id)\
+                             .order_by(Serial.number.desc()).first()
+
+    assert response.status == '200 OK'
+    assert committed[0].id == new_ticket.id
+    assert PrintJob.get(ticket_id=new_ticket.id) is None
+
+
+@pytest.mark.usefixtures('c')
+def test_new_printed_ticket_kept_if_printing_failed(c, monkeypatch):
+    monkeypatch.setattr(PrintJob, 'print', lambda job: Exception('USB device not found'))
+    touch_screen_settings = Touch_store.get()
+    touch_screen_settings.n = False
+    db.session.commit()
+    task = get_random_task_with_tickets()
+    tickets_count = Serial.query.count()
+
+    response = c.post(f'/serial/{task.id}', follow_redirects=True)
+    new_ticket = Serial.query.filter_by(task_id=task.id)\
+                             .order_by(Serial.number.desc()).first()
+    job = PrintJob.get(ticket_id=new_ticket.id)
+
+    assert response.status == '200 OK'
+    assert Serial.query.count() == tickets_count + 1
+    assert job.status == PRINT_JOB_FAILED
+    assert job.attempts == 1
+    assert job.error == 'USB device not found'
+    assert job not in PrintJob.get_due().all()
+
+
+@pytest.mark.usefixtures('c')
+def test_new_printed_ticket_queued(c, monkeypatch):
+    mock_printer = MagicMock()
+    monkeypatch.setattr(escpos.printer, 'Usb', mock_printer)
+    monkeypatch.setattr(app.tasks, 'get_task', lambda name: name == 'PrintTickets')
+
+    touch_screen_settings = Touch_store.get()
+    touch_screen_settings.n = False
+    db.session.commit()
+    task = get_random_task_with_tickets()
+
+    response = c.post(f'/serial/{task.id}', follow_redirects=True)
+    new_ticket = Serial.query.filter_by(task_id=task.id)\
+                             .order_by(Serial.number.desc()).first()
+    job = PrintJob.get(ticket_id=new_ticket.id)
+
+    assert response.status == '200 OK'
+    assert job.status == PRINT_JOB_PENDING
+    assert job.ticket.endswith(f'.{new_ticket.number}')
+    mock_printer().cut.assert_not_called()
+    assert job in PrintJob.get_due().all()
+    assert job.attempt() is None
+    assert job.status == PRINT_JOB_PRINTED
+    mock_printer().cut.assert_called_once()
+
+
+@pytest.mark.usefixtures('c')
+def test_print_job_fail_backoff(c, monkeypatch):
+    monkeypatch.setattr(escpos.printer, 'Usb',
+                        MagicMock(side_effect=USBNotFoundError('USB device not found')))
+    job = PrintJob(ticket='A.101', office='AOffice', task='Task', current_ticket='A.100')
+    db.session.add(job)
+    db.session.commit()
+
+    for attempt in range(1, PRINT_JOB_MAX_ATTEMPTS + 1):
+        assert job.attempt() is not None
+        assert job.attempts == attempt
+        assert job not in PrintJob.get_due().all()
+
+    assert job.status == PRINT_JOB_FAILED
+    assert 'USB device not found' in job.error
+
+    job.retry()
+
+    assert job.status == PRINT_JOB_PENDING
+    assert job in PrintJob.get_due().all()
+
+
+@pytest.mark.usefixtures('c')
+def test_print_jobs_purged_past_retention(c):
+    old_job = PrintJob(ticket='A.101', status=PRINT_JOB_PRINTED)
+    old_job.timestamp = datetime.utcnow() - timedelta(days=2)
+    db.session.add_all([old_job,
+                        PrintJob(ticket='A.102', status=PRINT_JOB_FAILED),
+                        PrintJob(ticket='A.103', status=PRINT_JOB_PENDING)])
+    db.session.commit()
+
+    assert PrintJob.purge() == 1
+    assert sorted(job.ticket for job in PrintJob.query) == ['A.102', 'A.103']
+    assert PrintJob.purge(age=0) == 1
+    assert [job.ticket for job in PrintJob.query] == ['A.103']
+
+
 @pytest.mark.usefixtures('c')
 def test_reset_office(c):
     ticket = Serial.query.order_by(Serial.number.desc()).first()
@@ -333,8 +432,7 @@ def test_reset_office(c):
 
     assert response.status == '200 OK'
     assert Serial.query.filter_by(office_id=office.id).count() != len(tickets)
-    assert Serial.query.filter(Serial.office_id == office.id, Serial.number != 100)\
-                       .count() == 0
+    assert Serial.query.filter(Serial.office_id == office.id).count() == 0
 
 
 @pytest.mark.usefixtures('c')
@@ -355,8 +453,7 @@ def test_reset_task(c):
 
     assert response.status == '200 OK'
     assert Serial.query.filter_by(task_id=task.id).count() != len(tickets)
-    assert Serial.query.filter(Serial.task_id == task.id, Serial.number != 100)\
-                       .count() == 0
+    assert Serial.query.filter(Serial.task_id == task.id).count() == 0
 
 
 @pytest.mark.usefixtures('c')
@@ -367,7 +464,7 @@ def test_reset_all(c):
 
     assert response.status == '200 OK'
     assert Serial.query.count() != len(all_tickets)
-    assert Serial.query.count() == Task.query.count()
+    assert Serial.query.count() == 0
 
 
 @pytest.mark.usefixtures('c')
@@ -392,13 +489,67 @@ def test_generate_new_tickets(_, c):
                        .number == (last_ticket.number + 1)
 
 
+@pytest.mark.usefixtures('c')
+def test_generate_new_tickets_numbered_per_office(c):
+    touch_screen_settings = Touch_store.query.first()
+    touch_screen_settings.n = True
+    db.session.commit()
+    task = Task.get_first_common()
+    offices = task.offices[:2]
+    last_numbers = [Serial.query.filter_by(office_id=o.id).order_by(Serial.number.desc()).first()
+                    for o in offices]
+
+    c.get('/numbering/office/testing')
+    for office in offices:
+        c.post(f'/serial/{task.id}/{office.id}', data={'name': choice(NAMES)},
+               follow_redirects=True)
+
+    assert Settings.get().numbering == 'office'
+    for office, last_ticket in zip(offices, last_numbers):
+        assert Serial.query.filter_by(office_id=office.id)\
+                           .order_by(Serial.number.desc())\
+                           .first()\
+                           .number == getattr(last_ticket, 'number', 100) + 1
+
+
+@pytest.mark.usefixtures('c')
+def test_generate_new_tickets_numbered_daily(c):
+    touch_screen_settings = Touch_store.query.first()
+    touch_screen_settings.n = True
+    db.session.commit()
+    yesterday = datetime.utcnow() - timedelta(days=1)
+
+    for ticket in Serial.query.all():
+        ticket.timestamp = yesterday
+    db.session.commit()
+    task = choice(Task.query.all())
+    c.get('/settings/daily_numbering/testing')
+    c.post(f'/serial/{task.id}', data={'name': choice(NAMES)}, follow_redirects=True)
+
+    assert Serial.query.order_by(Serial.timestamp.desc()).first().number == 101
+
+
+@pytest.mark.usefixtures('c')
+def test_generate_new_tickets_after_reset(c):
+    touch_screen_settings = Touch_store.query.first()
+    touch_screen_settings.n = True
+    db.session.commit()
+    task = choice(Task.query.all())
+
+    c.post(f'/serial/{task.id}', data={'name': choice(NAMES)}, follow_redirects=True)
+    c.get('/serial_ra', follow_redirects=True)
+    c.post(f'/serial/{task.id}', data={'name': choice(NAMES)}, follow_redirects=True)
+
+    assert [t.number for t in Serial.query.all()] == [101]
+
+
 @pytest.mark.parametrize('_', range(TEST_REPEATS))
 @pytest.mark.usefixtures('c')
 def test_pull_tickets_from_all(_, c):
     ticket_to_be_pulled = do_until_truthy(
         fill_tickets,
         lambda: Serial.query.order_by(Serial.number)
-                            .filter(Serial.number != 100, Serial.p != True)
+                            .filter(Serial.p != True)
                             .first())
 
     response = c.get(f'/pull', follow_redirects=True)
@@ -410,10 +561,27 @@ def test_pull_tickets_from_all(_, c):
     assert Serial.get(ticket_to_be_pulled.id).p is True
 
 
+@pytest.mark.usefixtures('c')
+def test_pull_skips_ticket_pulled_concurrently(c, monkeypatch):
+    pulled_ticket, next_ticket = Serial.query.filter(Serial.p != True).limit(2).all()
+    pulled_ticket_id, next_ticket_id = pulled_ticket.id, next_ticket.id
+    pulled_ticket.pull()
+    stale_tickets = MagicMock()
+    stale_tickets.with_for_update.return_value\
+                 .first.side_effect = [Serial.get(pulled_ticket_id), Serial.get(next_ticket_id)]
+    monkeypatch.setattr(Serial, 'get_next_tickets', MagicMock(return_value=stale_tickets))
+
+    response = c.get('/pull', follow_redirects=True)
+
+    assert response.status == '200 OK'
+    assert Serial.get(next_ticket_id).p is True
+    assert stale_tickets.with_for_update.return_value.first.call_count == 2
+
+
 @pytest.mark.parametrize('_', range(TEST_REPEATS))
 @pytest.mark.usefixtures('c')
 def test_pull_random_ticket(_, c):
-    ticket = choice(Serial.query.filter_by(n=False)
+    ticket = choice(Serial.query.filter_by(p=False)
                                 .limit(10)
                                 .all())
     office = choice(ticket.task.offices)
@@ -434,8 +602,7 @@ def test_pull_tickets_from_common_task(_, c):
     ticket_to_be_pulled = do_until_truthy(
         fill_tickets,
         lambda: Serial.query.order_by(Serial.number)
-                            .filter(Serial.number != 100,
-                                    Serial.p != True,
+                            .filter(Serial.p != True,
                                     Serial.task_id == task.id)
                             .first())
 
@@ -455,7 +622,7 @@ def test_pull_tickets_from_common_task(_, c):
 def test_pull_common_task_strict_pulling(_, c):
     def getter():
         tickets = Serial.query.order_by(Serial.number)\
-                              .filter(Serial.number != 100, Serial.p != True)\
+                              .filter(Serial.p != True)\
                               .all()
 
         for ticket in tickets:
@@ -486,7 +653,7 @@ def test_pull_ticket_on_hold(c):
     ticket_to_be_pulled = None
 
     ticket_to_be_pulled = Serial.query.order_by(Serial.number)\
-                                      .filter(Serial.number != 100, Serial.p != True)\
+                                      .filter(Serial.p != True)\
                                       .first()
 
     c.get(f'/on_hold/{ticket_to_be_pulled.id}/testing')
@@ -503,6 +670,19 @@ def test_pull_ticket_on_hold(c):
                        .first() is None
 
 
+@pytest.mark.usefixtures('c')
+def test_feed_estimated_wait(c):
+    assert c.get('/feed', follow_redirects=True).json.get('ewt') is None
+
+    c.get('/pull', follow_redirects=True)
+    c.get('/pull', follow_redirects=True)
+    response = c.get('/feed', follow_redirects=True)
+
+    assert response.status == '200 OK'
+    assert response.json.get('ewt') is not None
+    assert response.json.get('ewt') == Serial.get_estimated_wait()
+
+
 @pytest.mark.usefixtures('c')
 def test_feed_stream_tickets_preferences_enabled(c):
     c.get('/pull', follow_redirects=True)  # NOTE: initial pull to fill stacks
@@ -565,6 +745,7 @@ def test_feed_stream_tickets_preferences_disabled(c):
     display_settings.always_show_ticket_number = False
     db.session.commit()
     tickets = Serial.get_waiting_list_tickets(limit=8)
+    tickets_prefixes = [ticket.office.prefix for ticket in tickets]
     current_ticket = Serial.get_last_pulled_ticket()
 
     response = c.get('/feed', follow_redirects=True)
@@ -574,9 +755,81 @@ def test_feed_stream_tickets_preferences_disabled(c):
     assert response.json.get('cott') == current_ticket.task.name
     assert response.json.get('cot') == current_ticket.display_text
 
-    for i, ticket in enumerate(tickets):
+    for i, (ticket, prefix) in enumerate(zip(tickets, tickets_prefixes)):
         assert ticket.name in response.json.get(f'w{i + 1}')
-        assert f'{ticket.office.prefix}{ticket.number}' not in response.json.get(f'w{i + 1}')
+        assert f'{prefix}{ticket.number}' not in response.json.get(f'w{i + 1}')
+
+
+@pytest.mark.usefixtures('c')
+def test_feed_cached_until_queue_changes(c, monkeypatch):
+    ticket = Serial.get_waiting_list_tickets(limit=1)[0]
+    feed_url = f'/feed/{ticket.office_id}'
+    initial_feed = c.get(feed_url).json
+    mock_last_pulled = MagicMock(side_effect=Serial.get_last_pulled_ticket)
+    monkeypatch.setattr(Serial, 'get_last_pulled_ticket', mock_last_pulled)
+
+    assert c.get(feed_url).json == initial_feed
+    assert mock_last_pulled.call_count == 0
+
+    ticket.pull(ticket.office_id)
+    pulled_feed = c.get(feed_url).json
+
+    assert mock_last_pulled.call_count == 1
+    assert pulled_feed != initial_feed
+    assert pulled_feed.get('cot') == Serial.get(ticket.id).display_text
+
+
+def test_feed_snapshots_least_recently_used_dropped():
+    snapshots = SnapshotsCache(QueueEvents(), max_size=2)
+
+    for office_id in [1, 2, 1, 3]:
+        snapshots.get((office_id, 'en'), lambda: office_id, office_id)
+
+    assert list(snapshots.snapshots) == [(1, 'en'), (3, 'en')]
+
+
+@pytest.mark.usefixtures('c')
+def test_feed_not_modified_until_queue_changes(c):
+    ticket = Serial.get_waiting_list_tickets(limit=1)[0]
+    feed_url = f'/feed/{ticket.office_id}'
+    etag = c.get(feed_url).headers.get('ETag')
+    response = c.get(feed_url, headers={'If-None-Match': etag})
+
+    assert etag is not None
+    assert response.status == '304 NOT MODIFIED'
+    assert response.data == b''
+
+    ticket.pull(ticket.office_id)
+    response = c.get(feed_url, headers={'If-None-Match': etag})
+
+    assert response.status == '200 OK'
+    assert response.headers.get('ETag') != etag
+    assert response.json.get('cot') == Serial.get(ticket.id).display_text
+
+
+@pytest.mark.usefixtures('c')
+def test_feed_stream_push_changes(c):
+    def read_event(response):
+        return next(response.response).decode('utf-8')
+
+    ticket = Serial.get_waiting_list_tickets(limit=1)[0]
+    response = c.get(f'/feed/stream/{ticket.office_id}', buffered=False)
+    initial_event = read_event(response)
+
+    assert response.status == '200 OK'
+    assert response.mimetype == 'text/event-stream'
+    assert initial_event.startswith('event: feed\n')
+
+    ticket.pull(ticket.office_id)
+    pulled_event = read_event(response)
+    current_ticket = Serial.get_last_pulled_ticket(ticket.office_id)
+
+    assert pulled_event.startswith('event: feed\n')
+    assert json.loads(pulled_event.split('data: ')[1]).get('cot') == current_ticket.display_text
+
+    c.get('/set_repeat_announcement/1')
+    assert read_event(response) == 'event: repeat\ndata: {}\n\n'
+    response.close()
 
 
 @pytest.mark.usefixtures('c')
@@ -634,3 +887,107 @@ def test_repeat_announcement(c):
     c.get('/set_repeat_announcement/1')
     assert Display_store.get().r_announcement is True
     assert c.get('/repeat_announcement').json.get('status') is True
+
+
+@pytest.mark.usefixtures('c')
+def test_announcement(c, monkeypatch):
+    mock_gTTs = MagicMock()
+    mock_gTTs.say.side_effect = lambda language, text, engine: f'/{engine}/{language}/{text}'
+    mock_gTTs.generation = 0
+    monkeypatch.setattr(app.announcements, 'gTTs', mock_gTTs)
+    display_settings = Display_store.get()
+    display_settings.prefix = True
+    display_settings.always_show_ticket_number = True
+    display_settings.announce = 'en-us,fr'
+    db.session.commit()
+    languages = ['en-us', 'fr']
+    ticket = Serial.query.filter_by(p=False).first()
+    office = ticket.office
+    fragments = {language: [office.prefix, str(ticket.number), ticket.name, get_message(language),
+                            office.prefix, office.name]
+                 for language in languages}
+
+    response = c.get(f'/announcement/{ticket.id}')
+
+    assert response.status == '200 OK'
+    assert response.json.get('mp3') == [f'/gtts/{language}/{fragment}'
+                                        for language in languages
+                                        for fragment in fragments[language]]
+    assert response.headers.get('Cache-Control') == 'no-cache'
+    assert response.headers.get('ETag')
+
+
+@pytest.mark.usefixtures('c')
+def test_announcement_not_modified(c, monkeypatch):
+    mock_gTTs = MagicMock()
+    mock_gTTs.say.side_effect = lambda language, text, engine: f'/{engine}/{language}/{text}'
+    mock_gTTs.generation = 0
+    monkeypatch.setattr(app.announcements, 'gTTs', mock_gTTs)
+    ticket = Serial.query.filter_by(p=False).first()
+    etag = c.get(f'/announcement/{ticket.id}').headers.get('ETag')
+    mock_gTTs.say.reset_mock()
+
+    response = c.get(f'/announcement/{ticket.id}', headers={'If-None-Match': etag})
+
+    assert response.status == '304 NOT MODIFIED'
+    assert mock_gTTs.say.call_count == 0
+
+    mock_gTTs.generation += 1
+    response = c.get(f'/announcement/{ticket.id}', headers={'If-None-Match': etag})
+
+    assert response.status == '200 OK'
+    assert response.headers.get('ETag') != etag
+    assert mock_gTTs.say.call_count > 0
+
+    etag = response.headers.get('ETag')
+    display_settings = Display_store.get()
+    display_settings.announce = 'fr'
+    db.session.commit()
+    response = c.get(f'/announcement/{ticket.id}', headers={'If-None-Match': etag})
+
+    assert response.status == '200 OK'
+    assert response.headers.get('ETag') != etag
+
+
+@pytest.mark.usefixtures('c')
+def test_announcement_failed_not_cached(c, monkeypatch):
+    mock_gTTs = MagicMock()
+    mock_gTTs.say.return_value = ''
+    monkeypatch.setattr(app.announcements, 'gTTs', mock_gTTs)
+    ticket = Serial.query.filter_by(p=False).first()
+
+    response = c.get(f'/announcement/{ticket.id}')
+
+    assert response.status == '500 INTERNAL SERVER ERROR'
+    assert response.headers.get('Cache-Control') == 'no-store'
+    assert 'ETag' not in response.headers
+
+
+@pytest.mark.usefixtures('c')
+def test_announcement_fragments_library(c):
+    library = get_fragments_library('en-us')
+
+    assert len(library) == len(set(library))
+    assert library[0] == get_message('en-us')
+    assert {'0', '999'} <= set(library)
+    for office in Office.query.all():
+        assert office.name in library
+
+
+@pytest.mark.usefixtures('c')
+def test_metrics(c):
+    c.get('/feed')
+    waiting = Serial.query.filter_by(p=False).first()
+    waiting_count = Serial.query.filter_by(p=False,
+                                           office_id=waiting.office_id,
+                                           task_id=waiting.task_id).count()
+
+    response = c.get('/metrics')
+    page_content = response.data.decode('utf-8')
+
+    assert response.status == '200 OK'
+    assert response.content_type == METRICS_CONTENT_TYPE
+    assert 'fqm_request_duration_seconds_count{endpoint="core.feed"}' in page_content
+    assert (f'fqm_waiting_tickets{{office_id="{waiting.office_id}",task_id="{waiting.task_id}"}} '
+            f'{float(waiting_count)}') in page_content
+    assert '# TYPE fqm_background_task_duration_seconds histogram' in page_content
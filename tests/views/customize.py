@@ -6,11 +6,13 @@ from collections import namedtuple
 
 import app.printer
 import app.views.customize
-import app.tasks.cache_tickets_tts
-from app.middleware import db
+import app.announcements
+from app.middleware import db, gTTs, profiler
 from app.helpers import get_tts_safely
+from app.announcements import get_ticket_fragments
+from app.constants import TTS_DEFAULT_ENGINE, PRINT_JOB_PRINTED, PRINT_JOB_PENDING
 from app.database import (Touch_store, Display_store, Printer, Slides_c,
-                          Vid, Media, Slides, Aliases, Settings, Serial)
+                          Vid, Media, Slides, Aliases, Settings, Serial, PrintJob)
 
 
 @pytest.mark.usefixtures('c')
@@ -386,8 +388,11 @@ def test_display_screen_customization(c):
         'bgcolor': 'testing',
         'hide_ticket_index': True
     }
-    data = {f'check{s}': True for s in get_tts_safely().keys()}
-    data.update({'display': 1,
+    languages = list(get_tts_safely().keys())
+    data = {f'check{s}': True for s in languages}
+    data.update({f'engine{s}': 'gtts' for s in languages[1:]})
+    data.update({f'engine{languages[0]}': 'espeak',
+                 'display': 1,
                  'background': 0,
                  'naudio': 0,
                  **properties})
@@ -398,6 +403,10 @@ def test_display_screen_customization(c):
     for key, value in properties.items():
         assert getattr(Display_store.get(), key, None) == value
 
+    assert Display_store.get().get_tts_engine(languages[0]) == 'espeak'
+    for language in languages[1:]:
+        assert Display_store.get().get_tts_engine(language) == 'gtts'
+
 
 @pytest.mark.usefixtures('c')
 def test_touch_screen_customization(c):
@@ -450,7 +459,8 @@ def test_aliases(c):
 @pytest.mark.usefixtures('c', 'get_bg_task')
 def test_background_tasks_cache_tts(c, get_bg_task, monkeypatch):
     mock_gTTs = MagicMock()
-    monkeypatch.setattr(app.tasks.cache_tickets_tts, 'gTTs', mock_gTTs)
+    mock_gTTs.is_cached.return_value = False
+    monkeypatch.setattr(app.announcements, 'gTTs', mock_gTTs)
     task_enabled = True
     task_every = 'second'
 
@@ -470,11 +480,36 @@ def test_background_tasks_cache_tts(c, get_bg_task, monkeypatch):
     assert mock_gTTs.say.called is True
 
 
+@pytest.mark.usefixtures('c', 'get_bg_task')
+def test_background_tasks_cache_tts_waiting_tickets(c, get_bg_task, monkeypatch):
+    mock_gTTs = MagicMock()
+    mock_gTTs.is_cached.return_value = False
+    monkeypatch.setattr(app.announcements, 'gTTs', mock_gTTs)
+
+    c.post('/background_tasks', data={
+        'cache_tts_enabled': True,
+        'cache_tts_every': 'second',
+        'delete_tickets_enabled': False,
+        'delete_tickets_every': 'day',
+        'delete_tickets_time': '12:12'
+    }, follow_redirects=True)
+    get_bg_task('CacheTicketsAnnouncements')
+    languages = Display_store.get().announce.split(',')
+    ticket = Serial.query.filter_by(p=False).order_by(Serial.timestamp).first()
+
+    for language in languages:
+        for fragment in get_ticket_fragments(ticket, language):
+            mock_gTTs.say.assert_any_call(language, fragment, TTS_DEFAULT_ENGINE)
+
+
 @pytest.mark.usefixtures('c', 'get_bg_task')
 def test_background_tasks_delete_tickets(c, get_bg_task):
     task_enabled = True
     task_every = 'second'
     task_time = None
+    db.session.add(PrintJob(ticket='A.101', status=PRINT_JOB_PRINTED))
+    db.session.add(PrintJob(ticket='A.102', status=PRINT_JOB_PENDING))
+    db.session.commit()
 
     response = c.post('/background_tasks', data={
         'cache_tts_enabled': False,
@@ -489,4 +524,21 @@ def test_background_tasks_delete_tickets(c, get_bg_task):
     assert task.settings.enabled == task_enabled
     assert task.settings.every == task_every
     assert task.settings.time is None
-    assert Serial.all_clean().count() == 0
+    assert Serial.query.count() == 0
+    assert [job.ticket for job in PrintJob.query] == ['A.102']
+
+
+@pytest.mark.usefixtures('c')
+def test_tts_cache_stats(c):
+    response = c.get('/tts_cache')
+
+    assert response.status == '200 OK'
+    assert response.json == gTTs.stats()
+
+
+@pytest.mark.usefixtures('c')
+def test_queries_profile_stats(c):
+    response = c.get('/queries_profile')
+
+    assert response.status == '200 OK'
+    assert response.json == profiler.stats()
@@ -1,10 +1,12 @@
 import pytest
 from random import choice
+from sqlalchemy import event
 from sqlalchemy.sql.expression import func
 from uuid import uuid4
 
 from .. import TEST_PREFIX, get_first_office_with_tickets
-from app.database import Task, Office, Serial
+from app.middleware import db
+from app.database import Task, Office, Serial, User
 from app.utils import ids
 from app.constants import TICKET_UNATTENDED
 
@@ -20,8 +22,7 @@ def test_management_welcome(c):
 
 @pytest.mark.usefixtures('c')
 def test_list_offices(c):
-    tickets = Serial.query.filter(Serial.number != 100)\
-                          .order_by(Serial.p, Serial.timestamp.desc())\
+    tickets = Serial.query.order_by(Serial.p, Serial.timestamp.desc())\
                           .limit(10)
 
     response = c.get('/all_offices', follow_redirects=True)
@@ -33,11 +34,35 @@ def test_list_offices(c):
         assert f'<b> {ticket.office.prefix}{ ticket.number }.</b>' in page_content
 
 
+@pytest.mark.usefixtures('c')
+def test_list_tickets_relationships_loaded_along(c):
+    statements = []
+    track_statements = lambda conn, cursor, statement, *args: statements.append(statement)
+    user = User.query.first()
+    user_id, user_name = user.id, user.name
+
+    for ticket in Serial.query.limit(10):
+        ticket.p = True
+        ticket.pulledBy = user_id
+
+    db.session.commit()
+    db.session.remove()
+    tickets = Serial.query.eager.limit(10).all()
+    event.listen(db.engine, 'before_cursor_execute', track_statements)
+
+    try:
+        relationships = [(t.office.id, t.task.id, t.puller_name) for t in tickets]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', track_statements)
+
+    assert statements == []
+    assert relationships == [(t.office_id, t.task_id, user_name) for t in tickets]
+
+
 @pytest.mark.usefixtures('c')
 def test_list_office(c):
     office = choice(Office.query.all())
     tickets = Serial.all_office_tickets(office.id)\
-                    .filter(Serial.number != 100)\
                     .order_by(Serial.p, Serial.timestamp.desc())\
                     .limit(10)
 
@@ -55,7 +80,6 @@ def test_list_office_with_common_task(c):
     task = Task.get_first_common()
     office = choice(task.offices)
     tickets = Serial.all_office_tickets(office.id)\
-                    .filter(Serial.number != 100)\
                     .order_by(Serial.p, Serial.timestamp.desc())\
                     .limit(10)
 
@@ -113,8 +137,7 @@ def test_delete_all_offices(c):
 @pytest.mark.usefixtures('c')
 def test_search(c):
     office = get_first_office_with_tickets(c)
-    ticket = Serial.query.filter(Serial.office_id == office.id,
-                                 Serial.number != 100)\
+    ticket = Serial.query.filter(Serial.office_id == office.id)\
                          .first()
 
     response = c.post('/search', data={